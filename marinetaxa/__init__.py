@@ -0,0 +1,3 @@
+"""Processing engine behind the MarineTaxaAI Streamlit app."""
+
+__version__ = "0.1.0"
@@ -0,0 +1,365 @@
+"""Asyncio HTTP service for batch sequence submission with streamed results.
+
+	POST /jobs               {"sequences": ["ACGT...", {"id": "r1", "sequence": "..."}], "params": {...}, "sample": {"depth": 4500, ...}}
+	                         or a FASTA body (Content-Type: text/x-fasta) -> {"job_id": "..."}
+	                         ("depth_m": 4500 is shorthand for a sample with only a depth)
+	GET  /jobs/<id>          status and progress counts
+	GET  /jobs/<id>/results  per-sequence results as NDJSON while they are produced
+	                         (server-sent events with Accept: text/event-stream)
+	GET  /health
+
+One event loop serves every connection; CPU work runs in a process pool, one
+batch per job at a time, so concurrent jobs interleave fairly on the cores.
+Jobs are kept in memory and dropped an hour after they finish. Sequences
+outside params.min_length..max_length come back with "passed_filter": false
+and no cluster or score; quality_filter is rejected, as submissions carry no
+base qualities. With a sample
+depth, candidates are flagged against that depth zone's calibrated threshold
+and the job's scores are folded into the calibration table.
+"""
+import asyncio
+import io
+import json
+import multiprocessing
+import signal
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from Bio.SeqIO.FastaIO import SimpleFastaParser
+
+from . import calibration, envfeatures, pipeline
+
+MAX_BODY_BYTES = 64 * 1024 ** 2
+JOB_TTL_SECONDS = 3600
+_PARAM_NAMES = {f.name for f in fields(pipeline.PipelineParams)} - {"workers"}
+# Accepted by the batch pipeline but meaningless here
+_UNSUPPORTED_PARAMS = {"quality_filter": "submitted sequences carry no base qualities"}
+# Numeric params: (type, lowest, highest); kmer_size is capped since embeddings are 4**k wide
+_PARAM_LIMITS = {
+	"batch_size": (int, 1, 100_000),
+	"novelty_threshold": (float, 0.0, 1.0),
+	"min_length": (int, 0, 1_000_000),
+	"max_length": (int, 1, 1_000_000),
+	"min_cluster_size": (int, 1, 1_000_000),
+	"kmer_size": (int, 1, 8),
+}
+
+
+class HttpError(Exception):
+	def __init__(self, status: HTTPStatus, message: str = ""):
+		super().__init__(message or status.phrase)
+		self.status = status
+
+
+def _analyze_batch(seqs: List[str], centroids: np.ndarray, params: dict):
+	# Runs in a pool process: the analyzer state travels as the (small) centroid matrix
+	analyzer = pipeline.StreamingAnalyzer(pipeline.PipelineParams(**params), centroids)
+	labels, scores = analyzer.process(seqs)
+	return labels, scores, analyzer.centroids
+
+
+class ApiJob:
+	def __init__(self, ids: List[str], seqs: List[str], params: pipeline.PipelineParams, depth_m: Optional[float] = None):
+		self.id = uuid.uuid4().hex[:12]
+		self.ids = ids
+		self.seqs = seqs
+		self.params = params
+		self.depth_m = depth_m
+		self.status = "queued"
+		self.error: Optional[str] = None
+		self.results: List[dict] = []
+		self.finished_at: Optional[float] = None
+		self._changed = asyncio.Condition()
+
+	def describe(self) -> dict:
+		return {"job_id": self.id, "status": self.status, "total": len(self.seqs), "completed": len(self.results), "error": self.error}
+
+	async def _publish(self, rows: List[dict], status: Optional[str] = None) -> None:
+		async with self._changed:
+			self.results.extend(rows)
+			if status:
+				self.status = status
+			self._changed.notify_all()
+
+	async def run(self, pool: ProcessPoolExecutor, table: calibration.CalibrationTable) -> None:
+		loop = asyncio.get_running_loop()
+		await self._publish([], "running")
+		try:
+			params = self.params.to_dict()
+			centroids = np.empty((0, 4 ** self.params.kmer_size), dtype=np.float32)
+			step = max(1, self.params.batch_size)
+			for start in range(0, len(self.seqs), step):
+				batch = self.seqs[start:start + step]
+				labels, scores, centroids = await loop.run_in_executor(pool, _analyze_batch, batch, centroids, params)
+				ids = pipeline.cluster_ids(len(centroids))
+				threshold = self.params.novelty_threshold
+				passed = ~np.isnan(scores)
+				if self.depth_m is not None:
+					threshold = float(table.thresholds(self.depth_m, self.params.novelty_threshold))
+					table.update(scores[passed], self.depth_m)
+				# Sequences outside min_length..max_length are reported but not scored
+				await self._publish([{
+					"index": start + i,
+					"id": self.ids[start + i],
+					"passed_filter": bool(passed[i]),
+					"cluster_id": str(ids[labels[i]]) if passed[i] else None,
+					"novelty_score": round(float(scores[i]), 4) if passed[i] else None,
+					"threshold": round(threshold, 4),
+					"candidate_novel": bool(passed[i] and scores[i] > threshold),
+				} for i in range(len(batch))])
+			if self.depth_m is not None:
+				table.save()
+			await self._publish([], "done")
+		except Exception as exc:
+			self.error = f"{type(exc).__name__}: {exc}"
+			await self._publish([], "failed")
+		finally:
+			self.finished_at = time.monotonic()
+
+	async def follow(self):
+		"""Yield lists of new result rows until the job finishes."""
+		sent = 0
+		while True:
+			async with self._changed:
+				await self._changed.wait_for(lambda: len(self.results) > sent or self.status in ("done", "failed"))
+				rows = self.results[sent:]
+				finished = self.status in ("done", "failed")
+			sent += len(rows)
+			if rows:
+				yield rows
+			if finished and sent == len(self.results):
+				return
+
+
+def parse_params(raw) -> pipeline.PipelineParams:
+	"""PipelineParams from a submission's "params" object; raises HttpError(400) on unknown names or bad values."""
+	if not isinstance(raw, dict):
+		raise HttpError(HTTPStatus.BAD_REQUEST, "params must be an object")
+	unknown = set(raw) - _PARAM_NAMES
+	if unknown:
+		raise HttpError(HTTPStatus.BAD_REQUEST, f"Unknown params: {', '.join(sorted(unknown))}")
+	unsupported = sorted(set(raw) & set(_UNSUPPORTED_PARAMS))
+	if unsupported:
+		raise HttpError(HTTPStatus.BAD_REQUEST, f"params.{unsupported[0]} is not supported: {_UNSUPPORTED_PARAMS[unsupported[0]]}")
+	clean = {}
+	for name, value in raw.items():
+		if name in _PARAM_LIMITS:
+			kind, low, high = _PARAM_LIMITS[name]
+			try:
+				if isinstance(value, bool):
+					raise ValueError
+				number = kind(value)
+				if kind is int and number != float(value):
+					raise ValueError
+			except (TypeError, ValueError):
+				raise HttpError(HTTPStatus.BAD_REQUEST, f"params.{name} must be {'an integer' if kind is int else 'a number'}")
+			if not low <= number <= high:
+				raise HttpError(HTTPStatus.BAD_REQUEST, f"params.{name} must be between {low} and {high}")
+			clean[name] = number
+		elif name == "clustering_method":
+			if value not in pipeline.CLUSTERING_METHODS:
+				raise HttpError(HTTPStatus.BAD_REQUEST, f"params.clustering_method must be one of {', '.join(pipeline.CLUSTERING_METHODS)}")
+			clean[name] = value
+		elif not isinstance(value, str):
+			raise HttpError(HTTPStatus.BAD_REQUEST, f"params.{name} must be a string")
+		else:
+			clean[name] = value
+	params = pipeline.PipelineParams(**clean)
+	if params.min_length > params.max_length:
+		raise HttpError(HTTPStatus.BAD_REQUEST, "params.min_length must not exceed params.max_length")
+	return params
+
+
+def parse_submission(body: bytes, content_type: str) -> Tuple[List[str], List[str], pipeline.PipelineParams, Optional[float]]:
+	if content_type.startswith("text/"):
+		try:
+			text = body.decode("ascii")
+		except UnicodeDecodeError as exc:
+			raise HttpError(HTTPStatus.BAD_REQUEST, f"FASTA body must be ASCII: byte 0x{body[exc.start]:02x} at offset {exc.start}")
+		records = list(SimpleFastaParser(io.StringIO(text)))
+		ids, seqs = [title.split(None, 1)[0] if title else str(i) for i, (title, _) in enumerate(records)], [s for _, s in records]
+		payload = {}
+	else:
+		try:
+			payload = json.loads(body or b"{}")
+		except ValueError:
+			raise HttpError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON")
+		if not isinstance(payload, dict):
+			raise HttpError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+		if not isinstance(payload.get("sequences", []), list):
+			raise HttpError(HTTPStatus.BAD_REQUEST, "sequences must be a list")
+		ids, seqs = [], []
+		for i, item in enumerate(payload.get("sequences", [])):
+			if isinstance(item, str):
+				ids.append(str(i))
+				seqs.append(item)
+			elif isinstance(item, dict) and isinstance(item.get("sequence"), str):
+				ids.append(str(item.get("id", i)))
+				seqs.append(item["sequence"])
+			else:
+				raise HttpError(HTTPStatus.BAD_REQUEST, f"sequences[{i}] must be a string or an object with 'sequence'")
+	if not seqs:
+		raise HttpError(HTTPStatus.BAD_REQUEST, "No sequences submitted")
+	# k-mer profiles are built from the ASCII bytes of each sequence
+	for i, seq in enumerate(seqs):
+		if not seq.isascii():
+			bad = next(ch for ch in seq if not ch.isascii())
+			raise HttpError(HTTPStatus.BAD_REQUEST, f"sequence {ids[i]} has a non-ASCII character {bad!r} at position {seq.index(bad)}")
+	params = parse_params(payload.get("params", {}))
+	sample = payload.get("sample")
+	if sample is not None and not isinstance(sample, dict):
+		raise HttpError(HTTPStatus.BAD_REQUEST, "sample must be an object")
+	record = dict(sample or {})
+	if payload.get("depth_m") is not None:
+		record.setdefault("depth", payload["depth_m"])
+	try:
+		sample = envfeatures.validate_sample(record)
+	except ValueError as exc:
+		raise HttpError(HTTPStatus.BAD_REQUEST, str(exc))
+	return ids, seqs, params, sample["depth"]
+
+
+class ApiServer:
+	def __init__(self, workers: int = 1):
+		self.pool = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn"))
+		self.jobs: Dict[str, ApiJob] = {}
+		self.calibration = calibration.CalibrationTable.load("isolation")
+		self._tasks = set()
+
+	async def _read_request(self, reader: asyncio.StreamReader):
+		line = await reader.readline()
+		if not line:
+			return None
+		try:
+			method, target, _ = line.decode("latin-1").split()
+		except ValueError:
+			raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+		headers = {}
+		while True:
+			line = await reader.readline()
+			if line in (b"\r\n", b"\n", b""):
+				break
+			name, _, value = line.decode("latin-1").partition(":")
+			headers[name.strip().lower()] = value.strip()
+		try:
+			length = int(headers.get("content-length") or 0)
+		except ValueError:
+			length = -1
+		if length < 0:
+			raise HttpError(HTTPStatus.BAD_REQUEST, "Content-Length must be a non-negative integer")
+		if length > MAX_BODY_BYTES:
+			raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+		body = await reader.readexactly(length) if length else b""
+		return method.upper(), target.split("?", 1)[0], headers, body
+
+	async def _send(self, writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict) -> None:
+		body = json.dumps(payload).encode()
+		writer.write(
+			f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+			f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+		)
+		await writer.drain()
+
+	async def _stream(self, writer: asyncio.StreamWriter, job: ApiJob, sse: bool) -> None:
+		content_type = "text/event-stream" if sse else "application/x-ndjson"
+		writer.write(
+			f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nCache-Control: no-cache\r\n"
+			"Transfer-Encoding: chunked\r\n\r\n".encode()
+		)
+		async for rows in job.follow():
+			if sse:
+				data = "".join(f"data: {json.dumps(r)}\n\n" for r in rows)
+			else:
+				data = "".join(json.dumps(r) + "\n" for r in rows)
+			chunk = data.encode()
+			writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+			await writer.drain()
+		if sse:
+			tail = f"event: {job.status}\ndata: {json.dumps(job.describe())}\n\n".encode()
+			writer.write(b"%x\r\n%s\r\n" % (len(tail), tail))
+		writer.write(b"0\r\n\r\n")
+		await writer.drain()
+
+	async def _dispatch(self, method: str, path: str, headers: dict, body: bytes, writer: asyncio.StreamWriter) -> None:
+		parts = [p for p in path.split("/") if p]
+		if method == "GET" and parts == ["health"]:
+			active = sum(job.status in ("queued", "running") for job in self.jobs.values())
+			return await self._send(writer, HTTPStatus.OK, {"status": "ok", "jobs": len(self.jobs), "active": active})
+		if method == "POST" and parts == ["jobs"]:
+			job = ApiJob(*parse_submission(body, headers.get("content-type", "application/json")))
+			self.jobs[job.id] = job
+			task = asyncio.create_task(job.run(self.pool, self.calibration))
+			self._tasks.add(task)
+			task.add_done_callback(self._tasks.discard)
+			return await self._send(writer, HTTPStatus.ACCEPTED, job.describe())
+		if method == "GET" and len(parts) in (2, 3) and parts[0] == "jobs":
+			job = self.jobs.get(parts[1])
+			if job is None:
+				raise HttpError(HTTPStatus.NOT_FOUND, f"No job {parts[1]}")
+			if len(parts) == 2:
+				return await self._send(writer, HTTPStatus.OK, job.describe())
+			if parts[2] == "results":
+				return await self._stream(writer, job, "text/event-stream" in headers.get("accept", ""))
+		raise HttpError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+
+	async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		try:
+			while True:
+				try:
+					request = await self._read_request(reader)
+				except HttpError as exc:
+					# The rest of the request is unread, so the connection cannot be reused
+					await self._send(writer, exc.status, {"error": str(exc)})
+					break
+				if request is None:
+					break
+				try:
+					await self._dispatch(*request, writer)
+				except HttpError as exc:
+					await self._send(writer, exc.status, {"error": str(exc)})
+				except (ConnectionError, asyncio.CancelledError):
+					raise
+				except Exception as exc:
+					# A bug in one request must not drop the client without an answer
+					await self._send(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exc).__name__}: {exc}"})
+					break
+				if request[2].get("connection", "").lower() == "close":
+					break
+		except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+			# CancelledError: idle keep-alive connections at shutdown
+			pass
+		finally:
+			writer.close()
+
+	async def _evict(self) -> None:
+		while True:
+			await asyncio.sleep(60)
+			now = time.monotonic()
+			for job_id, job in list(self.jobs.items()):
+				if job.finished_at is not None and now - job.finished_at > JOB_TTL_SECONDS:
+					del self.jobs[job_id]
+
+	async def serve(self, host: str, port: int) -> None:
+		server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+		evictor = asyncio.create_task(self._evict())
+		serving = asyncio.create_task(server.serve_forever())
+		# SIGTERM must unwind through the finally below, or the pool processes are orphaned
+		asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+		print(f"MarineTaxaAI API listening on http://{host}:{port}", flush=True)
+		try:
+			async with server:
+				await serving
+		except asyncio.CancelledError:
+			pass
+		finally:
+			evictor.cancel()
+			self.pool.shutdown(cancel_futures=True)
+
+
+def run(host: str = "127.0.0.1", port: int = 8765, workers: int = 1) -> None:
+	asyncio.run(ApiServer(workers).serve(host, port))
@@ -0,0 +1,100 @@
+"""Content-addressed store for intermediate pipeline outputs.
+
+Each stage output is a directory of ``.npy`` arrays keyed by a hash of the
+stage's inputs (the upstream key) and the parameters that affect it, so a
+re-run only recomputes stages whose inputs or knobs changed and a crashed run
+resumes after its last finished stage.
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .config import data_dir
+
+_CHUNK = 1 << 20
+
+
+def digest(*parts) -> str:
+	payload = json.dumps(parts, sort_keys=True, default=str).encode()
+	return hashlib.sha256(payload).hexdigest()
+
+
+def file_digest(path) -> str:
+	h = hashlib.sha256()
+	with open(path, "rb") as handle:
+		for chunk in iter(lambda: handle.read(_CHUNK), b""):
+			h.update(chunk)
+	return h.hexdigest()
+
+
+def pack_strings(values: Sequence[str]) -> Dict[str, np.ndarray]:
+	"""Store strings as one byte buffer plus offsets instead of a fixed-width unicode array."""
+	encoded = [v.encode("ascii", "replace") for v in values]
+	offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+	np.cumsum([len(b) for b in encoded], out=offsets[1:])
+	return {"data": np.frombuffer(b"".join(encoded), dtype=np.uint8), "offsets": offsets}
+
+
+def unpack_strings(data: np.ndarray, offsets: np.ndarray, index: Optional[Sequence[int]] = None) -> List[str]:
+	"""All packed strings, or only those at `index` (without decoding the rest)."""
+	if index is not None:
+		data = np.asarray(data)
+		return [data[offsets[i]:offsets[i + 1]].tobytes().decode("ascii") for i in index]
+	raw = np.asarray(data).tobytes()
+	return [raw[offsets[i]:offsets[i + 1]].decode("ascii") for i in range(len(offsets) - 1)]
+
+
+class ArtifactStore:
+	def __init__(self, root=None):
+		self.root = Path(root) if root else data_dir() / "artifacts"
+		self.root.mkdir(parents=True, exist_ok=True)
+		self._digests = self.root / "input_digests.json"
+
+	def path(self, stage: str, key: str) -> Path:
+		return self.root / stage / key[:2] / key
+
+	def has(self, stage: str, key: str) -> bool:
+		return self.path(stage, key).is_dir()
+
+	def load(self, stage: str, key: str, mmap: bool = True) -> Optional[Dict[str, np.ndarray]]:
+		path = self.path(stage, key)
+		if not path.is_dir():
+			return None
+		mode = "r" if mmap else None
+		return {f.stem: np.load(f, mmap_mode=mode, allow_pickle=False) for f in path.glob("*.npy")}
+
+	def save(self, stage: str, key: str, arrays: Dict[str, np.ndarray]) -> Path:
+		final = self.path(stage, key)
+		final.parent.mkdir(parents=True, exist_ok=True)
+		# Write into a scratch dir and rename so readers never see a half-written artifact
+		tmp = final.parent / f".{key}.{uuid.uuid4().hex}"
+		tmp.mkdir()
+		for name, array in arrays.items():
+			np.save(tmp / f"{name}.npy", np.asarray(array), allow_pickle=False)
+		try:
+			os.replace(tmp, final)
+		except OSError:
+			# Another worker finished the same stage first; its output is identical
+			shutil.rmtree(tmp, ignore_errors=True)
+		return final
+
+	def input_key(self, paths: Sequence) -> str:
+		"""Hash of input file contents, memoised on (path, size, mtime) to avoid re-reading large files."""
+		memo = json.loads(self._digests.read_text()) if self._digests.exists() else {}
+		hashes = []
+		for p in paths:
+			stat = os.stat(p)
+			ident = f"{Path(p).resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+			if ident not in memo:
+				memo[ident] = file_digest(p)
+			hashes.append(memo[ident])
+		tmp = self._digests.with_suffix(f".{uuid.uuid4().hex}.tmp")
+		tmp.write_text(json.dumps(memo))
+		os.replace(tmp, self._digests)
+		return digest(sorted(hashes))
@@ -0,0 +1,185 @@
+"""Dense autoencoder over k-mer embeddings for reconstruction-error novelty.
+
+Weights live in a local ``.npz`` file (``W0, b0, W1, b1, ...`` with ReLU on
+every hidden layer and a linear output, plus ``calibration``: quantiles of the
+training reconstruction errors). Inference is plain NumPy over fixed-size
+batches written into buffers allocated once per scorer, so scoring an
+embedding store of any size (e.g. a memory-mapped ``.npy``) uses constant
+memory. The calibrated score is the empirical CDF of the training errors, so
+0.95 means "reconstructed worse than 95% of training sequences".
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import data_dir
+
+_CALIBRATION_POINTS = 1001
+
+
+def default_model_path() -> Path:
+	return data_dir() / "models" / "autoencoder.npz"
+
+
+def model_stamp(path=None) -> Optional[tuple]:
+	"""(size, mtime) of the model file, to key caches on; None without a trained model."""
+	path = Path(path or default_model_path())
+	if not path.exists():
+		return None
+	stat = path.stat()
+	return (stat.st_size, stat.st_mtime_ns)
+
+
+class Autoencoder:
+	def __init__(self, weights: Sequence[np.ndarray], biases: Sequence[np.ndarray], calibration: np.ndarray, kmer_size: int):
+		self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+		self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+		self.calibration = np.asarray(calibration, dtype=np.float32)
+		self.kmer_size = kmer_size
+		for prev, w in zip(self.weights, self.weights[1:]):
+			if prev.shape[1] != w.shape[0]:
+				raise ValueError(f"Layer shapes do not chain: {prev.shape} -> {w.shape}")
+		if self.weights[-1].shape[1] != self.input_dim:
+			raise ValueError("Output layer must reconstruct the input dimension")
+
+	@property
+	def input_dim(self) -> int:
+		return self.weights[0].shape[0]
+
+	@classmethod
+	def load(cls, path=None) -> "Autoencoder":
+		with np.load(path or default_model_path(), allow_pickle=False) as data:
+			n_layers = sum(1 for name in data.files if name.startswith("W"))
+			return cls(
+				[data[f"W{i}"] for i in range(n_layers)],
+				[data[f"b{i}"] for i in range(n_layers)],
+				data["calibration"],
+				int(data["kmer_size"]),
+			)
+
+	def save(self, path=None) -> Path:
+		path = Path(path or default_model_path())
+		path.parent.mkdir(parents=True, exist_ok=True)
+		arrays = {f"W{i}": w for i, w in enumerate(self.weights)}
+		arrays.update({f"b{i}": b for i, b in enumerate(self.biases)})
+		# Written aside and renamed, so a running app never loads a half-written model
+		tmp = path.with_name(f".{path.name}.tmp")
+		with open(tmp, "wb") as handle:
+			np.savez(handle, calibration=self.calibration, kmer_size=np.int64(self.kmer_size), **arrays)
+		os.replace(tmp, path)
+		return path
+
+
+class AutoencoderScorer:
+	"""Batch inference with per-layer buffers allocated once for `batch_size` rows.
+
+	One scorer may be shared between threads (the app caches a single one);
+	the buffers are used by one batch at a time.
+	"""
+
+	def __init__(self, model: Autoencoder, batch_size: int = 1024):
+		self.model = model
+		self.batch_size = batch_size
+		self._layers = [np.empty((batch_size, w.shape[1]), dtype=np.float32) for w in model.weights]
+		self._errors = np.empty(batch_size, dtype=np.float32)
+		self._lock = threading.Lock()
+
+	def _batch_errors(self, x: np.ndarray) -> np.ndarray:
+		n = len(x)
+		h = x
+		last = len(self.model.weights) - 1
+		for i, (w, b) in enumerate(zip(self.model.weights, self.model.biases)):
+			out = self._layers[i][:n]
+			np.matmul(h, w, out=out)
+			out += b
+			if i < last:
+				np.maximum(out, 0, out=out)
+			h = out
+		# Mean squared reconstruction error, reusing the output buffer for the residual
+		h -= x
+		errors = self._errors[:n]
+		np.einsum("ij,ij->i", h, h, out=errors)
+		errors /= x.shape[1]
+		return errors
+
+	def calibrate(self, errors: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+		quantiles = self.model.calibration
+		levels = np.linspace(0.0, 1.0, len(quantiles), dtype=np.float32)
+		scores = np.interp(errors, quantiles, levels).astype(np.float32)
+		if out is None:
+			return scores
+		out[...] = scores
+		return out
+
+	def score_array(self, emb: np.ndarray, errors_out: Optional[np.ndarray] = None, scores_out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+		"""(reconstruction_error, novelty_score) for every row of `emb`; outputs may be memmaps."""
+		if emb.shape[1] != self.model.input_dim:
+			raise ValueError(f"Embeddings have {emb.shape[1]} dims, model expects {self.model.input_dim}")
+		errors_out = np.empty(len(emb), dtype=np.float32) if errors_out is None else errors_out
+		scores_out = np.empty(len(emb), dtype=np.float32) if scores_out is None else scores_out
+		for start in range(0, len(emb), self.batch_size):
+			stop = min(start + self.batch_size, len(emb))
+			# Only one batch of a memory-mapped store is paged in at a time
+			batch = np.asarray(emb[start:stop], dtype=np.float32)
+			with self._lock:
+				errors_out[start:stop] = self._batch_errors(batch)
+			self.calibrate(errors_out[start:stop], scores_out[start:stop])
+		return errors_out, scores_out
+
+	def stream(self, batches: Iterable[np.ndarray]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+		"""Score embedding batches as they arrive; each yielded pair is a fresh array."""
+		for emb in batches:
+			yield self.score_array(emb)
+
+	def score_file(self, emb_path, out_path) -> Path:
+		"""Score a ``.npy`` embedding file into a ``.npy`` of (error, score) rows without loading either."""
+		emb = np.load(emb_path, mmap_mode="r")
+		out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=(len(emb), 2))
+		for start in range(0, len(emb), self.batch_size):
+			stop = min(start + self.batch_size, len(emb))
+			errors, scores = self.score_array(emb[start:stop])
+			out[start:stop, 0] = errors
+			out[start:stop, 1] = scores
+		out.flush()
+		return Path(out_path)
+
+
+def fit(emb: np.ndarray, kmer_size: int, hidden: Sequence[int] = (64, 16), epochs: int = 20, batch_size: int = 256, learning_rate: float = 1e-3, seed: int = 0) -> Autoencoder:
+	"""Train with Adam on mean squared error; calibration uses the final training errors."""
+	rng = np.random.default_rng(seed)
+	sizes = [emb.shape[1], *hidden, emb.shape[1]]
+	weights = [(rng.standard_normal((a, b)) * np.sqrt(2.0 / a)).astype(np.float32) for a, b in zip(sizes, sizes[1:])]
+	biases = [np.zeros(b, dtype=np.float32) for b in sizes[1:]]
+	params: List[np.ndarray] = weights + biases
+	moments = [np.zeros_like(p) for p in params]
+	velocities = [np.zeros_like(p) for p in params]
+	beta1, beta2, eps = 0.9, 0.999, 1e-8
+	step = 0
+	for _ in range(epochs):
+		for idx in np.array_split(rng.permutation(len(emb)), max(1, len(emb) // batch_size)):
+			x = np.asarray(emb[idx], dtype=np.float32)
+			activations = [x]
+			for i, (w, b) in enumerate(zip(weights, biases)):
+				z = activations[-1] @ w + b
+				activations.append(np.maximum(z, 0) if i < len(weights) - 1 else z)
+			grad = 2.0 * (activations[-1] - x) / x.size
+			grads_w, grads_b = [None] * len(weights), [None] * len(weights)
+			for i in range(len(weights) - 1, -1, -1):
+				grads_w[i] = activations[i].T @ grad
+				grads_b[i] = grad.sum(axis=0)
+				if i:
+					grad = (grad @ weights[i].T) * (activations[i] > 0)
+			step += 1
+			for p, g, m, v in zip(params, grads_w + grads_b, moments, velocities):
+				m *= beta1
+				m += (1 - beta1) * g
+				v *= beta2
+				v += (1 - beta2) * g * g
+				p -= learning_rate * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + eps)
+	model = Autoencoder(weights, biases, np.zeros(2, dtype=np.float32), kmer_size)
+	errors, _ = AutoencoderScorer(model).score_array(emb)
+	model.calibration = np.quantile(errors, np.linspace(0, 1, _CALIBRATION_POINTS)).astype(np.float32)
+	return model
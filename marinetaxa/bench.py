@@ -0,0 +1,257 @@
+"""Reproducible CPU benchmark for each pipeline stage.
+
+Generates seeded synthetic FASTQ datasets of fixed sizes, times every stage
+(best of N runs) and measures its peak traced memory, then writes the results
+as versioned JSON and compares them with a stored baseline. The sharded
+embed/score stages are also timed at several worker counts to report
+multi-core scaling::
+
+	python -m marinetaxa.bench --sizes small medium
+	python -m marinetaxa.bench --workers 1 4 16
+	python -m marinetaxa.bench --save-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from . import __version__, pipeline
+
+SCHEMA_VERSION = 1
+DATASET_SIZES = {"small": 2_000, "medium": 20_000, "large": 100_000}
+BENCH_DIR = Path(__file__).resolve().parent.parent / "benchmarks"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+def synthetic_fastq(path, n_reads: int, n_taxa: int = 50, read_length=(250, 450), mutation_rate: float = 0.02, seed: int = 7) -> Path:
+	"""Reads drawn from random prototype taxa with point mutations; identical for a given seed."""
+	rng = np.random.default_rng(seed)
+	alphabet = np.frombuffer(b"ACGT", dtype=np.uint8)
+	max_len = read_length[1]
+	protos = rng.integers(0, 4, size=(n_taxa, max_len))
+	# Skewed abundances like a real community
+	weights = rng.zipf(1.6, n_taxa).astype(float)
+	taxa = rng.choice(n_taxa, size=n_reads, p=weights / weights.sum())
+	codes = protos[taxa]
+	mutate = rng.random(codes.shape) < mutation_rate
+	codes[mutate] = rng.integers(0, 4, size=int(mutate.sum()))
+	lengths = rng.integers(read_length[0], read_length[1] + 1, size=n_reads)
+	seqs = alphabet[codes]
+	quality = b"I" * max_len
+	with open(path, "wb") as handle:
+		for i in range(n_reads):
+			n = lengths[i]
+			handle.write(b"@syn%d\n%s\n+\n%s\n" % (i, seqs[i, :n].tobytes(), quality[:n]))
+	return Path(path)
+
+
+def _stage_runners(path, params: pipeline.PipelineParams):
+	"""One callable per stage, each consuming the previous stage's output and returning its item count."""
+	state = {}
+
+	def parse():
+		state["reads"] = pipeline.parse_reads([path])
+		return len(state["reads"])
+
+	def qc():
+		state["kept"] = pipeline.quality_filter(state["reads"], params)
+		return len(state["reads"])
+
+	def dereplicate():
+		state["seqs"], state["counts"], _ = pipeline.dereplicate(state["kept"])
+		return len(state["kept"])
+
+	def embed():
+		state["emb"] = pipeline.embed(state["seqs"], params)
+		return len(state["seqs"])
+
+	def cluster():
+		state["labels"] = pipeline.cluster(state["emb"], state["counts"], params)
+		return len(state["emb"])
+
+	def score():
+		pipeline.score(state["emb"], state["labels"], params)
+		return len(state["emb"])
+
+	return [("parse", parse), ("qc", qc), ("dereplicate", dereplicate), ("embed", embed), ("cluster", cluster), ("score", score)]
+
+
+def bench_dataset(path, dataset: str, n_reads: int, params: pipeline.PipelineParams, repeat: int = 3) -> List[Dict]:
+	timings: Dict[str, float] = {}
+	items: Dict[str, int] = {}
+	for _ in range(repeat):
+		for stage, run in _stage_runners(path, params):
+			start = time.perf_counter()
+			items[stage] = run()
+			elapsed = time.perf_counter() - start
+			timings[stage] = min(timings.get(stage, elapsed), elapsed)
+
+	# Separate traced pass: tracemalloc slows Python-heavy stages, so it never overlaps timing
+	peaks: Dict[str, float] = {}
+	tracemalloc.start()
+	try:
+		for stage, run in _stage_runners(path, params):
+			tracemalloc.reset_peak()
+			run()
+			peaks[stage] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+	finally:
+		tracemalloc.stop()
+
+	return [{
+		"dataset": dataset,
+		"reads": n_reads,
+		"stage": stage,
+		"items": items[stage],
+		"seconds": round(timings[stage], 6),
+		"seq_per_min": round(items[stage] / max(timings[stage], 1e-9) * 60, 1),
+		"peak_mb": round(peaks[stage], 2),
+	} for stage in pipeline.STAGES]
+
+
+def bench_scaling(path, dataset: str, params: pipeline.PipelineParams, worker_counts: List[int], repeat: int = 3) -> List[Dict]:
+	"""Best-of-N throughput of the sharded embed and score stages per worker count."""
+	reads = pipeline.quality_filter(pipeline.parse_reads([path]), params)
+	seqs, counts, _ = pipeline.dereplicate(reads)
+	emb = pipeline.embed(seqs, params)
+	labels = pipeline.cluster(emb, counts, params)
+	rows = []
+	for workers in worker_counts:
+		sharded = pipeline.PipelineParams(**{**params.to_dict(), "workers": workers})
+		with pipeline.process_pool(workers) as pool:
+			if pool:
+				# Spawn every worker before timing
+				pipeline.embed(seqs[:workers * sharded.batch_size], sharded, pool=pool)
+			for stage, run in (("embed", lambda: pipeline.embed(seqs, sharded, pool=pool)), ("score", lambda: pipeline.score(emb, labels, sharded, pool=pool))):
+				best = float("inf")
+				for _ in range(repeat):
+					start = time.perf_counter()
+					run()
+					best = min(best, time.perf_counter() - start)
+				rows.append({"dataset": dataset, "stage": stage, "workers": workers, "items": len(seqs), "seconds": round(best, 6), "seq_per_min": round(len(seqs) / max(best, 1e-9) * 60, 1)})
+	for row in rows:
+		serial = next(r for r in rows if r["stage"] == row["stage"] and r["workers"] == worker_counts[0])
+		row["speedup"] = round(serial["seconds"] / max(row["seconds"], 1e-9) * worker_counts[0], 2)
+		row["efficiency"] = round(row["speedup"] / row["workers"], 2)
+	return rows
+
+
+def run_benchmarks(sizes: Optional[List[str]] = None, repeat: int = 3, params: Optional[pipeline.PipelineParams] = None, worker_counts: Optional[List[int]] = None) -> Dict:
+	params = params or pipeline.PipelineParams()
+	sizes = sizes or ["small", "medium"]
+	results, scaling = [], []
+	with tempfile.TemporaryDirectory() as tmp:
+		for dataset in sizes:
+			n_reads = DATASET_SIZES[dataset]
+			path = synthetic_fastq(Path(tmp) / f"{dataset}.fastq", n_reads)
+			results.extend(bench_dataset(path, dataset, n_reads, params, repeat))
+			if worker_counts and dataset == max(sizes, key=DATASET_SIZES.get):
+				scaling = bench_scaling(path, dataset, params, sorted(set(worker_counts)), repeat)
+	return {
+		"schema_version": SCHEMA_VERSION,
+		"package_version": __version__,
+		"created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+		"machine": {
+			"platform": platform.platform(),
+			"processor": platform.processor() or platform.machine(),
+			"python": platform.python_version(),
+			"numpy": np.__version__,
+			"cpu_count": os.cpu_count(),
+		},
+		"params": params.to_dict(),
+		"results": results,
+		"scaling": scaling,
+	}
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float = 0.2) -> List[str]:
+	"""Human-readable regressions: throughput below, or peak memory above, baseline by more than tolerance."""
+	if baseline.get("schema_version") != report["schema_version"]:
+		return [f"Baseline schema v{baseline.get('schema_version')} does not match v{report['schema_version']}"]
+	reference = {(r["dataset"], r["stage"]): r for r in baseline["results"]}
+	regressions = []
+	for row in report["results"]:
+		base = reference.get((row["dataset"], row["stage"]))
+		if base is None:
+			continue
+		if row["seq_per_min"] < base["seq_per_min"] * (1 - tolerance):
+			regressions.append(f"{row['dataset']}/{row['stage']}: {row['seq_per_min']:,.0f} seq/min vs baseline {base['seq_per_min']:,.0f}")
+		if row["peak_mb"] > base["peak_mb"] * (1 + tolerance) + 1.0:
+			regressions.append(f"{row['dataset']}/{row['stage']}: peak {row['peak_mb']:.1f} MB vs baseline {base['peak_mb']:.1f} MB")
+	return regressions
+
+
+def save_report(report: Dict, path: Optional[Path] = None) -> Path:
+	if path is None:
+		RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+		path = RESULTS_DIR / f"bench-{report['created'].replace(':', '').replace('+0000', 'Z')}.json"
+	path.parent.mkdir(parents=True, exist_ok=True)
+	path.write_text(json.dumps(report, indent=2))
+	return path
+
+
+def latest_report() -> Optional[Dict]:
+	"""Most recent saved run, falling back to the stored baseline."""
+	runs = sorted(RESULTS_DIR.glob("bench-*.json")) if RESULTS_DIR.is_dir() else []
+	for path in runs[::-1] + ([BASELINE_PATH] if BASELINE_PATH.exists() else []):
+		try:
+			return json.loads(path.read_text())
+		except (OSError, ValueError):
+			continue
+	return None
+
+
+def end_to_end(report: Dict, dataset: Optional[str] = None) -> Dict[str, float]:
+	"""Whole-pipeline reads/min and peak memory for one dataset (the largest benchmarked by default)."""
+	rows = report["results"]
+	dataset = dataset or max(rows, key=lambda r: r["reads"])["dataset"]
+	rows = [r for r in rows if r["dataset"] == dataset]
+	seconds = sum(r["seconds"] for r in rows)
+	return {
+		"dataset": dataset,
+		"reads": rows[0]["reads"],
+		"seq_per_min": rows[0]["reads"] / max(seconds, 1e-9) * 60,
+		"peak_mb": max(r["peak_mb"] for r in rows),
+	}
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(prog="python -m marinetaxa.bench", description=__doc__.splitlines()[0])
+	parser.add_argument("--sizes", nargs="+", choices=list(DATASET_SIZES), default=["small", "medium"])
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+	parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional slowdown before flagging")
+	parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+	parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}), help="worker counts for the embed/score scaling run")
+	args = parser.parse_args(argv)
+
+	report = run_benchmarks(args.sizes, args.repeat, worker_counts=args.workers)
+	for row in report["results"]:
+		print(f"{row['dataset']:>6} {row['stage']:<12} {row['seq_per_min']:>14,.0f} seq/min {row['peak_mb']:>9.1f} MB")
+	for row in report["scaling"]:
+		print(f"{row['dataset']:>6} {row['stage']:<12} {row['workers']:>3} workers {row['seq_per_min']:>14,.0f} seq/min {row['speedup']:>6.2f}x ({row['efficiency']:.0%} efficiency)")
+	print(f"Saved {save_report(report)}")
+
+	if args.save_baseline:
+		print(f"Baseline updated: {save_report(report, args.baseline)}")
+		return 0
+	if not args.baseline.exists():
+		print("No baseline stored; run with --save-baseline to create one.")
+		return 0
+	regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+	for line in regressions:
+		print(f"REGRESSION {line}")
+	return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,135 @@
+"""Depth-adaptive novelty thresholds.
+
+Scores (0-1) observed per depth zone are accumulated in fixed-bin histograms,
+a streaming quantile sketch that is exact to one bin width, updates in O(n)
+for a batch and merges by addition, so new samples re-calibrate the table
+without rescoring anything. A table remembers the counts it added since it
+was loaded and `save()` folds only those into the file under a lock, so the
+API server and `marinetaxa calibrate` can update the same table concurrently.
+From the sketches a table of score quantiles per zone at every percentile is
+precomputed; applying a novelty threshold is then one array lookup per
+sequence:
+
+	table = CalibrationTable.load("isolation")
+	table.update(scores, depths).save()
+	novel = scores > table.thresholds(depths, level=0.7)
+"""
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# Optional: fcntl (POSIX advisory locks around the read-merge-write in save)
+try:
+	import fcntl
+	_HAS_FCNTL = True
+except Exception:
+	_HAS_FCNTL = False
+
+from .config import data_dir
+
+DEPTH_ZONES = ["Bathyal", "Abyssal", "Hadal"]
+# Lower bounds (m) of Abyssal and Hadal; anything shallower is treated as Bathyal
+ZONE_EDGES = np.array([4000.0, 6000.0])
+BINS = 1000
+LEVELS = 101
+MIN_SAMPLES = 200
+
+
+def depth_zone(depths) -> np.ndarray:
+	"""Zone index (into DEPTH_ZONES) for each depth in metres."""
+	return np.searchsorted(ZONE_EDGES, np.asarray(depths, dtype=np.float64), side="right")
+
+
+def zone_name(depth: float) -> str:
+	return DEPTH_ZONES[int(depth_zone(depth))]
+
+
+class CalibrationTable:
+	def __init__(self, name: str = "isolation", counts: Optional[np.ndarray] = None, root=None):
+		self.name = name
+		self.root = Path(root) if root else data_dir() / "calibration"
+		self.counts = np.zeros((len(DEPTH_ZONES), BINS), dtype=np.int64) if counts is None else counts
+		# Counts added since the last load/save; only these are written back
+		self._added = np.zeros_like(self.counts) if counts is None else counts.copy()
+		self._rebuild()
+
+	@property
+	def path(self) -> Path:
+		return self.root / f"{self.name}.npy"
+
+	@classmethod
+	def load(cls, name: str = "isolation", root=None) -> "CalibrationTable":
+		table = cls(name, root=root)
+		if table.path.exists():
+			table.counts = np.load(table.path, allow_pickle=False)
+			table._added = np.zeros_like(table.counts)
+			table._rebuild()
+		return table
+
+	@contextmanager
+	def _locked(self):
+		self.root.mkdir(parents=True, exist_ok=True)
+		with open(self.root / f"{self.name}.lock", "a") as handle:
+			if _HAS_FCNTL:
+				fcntl.flock(handle, fcntl.LOCK_EX)
+			try:
+				yield
+			finally:
+				if _HAS_FCNTL:
+					fcntl.flock(handle, fcntl.LOCK_UN)
+
+	def save(self) -> Path:
+		"""Add this table's new counts to the file, keeping what other writers saved meanwhile."""
+		with self._locked():
+			stored = np.load(self.path, allow_pickle=False) if self.path.exists() else np.zeros_like(self.counts)
+			counts = stored + self._added
+			tmp = self.path.with_suffix(f".{uuid.uuid4().hex}.tmp.npy")
+			np.save(tmp, counts, allow_pickle=False)
+			os.replace(tmp, self.path)
+		self.counts = counts
+		self._added = np.zeros_like(counts)
+		self._rebuild()
+		return self.path
+
+	@property
+	def samples(self) -> np.ndarray:
+		return self.counts.sum(axis=1)
+
+	def update(self, scores, depths) -> "CalibrationTable":
+		"""Add a batch of scores; `depths` is one depth for the batch or one per score."""
+		scores = np.asarray(scores, dtype=np.float64).ravel()
+		zones = np.broadcast_to(depth_zone(depths), scores.shape)
+		bins = np.clip((scores * BINS).astype(np.int64), 0, BINS - 1)
+		added = np.bincount(zones * BINS + bins, minlength=self.counts.size).reshape(self.counts.shape)
+		self.counts += added
+		self._added += added
+		self._rebuild()
+		return self
+
+	def merge(self, other: "CalibrationTable") -> "CalibrationTable":
+		self.counts += other.counts
+		self._added += other.counts
+		self._rebuild()
+		return self
+
+	def _rebuild(self) -> None:
+		# quantiles[zone, p] = score at percentile p, interpolated within the bin
+		cdf = np.cumsum(self.counts, axis=1)
+		totals = cdf[:, -1:]
+		targets = np.linspace(0.0, 1.0, LEVELS)[None, :] * totals
+		self.quantiles = np.full((len(DEPTH_ZONES), LEVELS), np.nan)
+		for zone in np.nonzero(totals[:, 0] >= MIN_SAMPLES)[0]:
+			idx = np.minimum(np.searchsorted(cdf[zone], targets[zone], side="left"), BINS - 1)
+			before = np.where(idx > 0, cdf[zone][idx - 1], 0)
+			inside = np.maximum(self.counts[zone][idx], 1)
+			self.quantiles[zone] = (idx + np.clip((targets[zone] - before) / inside, 0.0, 1.0)) / BINS
+
+	def thresholds(self, depths, level: float, default: Optional[float] = None) -> np.ndarray:
+		"""Score at percentile `level` of each depth's zone; zones with too few samples use `default` (or `level`)."""
+		column = int(round(np.clip(level, 0.0, 1.0) * (LEVELS - 1)))
+		values = self.quantiles[depth_zone(depths), column]
+		return np.where(np.isnan(values), level if default is None else default, values)
@@ -0,0 +1,104 @@
+"""Local dataset catalog with bitmap facet indexes for the Database tab.
+
+Datasets come from a JSON metadata file (``datasets.json`` in the data
+directory, else the bundled seed list). Every facet value owns a packed bitmap
+over the catalog rows, so a filter is an AND of a few bitmaps (an OR within a
+facet for multi-valued fields) and a facet count is a popcount. Counts for each
+facet ignore that facet's own selection, so every option shows how many
+results picking it would give. Rows are kept sorted newest first, which makes
+a page a slice of the matching row numbers.
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .config import data_dir
+
+FACETS = ["gene_marker", "region", "year", "habitat"]
+BUNDLED_CATALOG = Path(__file__).resolve().parent / "data" / "datasets.json"
+ALL = "All"
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def catalog_path() -> Path:
+	local = data_dir() / "datasets.json"
+	return local if local.exists() else BUNDLED_CATALOG
+
+
+@dataclass
+class CatalogPage:
+	total: int
+	page: int
+	pages: int
+	rows: pd.DataFrame
+	facet_counts: Dict[str, Dict[str, int]]
+
+
+class DatasetCatalog:
+	def __init__(self, records: Sequence[Dict]):
+		frame = pd.DataFrame(list(records))
+		for facet in FACETS:
+			if facet not in frame:
+				frame[facet] = [[] for _ in range(len(frame))]
+			# Facets may be scalars or lists in the metadata file
+			frame[facet] = [[str(v) for v in (value if isinstance(value, list) else [value])] for value in frame[facet]]
+		newest = frame["year"].map(lambda years: max(years, default=""))
+		self.frame = frame.assign(_newest=newest).sort_values(["_newest", "accession"], ascending=[False, True], kind="stable").drop(columns="_newest").reset_index(drop=True)
+		self.size = len(self.frame)
+		self._all = np.packbits(np.ones(self.size, dtype=bool))
+		self.bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+		for facet in FACETS:
+			members: Dict[str, List[int]] = {}
+			for row, values in enumerate(self.frame[facet]):
+				for value in values:
+					members.setdefault(value, []).append(row)
+			self.bitmaps[facet] = {}
+			for value, rows in sorted(members.items()):
+				bits = np.zeros(self.size, dtype=bool)
+				bits[rows] = True
+				self.bitmaps[facet][value] = np.packbits(bits)
+
+	@classmethod
+	def load(cls, path=None) -> "DatasetCatalog":
+		return cls(json.loads(Path(path or catalog_path()).read_text()))
+
+	def options(self, facet: str) -> List[str]:
+		values = list(self.bitmaps[facet])
+		return sorted(values, reverse=True) if facet == "year" else values
+
+	def _selection(self, filters: Dict[str, str], skip: Optional[str] = None) -> np.ndarray:
+		selected = self._all.copy()
+		for facet, value in filters.items():
+			if facet == skip or value in (None, ALL):
+				continue
+			bitmap = self.bitmaps[facet].get(value)
+			if bitmap is None:
+				return np.zeros_like(self._all)
+			np.bitwise_and(selected, bitmap, out=selected)
+		return selected
+
+	def count(self, bitmap: np.ndarray) -> int:
+		return int(_POPCOUNT[bitmap].sum())
+
+	def query(self, filters: Dict[str, str], page: int = 0, page_size: int = 10) -> CatalogPage:
+		selected = self._selection(filters)
+		facet_counts = {}
+		for facet in FACETS:
+			others = self._selection(filters, skip=facet)
+			facet_counts[facet] = {value: self.count(others & bitmap) for value, bitmap in self.bitmaps[facet].items()}
+			facet_counts[facet][ALL] = self.count(others)
+		rows = np.flatnonzero(np.unpackbits(selected, count=self.size))
+		pages = max(1, -(-len(rows) // page_size))
+		page = min(max(page, 0), pages - 1)
+		return CatalogPage(
+			total=len(rows),
+			page=page,
+			pages=pages,
+			rows=self.frame.iloc[rows[page * page_size:(page + 1) * page_size]],
+			facet_counts=facet_counts,
+		)
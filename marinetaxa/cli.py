@@ -0,0 +1,306 @@
+"""Command-line entry point for running the pipeline without a browser session.
+
+	python -m marinetaxa run reads_1.fastq.gz reads_2.fastq.gz --out results/ST-047 \
+		--batch-size 256 --clustering-method DBSCAN --novelty-threshold 0.8
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from . import __version__, artifacts, envfeatures, pipeline, results
+
+
+class ProgressPrinter:
+	"""Progress callback that streams one line per stage change or per interval to stdout."""
+
+	def __init__(self, stream=sys.stdout, interval: float = 2.0):
+		self.stream = stream
+		self.interval = interval
+		self._stage = None
+		self._last = 0.0
+		self._start = time.monotonic()
+
+	def __call__(self, stage: str, fraction: float, items: int = 0) -> None:
+		now = time.monotonic()
+		if stage == self._stage and fraction < 1.0 and now - self._last < self.interval:
+			return
+		self._stage, self._last = stage, now
+		print(f"[{now - self._start:8.1f}s] {stage:<12} {fraction:6.1%} {items:>12,} seqs", file=self.stream, flush=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(prog="python -m marinetaxa", description="MarineTaxaAI headless pipeline")
+	parser.add_argument("--version", action="version", version=f"marinetaxa {__version__}")
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	run = commands.add_parser("run", help="process FASTA/FASTQ files and write cluster and score tables")
+	defaults = pipeline.PipelineParams()
+	run.add_argument("inputs", nargs="+", type=Path, help="FASTA/FASTQ files (.gz/.bz2/.zip accepted)")
+	run.add_argument("--out", type=Path, help="output directory (default: a new directory under the data dir's runs/)")
+	run.add_argument("--batch-size", type=int, default=defaults.batch_size, choices=[32, 64, 128, 256])
+	run.add_argument("--clustering-method", default=defaults.clustering_method, choices=pipeline.CLUSTERING_METHODS)
+	run.add_argument("--novelty-threshold", type=float, default=defaults.novelty_threshold)
+	run.add_argument("--quality-filter", default=defaults.quality_filter, choices=["Phred > 20", "Phred > 25", "Phred > 30"])
+	run.add_argument("--min-length", type=int, default=defaults.min_length)
+	run.add_argument("--max-length", type=int, default=defaults.max_length)
+	run.add_argument("--min-cluster-size", type=int, default=defaults.min_cluster_size)
+	run.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="local processes (default: all cores)")
+	run.add_argument("--no-cache", action="store_true", help="recompute every stage instead of reusing checkpoints")
+	run.add_argument("--sample", nargs="+", metavar="FIELD=VALUE", default=[], help=f"environmental metadata ({', '.join([*envfeatures.NUMERIC_FIELDS, *envfeatures.CATEGORICAL_FIELDS])})")
+	run.set_defaults(handler=cmd_run)
+
+	train = commands.add_parser("train-autoencoder", help="fit the novelty autoencoder on reference FASTA/FASTQ files")
+	train.add_argument("inputs", nargs="+", type=Path, help="FASTA/FASTQ files of known (non-novel) sequences")
+	train.add_argument("--out", type=Path, help="model file (default: the data dir's models/autoencoder.npz)")
+	train.add_argument("--hidden", type=int, nargs="+", default=[64, 16], help="hidden layer widths")
+	train.add_argument("--epochs", type=int, default=20)
+	train.set_defaults(handler=cmd_train_autoencoder)
+
+	calibrate = commands.add_parser("calibrate", help="add scored reads from one sample depth to the depth-zone threshold tables")
+	calibrate.add_argument("inputs", nargs="+", type=Path, help="FASTA/FASTQ files from one sample")
+	calibrate.add_argument("--depth", type=float, required=True, help="sample depth in metres")
+	calibrate.set_defaults(handler=cmd_calibrate)
+
+	runinfo = commands.add_parser("import-runinfo", help="load SRA run-info CSV/TSV tables into the Database statistics store")
+	runinfo.add_argument("tables", nargs="+", type=Path, help="run-info exports (SRA Run Selector or efetch -format runinfo)")
+	runinfo.add_argument("--chunk-rows", type=int, default=200_000, help="rows read per chunk")
+	runinfo.set_defaults(handler=cmd_import_runinfo)
+
+	seed = commands.add_parser("seed-tiles", help="download map tiles for offline use (configured regions, or --bbox)")
+	seed.add_argument("regions", nargs="*", help="region names from the tile region table (default: all)")
+	seed.add_argument("--bbox", type=float, nargs=4, metavar=("SOUTH", "WEST", "NORTH", "EAST"), help="seed this box instead of named regions")
+	seed.add_argument("--zoom", type=int, nargs=2, metavar=("MIN", "MAX"), default=[0, 6], help="zoom levels for --bbox")
+	seed.set_defaults(handler=cmd_seed_tiles)
+
+	tiles = commands.add_parser("serve-tiles", help="serve cached map tiles to the app's maps")
+	tiles.add_argument("--host", default=None, help="default: MARINETAXA_TILE_HOST or 127.0.0.1")
+	tiles.add_argument("--port", type=int, default=None, help="default: MARINETAXA_TILE_PORT or 8766")
+	tiles.add_argument("--budget-mb", type=float, default=None, help="disk budget; least recently served tiles are evicted past it")
+	tiles.set_defaults(handler=cmd_serve_tiles)
+
+	export = commands.add_parser("export", help="stream a run's cluster or read score table (CSV, Parquet, Arrow) or representative sequences (FASTA) to a file")
+	export.add_argument("run", help="run directory, or the name of a run or job under the data dir")
+	export.add_argument("table", choices=["clusters", "scores", "sequences"])
+	export.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv", help="table format (sequences are always FASTA)")
+	export.add_argument("--out", "-o", type=Path, help="output file (default: <run name>_<table file> in the current directory)")
+	export.add_argument("--min-novelty", type=float, default=None, help="only clusters (or reads) scoring at least this")
+	export.add_argument("--env", action="store_true", help="add the run's sample metadata columns to a CSV cluster table")
+	export.add_argument("--gzip", action="store_true", help="gzip a CSV or FASTA output")
+	export.set_defaults(handler=cmd_export)
+
+	exports = commands.add_parser("serve-exports", help="serve streamed CSV/FASTA downloads to the app")
+	exports.add_argument("--host", default=None, help="default: MARINETAXA_EXPORT_HOST or 127.0.0.1")
+	exports.add_argument("--port", type=int, default=None, help="default: MARINETAXA_EXPORT_PORT or 8767")
+	exports.set_defaults(handler=cmd_serve_exports)
+
+	serve = commands.add_parser("serve", help="start the REST API for batch submission with streamed results")
+	serve.add_argument("--host", default="127.0.0.1")
+	serve.add_argument("--port", type=int, default=8765)
+	serve.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="analysis processes (default: all cores)")
+	serve.set_defaults(handler=cmd_serve)
+	return parser
+
+
+def cmd_run(args) -> int:
+	missing = [str(p) for p in args.inputs if not p.is_file()]
+	if missing:
+		print(f"Input not found: {', '.join(missing)}", file=sys.stderr)
+		return 2
+	try:
+		sample = envfeatures.validate_sample(dict(item.partition("=")[::2] for item in args.sample)) if args.sample else None
+	except ValueError as exc:
+		print(f"Invalid --sample: {exc}", file=sys.stderr)
+		return 2
+	params = pipeline.PipelineParams(
+		batch_size=args.batch_size,
+		clustering_method=args.clustering_method,
+		novelty_threshold=args.novelty_threshold,
+		quality_filter=args.quality_filter,
+		min_length=args.min_length,
+		max_length=args.max_length,
+		min_cluster_size=args.min_cluster_size,
+		workers=max(1, args.workers),
+	)
+	out_dir = args.out or results.runs_dir() / datetime.now().strftime("run-%Y%m%d-%H%M%S")
+	store = None if args.no_cache else artifacts.ArtifactStore()
+
+	print(f"Processing {len(args.inputs)} file(s) with {params.workers} worker(s) -> {out_dir}", flush=True)
+	result = pipeline.run_pipeline([str(p) for p in args.inputs], params, ProgressPrinter(), store)
+	pipeline.write_outputs(result, out_dir, params, sample)
+	for key, value in result.stats.items():
+		print(f"{key}: {value}")
+	print(f"Wrote {out_dir / 'clusters.csv'} and {out_dir / 'scores.csv'}", flush=True)
+	return 0
+
+
+def cmd_train_autoencoder(args) -> int:
+	from . import autoencoder
+
+	missing = [str(p) for p in args.inputs if not p.is_file()]
+	if missing:
+		print(f"Input not found: {', '.join(missing)}", file=sys.stderr)
+		return 2
+	params = pipeline.PipelineParams()
+	reads = pipeline.quality_filter(pipeline.parse_reads([str(p) for p in args.inputs], ProgressPrinter()), params)
+	seqs, _, _ = pipeline.dereplicate(reads)
+	emb = pipeline.embed(seqs, params, ProgressPrinter())
+	print(f"Training on {len(seqs):,} unique sequences", flush=True)
+	model = autoencoder.fit(emb, params.kmer_size, hidden=args.hidden, epochs=args.epochs)
+	path = model.save(args.out)
+	print(f"Median reconstruction error {model.calibration[len(model.calibration) // 2]:.5f}; wrote {path}", flush=True)
+	return 0
+
+
+def cmd_calibrate(args) -> int:
+	from . import autoencoder, calibration
+
+	missing = [str(p) for p in args.inputs if not p.is_file()]
+	if missing:
+		print(f"Input not found: {', '.join(missing)}", file=sys.stderr)
+		return 2
+	params = pipeline.PipelineParams()
+	reads = pipeline.quality_filter(pipeline.parse_reads([str(p) for p in args.inputs], ProgressPrinter()), params)
+	seqs, _, _ = pipeline.dereplicate(reads)
+
+	# The same streaming isolation score the API reports, so its thresholds apply there unchanged
+	analyzer = pipeline.StreamingAnalyzer(params)
+	tables = {"isolation": calibration.CalibrationTable.load("isolation")}
+	scorer = None
+	if autoencoder.default_model_path().exists():
+		scorer = autoencoder.AutoencoderScorer(autoencoder.Autoencoder.load())
+		tables["autoencoder"] = calibration.CalibrationTable.load("autoencoder")
+	for start in range(0, len(seqs), params.batch_size):
+		batch = seqs[start:start + params.batch_size]
+		_, isolation = analyzer.process(batch)
+		tables["isolation"].update(isolation, args.depth)
+		if scorer:
+			tables["autoencoder"].update(scorer.score_array(pipeline.kmer_matrix(batch, params.kmer_size))[1], args.depth)
+
+	zone = calibration.zone_name(args.depth)
+	for name, table in tables.items():
+		table.save()
+		samples = table.samples[calibration.DEPTH_ZONES.index(zone)]
+		threshold = table.thresholds(args.depth, params.novelty_threshold)
+		print(f"{name}: {samples:,} {zone} samples; {params.novelty_threshold:.0%} threshold {float(threshold):.4f}")
+	return 0
+
+
+def cmd_import_runinfo(args) -> int:
+	from . import runinfo
+
+	missing = [str(p) for p in args.tables if not p.is_file()]
+	if missing:
+		print(f"Input not found: {', '.join(missing)}", file=sys.stderr)
+		return 2
+	store = runinfo.RunInfoStore()
+	for path in args.tables:
+		started = time.monotonic()
+		try:
+			report = store.import_table(path, args.chunk_rows)
+		except (RuntimeError, ValueError) as exc:
+			print(f"{path}: {exc}", file=sys.stderr)
+			return 1
+		print(f"{path}: {report.rows_added:,} new runs, {report.duplicates:,} already stored ({time.monotonic() - started:.1f}s)", flush=True)
+	totals = store.stats()["totals"]
+	print(f"Store: {totals['runs']:,} runs, {totals['experiments']:,} experiments, {totals['projects']:,} projects, {runinfo.format_size(totals['size_mb'])}")
+	return 0
+
+
+def cmd_seed_tiles(args) -> int:
+	from . import tiles
+
+	cache = tiles.TileCache()
+	if not cache.upstream:
+		print("No upstream tile server (MARINETAXA_TILE_UPSTREAM is empty)", file=sys.stderr)
+		return 2
+	if args.bbox:
+		todo = {"bbox": (tuple(args.bbox), tuple(sorted(args.zoom)))}
+	else:
+		known = tiles.regions()
+		unknown = [name for name in args.regions if name not in known]
+		if unknown:
+			print(f"Unknown region: {', '.join(unknown)} (known: {', '.join(known)})", file=sys.stderr)
+			return 2
+		todo = {name: known[name] for name in args.regions or known}
+	for name, (bbox, zooms) in todo.items():
+		started = time.monotonic()
+		fetched, missing = cache.seed(bbox, zooms)
+		print(f"{name}: {fetched:,} tiles fetched, {missing:,} unavailable ({time.monotonic() - started:.1f}s)", flush=True)
+	print(f"Cache: {len(cache):,} tiles, {cache.total / 1024 ** 2:.1f} MB of {cache.budget / 1024 ** 2:.0f} MB")
+	return 0
+
+
+def cmd_serve_tiles(args) -> int:
+	from . import tiles
+
+	budget = None if args.budget_mb is None else int(args.budget_mb * 1024 ** 2)
+	server = tiles.TileServer(tiles.TileCache(budget=budget), args.host, args.port)
+	print(f"Serving {len(server.cache):,} cached tiles on http://{server.httpd.server_address[0]}:{server.port}/{{z}}/{{x}}/{{y}}.png", flush=True)
+	try:
+		server.httpd.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.httpd.server_close()
+	return 0
+
+
+def cmd_export(args) -> int:
+	from . import exports
+
+	run = Path(args.run) if Path(args.run).is_dir() else exports.find_run(args.run)
+	if run is None or not (run / "clusters.csv").exists():
+		print(f"No finished run: {args.run}", file=sys.stderr)
+		return 2
+	if args.table == "sequences":
+		name = "representatives.fasta"
+	else:
+		name = f"{args.table}.{args.format}"
+	if args.gzip and not name.endswith((".parquet", ".arrow")):
+		name += ".gz"
+	try:
+		chunks = exports.run_export(run, name, args.min_novelty, args.env)
+	except RuntimeError as exc:
+		print(exc, file=sys.stderr)
+		return 2
+	if chunks is None:
+		missing = "representative sequences (run it again to add them)" if args.table == "sequences" else f"{args.table}.csv"
+		print(f"{run.name} has no {missing}", file=sys.stderr)
+		return 2
+	out = args.out or Path(f"{run.name}_{name}")
+	started = time.monotonic()
+	written = exports.write_chunks(chunks, out)
+	print(f"Wrote {out} ({written / 1024 ** 2:.1f} MB, {time.monotonic() - started:.1f}s)")
+	return 0
+
+
+def cmd_serve_exports(args) -> int:
+	from . import exports
+
+	server = exports.ExportServer(args.host, args.port)
+	print(f"Serving exports on http://{server.httpd.server_address[0]}:{server.port}/", flush=True)
+	try:
+		server.httpd.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.httpd.server_close()
+	return 0
+
+
+def cmd_serve(args) -> int:
+	from . import api
+
+	try:
+		api.run(args.host, args.port, max(1, args.workers))
+	except KeyboardInterrupt:
+		pass
+	return 0
+
+
+def main(argv=None) -> int:
+	args = build_parser().parse_args(argv)
+	return args.handler(args)
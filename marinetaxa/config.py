@@ -0,0 +1,36 @@
+import ipaddress
+import os
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+# Runtime state (job database, uploads, results) lives outside the source tree
+def data_dir() -> Path:
+	path = Path(os.environ.get("MARINETAXA_DATA_DIR", ".marinetaxa")).resolve()
+	path.mkdir(parents=True, exist_ok=True)
+	return path
+
+
+def is_loopback(host: str) -> bool:
+	try:
+		return host == "localhost" or ipaddress.ip_address(host).is_loopback
+	except ValueError:
+		return False
+
+
+# The app's side servers (tiles, exports) are linked from the browser, which may not be on this machine
+def browser_host(bind: str, request_host: Optional[str]) -> Optional[str]:
+	"""Host for links to a server bound to `bind`, from the Host header the app was reached by; None if unreachable."""
+	name = urlsplit(f"//{request_host}").hostname if request_host else None
+	name = name or "127.0.0.1"
+	if bind in ("", "0.0.0.0", "::"):
+		host = name
+	elif is_loopback(bind):
+		# A loopback-only server is reachable only from a browser on this machine
+		if not is_loopback(name):
+			return None
+		host = bind
+	else:
+		host = bind
+	return f"[{host}]" if ":" in host else host
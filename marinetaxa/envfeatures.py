@@ -0,0 +1,100 @@
+"""Per-sample environmental metadata and its columnar join onto read/cluster rows.
+
+Samples are held column-wise: float32 arrays for the measurements and pandas
+categoricals (small integer codes plus one copy of each label) for the
+identifiers. Attaching metadata to millions of rows is a ``take`` of each
+column by a per-row sample index, so no per-row Python object is created and
+identifier columns stay one or two bytes wide.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Column -> (valid minimum, valid maximum); all stored as float32, missing as NaN
+NUMERIC_FIELDS = {
+	"depth": (0.0, 11_000.0),
+	"pressure": (0.0, 1_200.0),
+	"temperature": (-2.5, 40.0),
+	"salinity": (0.0, 45.0),
+	"oxygen": (0.0, 20.0),
+}
+CATEGORICAL_FIELDS = ["cruise_id", "seamount_name", "station_replicate"]
+SAMPLE_FILE = "sample.json"
+
+
+def validate_sample(record: Dict) -> Dict:
+	"""Coerce one sample's metadata to the schema; raises ValueError on unknown keys, bad types or out-of-range values."""
+	unknown = set(record) - set(NUMERIC_FIELDS) - set(CATEGORICAL_FIELDS)
+	if unknown:
+		raise ValueError(f"Unknown sample fields: {', '.join(sorted(unknown))}")
+	clean = {}
+	for name, (low, high) in NUMERIC_FIELDS.items():
+		value = record.get(name)
+		if value is None or value == "":
+			clean[name] = None
+			continue
+		try:
+			value = float(value)
+		except (TypeError, ValueError):
+			raise ValueError(f"{name} must be numeric, got {value!r}")
+		if not low <= value <= high:
+			raise ValueError(f"{name}={value} outside {low}-{high}")
+		clean[name] = value
+	for name in CATEGORICAL_FIELDS:
+		value = record.get(name)
+		value = str(value).strip() if value is not None else ""
+		clean[name] = value or None
+	return clean
+
+
+class SampleTable:
+	def __init__(self, numeric: Dict[str, np.ndarray], categorical: Dict[str, pd.Categorical]):
+		self.numeric = numeric
+		self.categorical = categorical
+
+	@classmethod
+	def from_records(cls, records: Sequence[Dict]) -> "SampleTable":
+		records = [validate_sample(r) for r in records]
+		numeric = {
+			name: np.array([np.nan if r[name] is None else r[name] for r in records], dtype=np.float32)
+			for name in NUMERIC_FIELDS
+		}
+		categorical = {name: pd.Categorical([r[name] for r in records]) for name in CATEGORICAL_FIELDS}
+		return cls(numeric, categorical)
+
+	def __len__(self) -> int:
+		return len(next(iter(self.numeric.values())))
+
+	def broadcast(self, sample_index) -> pd.DataFrame:
+		"""One row of metadata per entry of `sample_index` (positions into this table)."""
+		sample_index = np.asarray(sample_index, dtype=np.intp)
+		if len(sample_index) and (sample_index.min() < 0 or sample_index.max() >= len(self)):
+			raise IndexError(f"sample index out of range for {len(self)} samples")
+		columns = {name: values.take(sample_index) for name, values in self.numeric.items()}
+		columns.update({
+			name: pd.Categorical.from_codes(values.codes.take(sample_index), dtype=values.dtype)
+			for name, values in self.categorical.items()
+		})
+		return pd.DataFrame(columns)
+
+	def join(self, frame: pd.DataFrame, sample_index=None) -> pd.DataFrame:
+		"""`frame` with metadata columns appended; without an index every row belongs to sample 0."""
+		if sample_index is None:
+			sample_index = np.zeros(len(frame), dtype=np.intp)
+		env = self.broadcast(sample_index)
+		env.index = frame.index
+		return pd.concat([frame, env.drop(columns=[c for c in env.columns if c in frame.columns])], axis=1)
+
+
+def save_sample(out_dir, record: Dict) -> Path:
+	path = Path(out_dir) / SAMPLE_FILE
+	path.write_text(json.dumps(validate_sample(record), indent=2))
+	return path
+
+
+def load_sample(run_dir) -> Optional[SampleTable]:
+	path = Path(run_dir) / SAMPLE_FILE
+	return SampleTable.from_records([json.loads(path.read_text())]) if path.exists() else None
@@ -0,0 +1,437 @@
+"""Streamed CSV and FASTA exports of run results and sampling sites.
+
+Exports are generators of byte chunks. Tables are read from the run
+directory (or the site table) a block of rows at a time and written out block
+by block, optionally through a streaming gzip compressor, so memory stays
+flat however many clusters or sites there are.
+
+``st.download_button`` needs the whole file in memory, so the app links to an
+ExportServer instead: a small threaded HTTP server, started in the background
+like the tile server, that runs the generator for each request and writes
+the chunks straight to the socket. Paths describe the export completely, so
+any app process can serve any link. The server listens on loopback unless
+MARINETAXA_EXPORT_HOST says otherwise; once other machines can reach it, a
+web job's exports are served only to links carrying the job's owner id:
+
+	/runs/<run>/clusters.csv[.gz]?min_novelty=0.8&env=1
+	/runs/<run>/clusters.parquet, clusters.arrow (?min_novelty=0.8)
+	/runs/<run>/scores.csv[.gz], scores.parquet, scores.arrow
+	/runs/<run>/representatives.fasta[.gz]?min_novelty=0.8
+	/sites.csv[.gz]?min_depth=200&max_depth=6000&feature=Trench&feature=Ridge&runs=1
+
+The cluster and per-read score tables also come as Parquet or Arrow IPC
+files, for analysis in R or Python without re-parsing CSV. Repeated text
+columns (status, depth range, cluster id of each read, ...) are dictionary
+encoded, and rows are written in row groups of ROW_GROUP_ROWS as they are
+read, so the Parquet footer carries min/max statistics per row group.
+Dictionaries in an Arrow file must not change between batches, so there
+each column keeps one growing dictionary and only new values are written
+(dictionary deltas).
+
+``python -m marinetaxa export`` writes the same streams to a file.
+"""
+import itertools
+import json
+import os
+import threading
+import zlib
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, quote, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from . import __version__, envfeatures, jobs, results, sites
+from .config import browser_host, data_dir, is_loopback
+
+# Optional dependency: pyarrow (Parquet and Arrow exports)
+try:
+	import pyarrow as pa
+	import pyarrow.compute as pc
+	import pyarrow.csv as pacsv
+	import pyarrow.parquet as pq
+	_HAS_ARROW = True
+except Exception:
+	_HAS_ARROW = False
+
+DEFAULT_PORT = 8767
+CHUNK_ROWS = 50_000
+ROW_GROUP_ROWS = 250_000
+GZIP_LEVEL = 1  # DNA text: level 6 is ~8x slower for ~5% smaller files
+CONTENT_TYPES = {
+	".csv": "text/csv",
+	".fasta": "text/x-fasta",
+	".gz": "application/gzip",
+	".parquet": "application/vnd.apache.parquet",
+	".arrow": "application/vnd.apache.arrow.file",
+}
+# Column types of the run tables, so every block parses to the same types
+CLUSTER_DTYPES = {"Cluster_ID": str, "Sequences": "int64", "Unique_Sequences": "int64", "Novelty_Score": "float64", "Candidate_Novel": str, "Status": str, "Representative": str}
+SCORE_DTYPES = {"Read_ID": str, "Cluster_ID": str, "Novelty_Score": "float64"}
+# Columns written as dictionaries in the columnar formats
+CATEGORICAL = {
+	"clusters": ["Depth_Range", "Geographic_Origin", "Candidate_Novel", "Status"],
+	"scores": ["Cluster_ID"],
+}
+
+
+def export_host() -> str:
+	"""Address the export server binds to; MARINETAXA_EXPORT_HOST=0.0.0.0 serves browsers on other machines."""
+	return os.environ.get("MARINETAXA_EXPORT_HOST", "127.0.0.1")
+
+
+def export_port() -> int:
+	return int(os.environ.get("MARINETAXA_EXPORT_PORT", DEFAULT_PORT))
+
+
+def find_run(name: str) -> Optional[Path]:
+	"""A finished run directory by name, from the CLI runs or the job results."""
+	if not name or name != Path(name).name or name.startswith("."):
+		return None
+	for root in (results.runs_dir(), data_dir() / "jobs"):
+		if (root / name / "summary.json").exists():
+			return root / name
+	return None
+
+
+def run_owner(run) -> Optional[str]:
+	"""Owner id of a web job's run directory ("" if the job is gone); None for command-line runs."""
+	run = Path(run)
+	if run.parent != data_dir() / "jobs":
+		return None
+	job = jobs.JobStore().get(run.name)
+	return job["owner"] if job else ""
+
+
+def owner_allowed(run, owner: Optional[str]) -> bool:
+	"""Whether `owner` may export `run`: any command-line run, and their own web jobs."""
+	return run_owner(run) in (None, owner)
+
+
+def cluster_frames(run, min_novelty: Optional[float] = None, with_env: bool = False, columns: Optional[Sequence[str]] = None, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+	"""A run's cluster table in blocks of rows, as the Novel Taxa page shows it.
+
+	With `min_novelty`, only clusters scoring at least that are kept and
+	Candidate_Novel is flagged against it.
+	"""
+	sample = envfeatures.load_sample(run) if with_env else None
+	usecols = None if columns is None else lambda name: name in columns or name == "Novelty_Score"
+	for frame in pd.read_csv(Path(run) / "clusters.csv", usecols=usecols, dtype=CLUSTER_DTYPES, chunksize=chunk_rows):
+		if min_novelty is not None:
+			frame = frame[frame["Novelty_Score"] >= min_novelty]
+			if "Candidate_Novel" in frame:
+				frame = frame.assign(Candidate_Novel=frame["Novelty_Score"].gt(min_novelty).map({True: "Yes", False: "No"}))
+		if not len(frame):
+			continue
+		if sample is not None:
+			frame = sample.join(frame)
+		yield frame if columns is None else frame[[c for c in frame.columns if c in columns]]
+
+
+def site_frames(min_depth: float, max_depth: float, features: Optional[Iterable[str]] = None, path=None, with_runs: bool = False, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+	"""Sampling sites in a depth range (and of the given feature types), read from the site table in blocks.
+
+	With `with_runs`, the finished runs' "Sample Run" sites the map shows follow the table.
+	"""
+	features = None if features is None else set(features)
+	frames = pd.read_csv(path or sites.sites_path(), chunksize=chunk_rows)
+	if with_runs:
+		frames = itertools.chain(frames, [results.sample_sites()])
+	for frame in frames:
+		keep = frame["depth"].between(min_depth, max_depth)
+		if features is not None:
+			keep &= frame["feature_type"].fillna("Unknown").isin(features)
+		if keep.any():
+			yield frame[keep]
+
+
+def csv_chunks(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+	header = True
+	for frame in frames:
+		yield frame.to_csv(index=False, header=header).encode()
+		header = False
+
+
+def fasta_chunks(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+	"""Representative sequences as FASTA; the header carries read count and novelty."""
+	for frame in frames:
+		frame = frame[frame["Representative"].notna()]
+		yield "".join(
+			f">{cluster} sequences={count} novelty={novelty:.3f}\n{sequence}\n"
+			for cluster, count, novelty, sequence in zip(frame["Cluster_ID"], frame["Sequences"], frame["Novelty_Score"], frame["Representative"])
+		).encode()
+
+
+def gzipped(chunks: Iterable[bytes], level: int = GZIP_LEVEL) -> Iterator[bytes]:
+	compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+	for chunk in chunks:
+		out = compressor.compress(chunk)
+		if out:
+			yield out
+	yield compressor.flush()
+
+
+def table_formats() -> List[str]:
+	"""Table formats exports can be written in here: CSV, plus Parquet and Arrow when pyarrow is installed."""
+	return ["csv", "parquet", "arrow"] if _HAS_ARROW else ["csv"]
+
+
+def _require_arrow() -> None:
+	if not _HAS_ARROW:
+		raise RuntimeError("pyarrow is required for Parquet and Arrow exports (pip install pyarrow)")
+
+
+def _rebatch(tables: Iterable["pa.Table"], rows: int) -> Iterator["pa.Table"]:
+	"""Regroup parsed (and filtered) blocks into tables of about `rows` rows, one per row group."""
+	pending, count = [], 0
+	for table in tables:
+		pending.append(table)
+		count += table.num_rows
+		if count >= rows:
+			yield pa.concat_tables(pending).combine_chunks()
+			pending, count = [], 0
+	if count:
+		yield pa.concat_tables(pending).combine_chunks()
+
+
+def _encoded_schema(schema: "pa.Schema", categorical: Sequence[str]) -> "pa.Schema":
+	for name in categorical:
+		if name in schema.names:
+			schema = schema.set(schema.get_field_index(name), pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+	return schema
+
+
+def _encode(table: "pa.Table", categorical: Sequence[str], codes: Optional[Dict[str, Dict[str, int]]]) -> "pa.Table":
+	"""Dictionary-encode the categorical columns; with `codes`, against one growing dictionary per column."""
+	for name in categorical:
+		if name not in table.column_names:
+			continue
+		encoded = table.column(name).combine_chunks().cast(pa.string()).dictionary_encode()
+		if codes is not None:
+			known = codes.setdefault(name, {})
+			remap = [known.setdefault(value, len(known)) for value in encoded.dictionary.to_pylist()]
+			encoded = pa.DictionaryArray.from_arrays(
+				pa.array(remap, type=pa.int32()).take(encoded.indices),
+				pa.array(list(known), type=pa.string()),
+			)
+		table = table.set_column(table.schema.get_field_index(name), pa.field(name, encoded.type), encoded)
+	return table
+
+
+class _Sink:
+	"""Write-only file for the Arrow writers; the generator driving them takes the bytes back out."""
+
+	closed = False
+
+	def __init__(self):
+		self._parts: List[bytes] = []
+		self._position = 0
+
+	def write(self, data) -> int:
+		self._parts.append(bytes(data))
+		self._position += len(data)
+		return len(data)
+
+	def tell(self) -> int:
+		return self._position
+
+	def flush(self) -> None:
+		pass
+
+	def close(self) -> None:
+		self.closed = True
+
+	def take(self) -> bytes:
+		data, self._parts = b"".join(self._parts), []
+		return data
+
+
+def columnar_chunks(tables: Iterable["pa.Table"], schema: "pa.Schema", fmt: str, categorical: Sequence[str] = ()) -> Iterator[bytes]:
+	"""Parquet ("parquet") or Arrow IPC file ("arrow") bytes with one row group or record batch per table."""
+	_require_arrow()
+	sink = _Sink()
+	schema = _encoded_schema(schema, categorical)
+	if fmt == "parquet":
+		writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd", write_statistics=True)
+	else:
+		writer = pa.ipc.new_file(pa.PythonFile(sink, mode="w"), schema, options=pa.ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True))
+	# Parquet row groups each get their own dictionary; an Arrow file keeps one per column
+	codes = {} if fmt == "arrow" else None
+	for table in tables:
+		if not table.num_rows:
+			continue
+		table = _encode(table.select(schema.names), categorical, codes).cast(schema)
+		writer.write_table(table, table.num_rows)
+		yield sink.take()
+	writer.close()
+	yield sink.take()
+
+
+def frame_columnar(frame: pd.DataFrame, fmt: str, categorical: Sequence[str] = ()) -> bytes:
+	"""A small in-memory frame (the demo clusters) as Parquet or Arrow IPC bytes."""
+	_require_arrow()
+	table = pa.Table.from_pandas(frame, preserve_index=False)
+	return b"".join(columnar_chunks([table], table.schema, fmt, categorical))
+
+
+def _csv_blocks(path: Path, dtypes: Dict) -> Tuple["pa.Schema", Iterator["pa.Table"]]:
+	"""Schema and parsed blocks of a run table, read by Arrow's streaming CSV reader."""
+	types = {name: pa.string() if dtype is str else pa.from_numpy_dtype(np.dtype(dtype)) for name, dtype in dtypes.items()}
+	reader = pacsv.open_csv(path, convert_options=pacsv.ConvertOptions(column_types=types, strings_can_be_null=True))
+	return reader.schema, (pa.Table.from_batches([batch]) for batch in reader)
+
+
+def run_columnar(run, table: str, fmt: str, min_novelty: Optional[float] = None) -> Iterator[bytes]:
+	"""A run's "clusters" or "scores" table as Parquet or Arrow IPC bytes."""
+	_require_arrow()
+	run = Path(run)
+	schema, blocks = _csv_blocks(run / f"{table}.csv", CLUSTER_DTYPES if table == "clusters" else SCORE_DTYPES)
+	if min_novelty is not None:
+		blocks = (block.filter(pc.greater_equal(block["Novelty_Score"], min_novelty)) for block in blocks)
+	if table == "clusters":
+		# Depth_Range and Geographic_Origin as in the review queue, from the run's sample metadata
+		path = run / envfeatures.SAMPLE_FILE
+		sample = json.loads(path.read_text()) if path.exists() else {}
+		depth = sample.get("depth")
+		added = {"Depth_Range": f"{depth:.0f}m" if depth is not None else None, "Geographic_Origin": sample.get("seamount_name")}
+		at = schema.get_field_index("Novelty_Score") + 1
+		for offset, name in enumerate(added):
+			schema = schema.insert(at + offset, pa.field(name, pa.string()))
+
+		def with_sample(block):
+			if min_novelty is not None and "Candidate_Novel" in block.column_names:
+				# Flagged against the export threshold, as on the Novel Taxa page
+				flagged = pc.if_else(pc.greater(block["Novelty_Score"], min_novelty), "Yes", "No")
+				block = block.set_column(block.schema.get_field_index("Candidate_Novel"), "Candidate_Novel", flagged)
+			for name, value in added.items():
+				block = block.append_column(name, pa.repeat(pa.scalar(value, pa.string()), block.num_rows))
+			return block
+
+		blocks = (with_sample(block) for block in blocks)
+	return columnar_chunks(_rebatch(blocks, ROW_GROUP_ROWS), schema, fmt, CATEGORICAL[table])
+
+
+def run_export(run, name: str, min_novelty: Optional[float] = None, with_env: bool = False) -> Optional[Iterator[bytes]]:
+	"""Chunks of a run's "clusters.csv", "scores.csv" or "representatives.fasta" (each optionally + ".gz"),
+	or of "clusters"/"scores" as ".parquet" or ".arrow"; None if the run has no such table."""
+	base = name.removesuffix(".gz")
+	stem, _, fmt = base.partition(".")
+	if fmt in ("parquet", "arrow") and stem in CATEGORICAL and base == name and (Path(run) / f"{stem}.csv").exists():
+		return run_columnar(run, stem, fmt, min_novelty)
+	if base == "clusters.csv":
+		chunks = csv_chunks(cluster_frames(run, min_novelty, with_env))
+	elif base == "scores.csv" and (Path(run) / "scores.csv").exists():
+		chunks = csv_chunks(
+			frame if min_novelty is None else frame[frame["Novelty_Score"] >= min_novelty]
+			for frame in pd.read_csv(Path(run) / "scores.csv", dtype=SCORE_DTYPES, chunksize=CHUNK_ROWS)
+		)
+	elif base == "representatives.fasta" and "Representative" in pd.read_csv(Path(run) / "clusters.csv", nrows=0).columns:
+		chunks = fasta_chunks(cluster_frames(run, min_novelty, columns=["Cluster_ID", "Sequences", "Novelty_Score", "Representative"]))
+	else:
+		return None
+	return gzipped(chunks) if name.endswith(".gz") else chunks
+
+
+def open_export(path: str, query: Dict[str, List[str]], check_owner: bool = False) -> Optional[Tuple[str, Iterator[bytes]]]:
+	"""(file name, chunks) for an export path and its parsed query string, or None if there is no such export.
+
+	With `check_owner`, a web job's run is exported only if the query's ``owner`` is the job's.
+	"""
+	parts = path.strip("/").split("/")
+
+	def number(key, default=None):
+		return float(query[key][0]) if key in query else default
+
+	if len(parts) == 1 and parts[0] in ("sites.csv", "sites.csv.gz"):
+		chunks = csv_chunks(site_frames(number("min_depth", 0.0), number("max_depth", float("inf")), query.get("feature"), with_runs=query.get("runs") == ["1"]))
+		return parts[0], gzipped(chunks) if parts[0].endswith(".gz") else chunks
+	if len(parts) == 3 and parts[0] == "runs":
+		run = find_run(parts[1])
+		if run and check_owner and not owner_allowed(run, query.get("owner", [None])[0]):
+			return None
+		chunks = run_export(run, parts[2], number("min_novelty"), query.get("env") == ["1"]) if run else None
+		return (f"{parts[1]}_{parts[2]}", chunks) if chunks else None
+	return None
+
+
+class _ExportHandler(BaseHTTPRequestHandler):
+	server_version = f"marinetaxa-exports/{__version__}"
+
+	def do_GET(self):
+		url = urlsplit(self.path)
+		try:
+			export = open_export(url.path, parse_qs(url.query), self.server.check_owner)
+		except (ValueError, RuntimeError):
+			export = None
+		if export is None:
+			self.send_response(HTTPStatus.NOT_FOUND)
+			self.send_header("Content-Length", "0")
+			self.end_headers()
+			return
+		name, chunks = export
+		self.send_response(HTTPStatus.OK)
+		self.send_header("Content-Type", CONTENT_TYPES.get(Path(name).suffix, "application/octet-stream"))
+		self.send_header("Content-Disposition", f"attachment; filename=\"{name}\"")
+		# No Content-Length: the body is written as it is produced and ends when the connection closes
+		self.send_header("Connection", "close")
+		self.end_headers()
+		try:
+			for chunk in chunks:
+				self.wfile.write(chunk)
+		except (BrokenPipeError, ConnectionResetError):
+			pass  # download cancelled
+		finally:
+			chunks.close()
+
+	def log_message(self, format, *args):
+		pass
+
+
+class ExportServer:
+	"""Threaded HTTP server for the export paths, run in a background thread or in the foreground."""
+
+	def __init__(self, host: Optional[str] = None, port: Optional[int] = None):
+		host = export_host() if host is None else host
+		self.httpd = ThreadingHTTPServer((host, export_port() if port is None else port), _ExportHandler)
+		self.httpd.daemon_threads = True
+		# Job ids are not secret; once other machines can connect, only a job's owner may download it
+		self.httpd.check_owner = not is_loopback(host)
+		self._thread = threading.Thread(target=self.httpd.serve_forever, name="marinetaxa-exports", daemon=True)
+
+	@property
+	def port(self) -> int:
+		return self.httpd.server_address[1]
+
+	def start(self) -> "ExportServer":
+		self._thread.start()
+		return self
+
+	def stop(self) -> None:
+		self.httpd.shutdown()
+		self.httpd.server_close()
+
+
+def export_url(path: str, request_host: Optional[str] = None, **query) -> Optional[str]:
+	"""Link to an export for a browser that reached the app at `request_host`; MARINETAXA_EXPORT_URL overrides the base.
+
+	None when that browser cannot reach the export server (bound to loopback, browser elsewhere).
+	"""
+	host = browser_host(export_host(), request_host)
+	base = os.environ.get("MARINETAXA_EXPORT_URL") or (f"http://{host}:{export_port()}" if host else None)
+	if base is None:
+		return None
+	params = urlencode({key: value for key, value in query.items() if value is not None}, doseq=True)
+	return f"{base.rstrip('/')}/{quote(path.lstrip('/'))}" + (f"?{params}" if params else "")
+
+
+def write_chunks(chunks: Iterable[bytes], out) -> int:
+	"""Write an export to the file `out`; returns the bytes written."""
+	written = 0
+	with open(out, "wb") as handle:
+		for chunk in chunks:
+			handle.write(chunk)
+			written += len(chunk)
+	return written
@@ -0,0 +1,261 @@
+"""Persistent local job queue and worker pool for batch pipeline runs.
+
+Jobs live in a SQLite database so they outlive browser sessions and server
+restarts. A dispatcher thread in the server process hands queued jobs to
+worker processes (one per core), picking round-robin across owners so one
+user's backlog cannot starve another's. Pause and cancel are cooperative: the
+worker checks its job row between batches and stops cleanly; on resume the
+run restarts from the last checkpointed stage.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import artifacts, pipeline, reviews
+from .config import data_dir
+
+QUEUED = "queued"
+RUNNING = "running"
+PAUSING = "pausing"
+PAUSED = "paused"
+CANCELLING = "cancelling"
+CANCELLED = "cancelled"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATES = (QUEUED, RUNNING, PAUSING, PAUSED, CANCELLING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+	id TEXT PRIMARY KEY,
+	owner TEXT NOT NULL,
+	status TEXT NOT NULL,
+	inputs TEXT NOT NULL,
+	params TEXT NOT NULL,
+	stage TEXT,
+	progress REAL DEFAULT 0,
+	processed INTEGER DEFAULT 0,
+	sample TEXT,
+	message TEXT,
+	created REAL NOT NULL,
+	started REAL,
+	finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, created);
+"""
+
+
+def jobs_dir() -> Path:
+	path = data_dir() / "jobs"
+	path.mkdir(parents=True, exist_ok=True)
+	return path
+
+
+def spool_upload(name: str, data) -> Path:
+	"""Persist uploaded bytes under a content-addressed name so workers can read them."""
+	digest = hashlib.sha256(data).hexdigest()[:24]
+	uploads = data_dir() / "uploads"
+	uploads.mkdir(parents=True, exist_ok=True)
+	path = uploads / f"{digest}-{Path(name).name}"
+	if not path.exists():
+		tmp = path.with_suffix(path.suffix + ".part")
+		tmp.write_bytes(data)
+		tmp.replace(path)
+	return path
+
+
+class JobStore:
+	def __init__(self, path=None):
+		self.path = Path(path) if path else data_dir() / "jobs.db"
+		with closing(self._connect()) as conn:
+			conn.executescript(_SCHEMA)
+			columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+			if "processed" not in columns:
+				conn.execute("ALTER TABLE jobs ADD COLUMN processed INTEGER DEFAULT 0")
+			if "sample" not in columns:
+				conn.execute("ALTER TABLE jobs ADD COLUMN sample TEXT")
+
+	def _connect(self) -> sqlite3.Connection:
+		conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+		conn.row_factory = sqlite3.Row
+		conn.execute("PRAGMA journal_mode=WAL")
+		return conn
+
+	def _execute(self, sql: str, args=()) -> int:
+		with closing(self._connect()) as conn:
+			return conn.execute(sql, args).rowcount
+
+	def _query(self, sql: str, args=()) -> List[Dict]:
+		with closing(self._connect()) as conn:
+			return [_decode(row) for row in conn.execute(sql, args)]
+
+	def submit(self, owner: str, inputs, params: pipeline.PipelineParams, sample: Optional[Dict] = None) -> str:
+		job_id = uuid.uuid4().hex[:12]
+		self._execute(
+			"INSERT INTO jobs (id, owner, status, inputs, params, sample, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+			(job_id, owner, QUEUED, json.dumps([str(p) for p in inputs]), json.dumps(params.to_dict()), json.dumps(sample) if sample else None, time.time()),
+		)
+		return job_id
+
+	def get(self, job_id: str) -> Optional[Dict]:
+		rows = self._query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+		return rows[0] if rows else None
+
+	def list(self, owner: Optional[str] = None, limit: int = 50) -> List[Dict]:
+		if owner is None:
+			return self._query("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,))
+		return self._query("SELECT * FROM jobs WHERE owner = ? ORDER BY created DESC LIMIT ?", (owner, limit))
+
+	def _transition(self, job_id: str, moves: Dict[str, str]) -> bool:
+		for old, new in moves.items():
+			if self._execute("UPDATE jobs SET status = ? WHERE id = ? AND status = ?", (new, job_id, old)):
+				return True
+		return False
+
+	def pause(self, job_id: str) -> bool:
+		return self._transition(job_id, {QUEUED: PAUSED, RUNNING: PAUSING})
+
+	def resume(self, job_id: str) -> bool:
+		return self._transition(job_id, {PAUSED: QUEUED, PAUSING: RUNNING})
+
+	def cancel(self, job_id: str) -> bool:
+		return self._transition(job_id, {QUEUED: CANCELLED, PAUSED: CANCELLED, RUNNING: CANCELLING, PAUSING: CANCELLING})
+
+	def claim_next(self, running_by_owner: Dict[str, int]) -> Optional[Dict]:
+		"""Atomically move the fairest queued job to running: fewest running jobs per owner, then oldest."""
+		queued = self._query("SELECT * FROM jobs WHERE status = ? ORDER BY created", (QUEUED,))
+		queued.sort(key=lambda job: running_by_owner.get(job["owner"], 0))
+		for job in queued:
+			claimed = self._execute(
+				"UPDATE jobs SET status = ?, started = ?, message = NULL WHERE id = ? AND status = ?",
+				(RUNNING, time.time(), job["id"], QUEUED),
+			)
+			if claimed:
+				return job
+		return None
+
+	def running(self) -> List[Dict]:
+		return self._query("SELECT * FROM jobs WHERE status IN (?, ?, ?)", (RUNNING, PAUSING, CANCELLING))
+
+	def update_progress(self, job_id: str, stage: str, progress: float, processed: int = 0) -> Optional[str]:
+		"""Record progress; returns the job's status, or None if its row is gone."""
+		with closing(self._connect()) as conn:
+			conn.execute("UPDATE jobs SET stage = ?, progress = ?, processed = ? WHERE id = ?", (stage, progress, processed, job_id))
+			row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+			return row["status"] if row else None
+
+	def finish(self, job_id: str, status: str, message: Optional[str] = None) -> None:
+		self._execute(
+			"UPDATE jobs SET status = ?, message = ?, finished = ? WHERE id = ?",
+			(status, message, time.time() if status in (DONE, FAILED, CANCELLED) else None, job_id),
+		)
+
+	def recover(self) -> None:
+		"""Requeue jobs whose worker died with the previous server process."""
+		self._execute("UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING))
+		self._execute("UPDATE jobs SET status = ? WHERE status = ?", (PAUSED, PAUSING))
+		self._execute("UPDATE jobs SET status = ?, finished = ? WHERE status = ?", (CANCELLED, time.time(), CANCELLING))
+
+
+def _decode(row: sqlite3.Row) -> Dict:
+	job = dict(row)
+	job["inputs"] = json.loads(job["inputs"])
+	job["params"] = json.loads(job["params"])
+	job["sample"] = json.loads(job["sample"]) if job.get("sample") else None
+	return job
+
+
+def result_dir(job_id: str) -> Path:
+	return jobs_dir() / job_id
+
+
+def _run_job(db_path: str, job_id: str) -> None:
+	store = JobStore(db_path)
+	job = store.get(job_id)
+	params = pipeline.PipelineParams(**job["params"])
+	last_report = [0.0]
+
+	def report(stage: str, fraction: float, items: int = 0) -> None:
+		now = time.monotonic()
+		if now - last_report[0] < 0.5 and fraction < 1.0:
+			return
+		last_report[0] = now
+		status = store.update_progress(job_id, stage, fraction, items)
+		if status == PAUSING:
+			raise pipeline.PipelineInterrupted(PAUSED)
+		# A job whose row was deleted is treated as cancelled
+		if status in (CANCELLING, None):
+			raise pipeline.PipelineInterrupted(CANCELLED)
+
+	try:
+		# Finished stages are checkpointed, so a resumed or requeued job skips them
+		result = pipeline.run_pipeline(job["inputs"], params, report, artifacts.ArtifactStore())
+		pipeline.write_outputs(result, result_dir(job_id), params, job["sample"])
+		# Candidate novel clusters join the expert review queue with their medoid sequences
+		reviews.ReviewStore().enqueue(reviews.run_candidates(job_id, result.clusters, job["sample"]))
+		store.finish(job_id, DONE, f"{result.stats['clusters']} clusters from {result.stats['passed_qc']} reads")
+	except pipeline.PipelineInterrupted as exc:
+		store.finish(job_id, exc.status)
+	except Exception as exc:
+		store.finish(job_id, FAILED, f"{type(exc).__name__}: {exc}")
+
+
+class WorkerPool:
+	"""Runs queued jobs in worker processes; one instance per server process."""
+
+	def __init__(self, store: JobStore, max_workers: Optional[int] = None, poll_interval: float = 1.0):
+		self.store = store
+		self.max_workers = max_workers or os.cpu_count() or 1
+		self.poll_interval = poll_interval
+		self._ctx = multiprocessing.get_context("spawn")
+		self._procs: Dict[str, tuple] = {}
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._loop, name="marinetaxa-dispatcher", daemon=True)
+
+	def start(self) -> "WorkerPool":
+		self.store.recover()
+		self._thread.start()
+		return self
+
+	def stop(self) -> None:
+		self._stop.set()
+		self._thread.join()
+
+	def worker_pids(self) -> Dict[str, int]:
+		return {job_id: proc.pid for job_id, (_, proc) in list(self._procs.items()) if proc.pid}
+
+	def running_by_owner(self) -> Dict[str, int]:
+		counts: Dict[str, int] = {}
+		for owner, _ in self._procs.values():
+			counts[owner] = counts.get(owner, 0) + 1
+		return counts
+
+	def _reap(self) -> None:
+		for job_id, (_, proc) in list(self._procs.items()):
+			if proc.is_alive():
+				continue
+			proc.join()
+			del self._procs[job_id]
+			job = self.store.get(job_id)
+			if job and job["status"] in (RUNNING, PAUSING, CANCELLING):
+				self.store.finish(job_id, FAILED, f"Worker exited with code {proc.exitcode}")
+
+	def _loop(self) -> None:
+		while not self._stop.is_set():
+			self._reap()
+			while len(self._procs) < self.max_workers:
+				job = self.store.claim_next(self.running_by_owner())
+				if job is None:
+					break
+				proc = self._ctx.Process(target=_run_job, args=(str(self.store.path), job["id"]))
+				proc.start()
+				self._procs[job["id"]] = (job["owner"], proc)
+			self._stop.wait(self.poll_interval)
@@ -0,0 +1,177 @@
+"""Low-overhead resource sampler for pipeline worker processes.
+
+A single background thread per server process reads CPU time, RSS and I/O
+counters of the running workers straight from ``/proc`` (psutil is used
+instead where ``/proc`` is unavailable) plus per-stage progress from the job
+store, and appends one row to a fixed-size ring buffer every few seconds.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import pipeline
+
+# Optional dependency: psutil (only needed on platforms without /proc)
+try:
+	import psutil
+	_HAS_PSUTIL = True
+except Exception:
+	_HAS_PSUTIL = False
+
+_PROC = Path("/proc")
+_HAS_PROC = (_PROC / "self" / "stat").exists()
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+SAMPLE_FIELDS = [
+	("timestamp", "f8"),
+	("cpu_percent", "f4"),
+	("rss_mb", "f4"),
+	("read_mb_s", "f4"),
+	("write_mb_s", "f4"),
+	("workers", "i4"),
+	("throughput", "f4"),
+] + [(f"throughput_{stage}", "f4") for stage in pipeline.STAGES]
+
+
+class RingBuffer:
+	"""Fixed-capacity structured array; appends overwrite the oldest row."""
+
+	def __init__(self, capacity: int):
+		self._data = np.zeros(capacity, dtype=SAMPLE_FIELDS)
+		self._next = 0
+		self._size = 0
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return self._size
+
+	def append(self, row: Dict[str, float]) -> None:
+		with self._lock:
+			slot = self._data[self._next]
+			for name, value in row.items():
+				slot[name] = value
+			self._next = (self._next + 1) % len(self._data)
+			self._size = min(self._size + 1, len(self._data))
+
+	def snapshot(self) -> np.ndarray:
+		with self._lock:
+			if self._size < len(self._data):
+				return self._data[:self._size].copy()
+			return np.concatenate([self._data[self._next:], self._data[:self._next]])
+
+
+def _read_proc(pid: int) -> Optional[Tuple[float, float, float, float]]:
+	"""(cpu_seconds, rss_bytes, read_bytes, write_bytes) for one process, or None if it exited."""
+	try:
+		if _HAS_PROC:
+			stat = (_PROC / str(pid) / "stat").read_text()
+			fields = stat[stat.rindex(")") + 2:].split()
+			cpu = (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+			rss = int(fields[21]) * _PAGE_SIZE
+			io = {}
+			try:
+				for line in (_PROC / str(pid) / "io").read_text().splitlines():
+					key, _, value = line.partition(":")
+					io[key] = int(value)
+			except OSError:
+				pass
+			return cpu, rss, io.get("read_bytes", 0), io.get("write_bytes", 0)
+		if _HAS_PSUTIL:
+			proc = psutil.Process(pid)
+			times = proc.cpu_times()
+			io = proc.io_counters() if hasattr(proc, "io_counters") else None
+			return times.user + times.system, proc.memory_info().rss, io.read_bytes if io else 0, io.write_bytes if io else 0
+	except Exception:
+		# Process exited between listing and reading (or psutil.AccessDenied)
+		return None
+	return None
+
+
+class ResourceSampler:
+	def __init__(self, pids: Callable[[], Dict[str, int]], running_jobs: Callable[[], list], interval: float = 5.0, capacity: int = 720):
+		self._pids = pids
+		self._running_jobs = running_jobs
+		self.interval = interval
+		self.buffer = RingBuffer(capacity)
+		self._last_proc: Dict[int, Tuple[float, float, float, float]] = {}
+		self._last_jobs: Dict[str, Tuple[str, int]] = {}
+		self._last_time = time.monotonic()
+		self._busy = 0.0
+		self._started = time.monotonic()
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._loop, name="marinetaxa-monitor", daemon=True)
+
+	def start(self) -> "ResourceSampler":
+		self._thread.start()
+		return self
+
+	def stop(self) -> None:
+		self._stop.set()
+		self._thread.join()
+
+	@property
+	def overhead_percent(self) -> float:
+		"""CPU time spent sampling as a share of one core since start."""
+		return 100.0 * self._busy / max(1e-9, time.monotonic() - self._started)
+
+	def sample(self) -> Dict[str, float]:
+		now = time.monotonic()
+		elapsed = max(1e-6, now - self._last_time)
+		self._last_time = now
+
+		cpu = rss = read = write = 0.0
+		current = {}
+		for pid in self._pids().values():
+			stats = _read_proc(pid)
+			if stats is None:
+				continue
+			current[pid] = stats
+			previous = self._last_proc.get(pid, stats)
+			cpu += stats[0] - previous[0]
+			rss += stats[1]
+			read += stats[2] - previous[2]
+			write += stats[3] - previous[3]
+		self._last_proc = current
+
+		# Reads/min per stage from the processed counter each running job reports
+		per_stage = dict.fromkeys(pipeline.STAGES, 0.0)
+		jobs_now = {}
+		for job in self._running_jobs():
+			stage, processed = job["stage"], job["processed"] or 0
+			jobs_now[job["id"]] = (stage, processed)
+			prev_stage, prev_processed = self._last_jobs.get(job["id"], (stage, processed))
+			if stage in per_stage:
+				done = processed - prev_processed if stage == prev_stage else processed
+				per_stage[stage] += max(0, done) * 60.0 / elapsed
+		self._last_jobs = jobs_now
+
+		row = {
+			"timestamp": time.time(),
+			"cpu_percent": 100.0 * cpu / elapsed / (os.cpu_count() or 1),
+			"rss_mb": rss / 1024 ** 2,
+			"read_mb_s": read / 1024 ** 2 / elapsed,
+			"write_mb_s": write / 1024 ** 2 / elapsed,
+			"workers": len(current),
+			"throughput": sum(per_stage.values()),
+		}
+		row.update({f"throughput_{stage}": rate for stage, rate in per_stage.items()})
+		return row
+
+	def _loop(self) -> None:
+		while not self._stop.wait(self.interval):
+			start = time.thread_time()
+			try:
+				self.buffer.append(self.sample())
+			finally:
+				self._busy += time.thread_time() - start
+
+	def frame(self) -> pd.DataFrame:
+		df = pd.DataFrame(self.buffer.snapshot())
+		df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s", utc=True).dt.tz_convert(None)
+		return df
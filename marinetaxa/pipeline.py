@@ -0,0 +1,490 @@
+"""Taxonomy-free eDNA pipeline: parse, QC, dereplicate, embed, cluster, score.
+
+The embedding and clustering steps are lightweight CPU stand-ins (k-mer
+profiles and greedy centroid clustering) for the DNABERT/HDBSCAN models shown
+in the UI, so the whole pipeline runs offline on any machine.
+"""
+import json
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from . import artifacts, envfeatures, seqio, shard
+
+STAGES = ["parse", "qc", "dereplicate", "embed", "cluster", "score"]
+STAGE_LABELS = {
+	"parse": "1. Raw Sequence Input",
+	"qc": "2. Quality Filtering",
+	"dereplicate": "2. Quality Filtering",
+	"embed": "3. DNA Embedding (DNABERT)",
+	"cluster": "4. Taxonomy-Free Clustering",
+	"score": "5. Novelty Detection",
+	"represent": "5. Novelty Detection",
+}
+CLUSTERING_METHODS = ["HDBSCAN", "DBSCAN", "Gaussian Mixture"]
+# Checkpointed stages and the params each one's output depends on. Parse and
+# QC are folded into "dereplicate": they are one streaming pass over the input.
+# novelty_threshold is applied after scoring, so changing it reuses everything.
+STAGE_PARAMS = {
+	"dereplicate": ("quality_filter", "min_length", "max_length"),
+	"embed": ("kmer_size",),
+	"cluster": ("clustering_method", "min_cluster_size", "batch_size"),
+	"score": (),
+	"represent": (),
+}
+
+# Cosine similarity a sequence needs to join an existing cluster centroid
+_METHOD_RADIUS = {"HDBSCAN": 0.90, "UMAP + HDBSCAN": 0.90, "DBSCAN": 0.85, "Gaussian Mixture": 0.85}
+_INVALID = 4
+_BASE_CODES = np.full(256, _INVALID, dtype=np.uint8)
+for _i, _base in enumerate(b"ACGT"):
+	_BASE_CODES[_base] = _i
+	_BASE_CODES[_base + 32] = _i  # lowercase
+
+
+class PipelineInterrupted(Exception):
+	"""Raised from a progress callback to stop a run between batches."""
+
+	def __init__(self, status: str):
+		super().__init__(status)
+		self.status = status
+
+
+@dataclass
+class PipelineParams:
+	batch_size: int = 128
+	clustering_method: str = "HDBSCAN"
+	novelty_threshold: float = 0.7
+	quality_filter: str = "Phred > 20"
+	min_length: int = 150
+	max_length: int = 1500
+	min_cluster_size: int = 5
+	kmer_size: int = 4
+	# Local processes for parse/embed; never part of a stage key since it does not change outputs
+	workers: int = 1
+
+	@property
+	def min_phred(self) -> float:
+		match = re.search(r"(\d+)", self.quality_filter)
+		return float(match.group(1)) if match else 0.0
+
+	def to_dict(self) -> dict:
+		return asdict(self)
+
+
+@dataclass
+class PipelineResult:
+	clusters: pd.DataFrame
+	scores: pd.DataFrame
+	stats: Dict[str, float] = field(default_factory=dict)
+
+
+# progress(stage, fraction_done, items_done): items are sequences processed so far in the stage
+ProgressFn = Callable[..., None]
+
+
+def _noop(stage: str, fraction: float, items: int = 0) -> None:
+	pass
+
+
+# Stage 1: raw input
+
+def _read_file(path) -> List[seqio.Read]:
+	return list(seqio.read_records(path))
+
+
+def parse_reads(paths: Sequence, progress: ProgressFn = _noop, pool: Optional[ProcessPoolExecutor] = None) -> List[seqio.Read]:
+	reads = []
+	chunks = pool.map(_read_file, paths) if pool and len(paths) > 1 else map(_read_file, paths)
+	for i, chunk in enumerate(chunks):
+		reads.extend(chunk)
+		progress("parse", (i + 1) / len(paths), len(reads))
+	return reads
+
+
+# Stage 2: quality filtering and dereplication
+
+def quality_filter(reads: Sequence[seqio.Read], params: PipelineParams) -> List[seqio.Read]:
+	min_q = params.min_phred
+	return [
+		r for r in reads
+		if params.min_length <= len(r.seq) <= params.max_length
+		and (r.mean_quality is None or r.mean_quality >= min_q)
+	]
+
+
+def dereplicate(reads: Sequence[seqio.Read]):
+	"""Collapse identical sequences; returns (unique_seqs, counts, read_to_unique)."""
+	index: Dict[str, int] = {}
+	read_to_unique = np.empty(len(reads), dtype=np.int64)
+	for i, r in enumerate(reads):
+		read_to_unique[i] = index.setdefault(r.seq.upper(), len(index))
+	counts = np.bincount(read_to_unique, minlength=len(index)).astype(np.int64)
+	return list(index), counts, read_to_unique
+
+
+# Stage 3: embedding
+
+def _kmer_profiles(raw: np.ndarray, lengths: np.ndarray, k: int) -> np.ndarray:
+	"""Profiles for sequences concatenated in `raw` (ASCII bytes) with the given lengths."""
+	dim = 4 ** k
+	n = len(lengths)
+	counts = np.zeros(n * dim, dtype=np.float32)
+	codes = _BASE_CODES[raw]
+	if len(codes) >= k:
+		windows = sliding_window_view(codes, k)
+		ends = np.cumsum(lengths)
+		owner = np.repeat(np.arange(n), lengths)[: len(windows)]
+		valid = (windows != _INVALID).all(axis=1)
+		valid &= np.arange(len(windows)) + k <= ends[owner]
+		weights = 4 ** np.arange(k - 1, -1, -1, dtype=np.int64)
+		kmers = windows[valid].astype(np.int64) @ weights
+		counts += np.bincount(owner[valid] * dim + kmers, minlength=n * dim)
+	matrix = counts.reshape(n, dim)
+	norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+	np.divide(matrix, norms, out=matrix, where=norms > 0)
+	return matrix
+
+
+def kmer_matrix(seqs: Sequence[str], k: int) -> np.ndarray:
+	"""L2-normalised k-mer frequency profiles for a batch, computed without per-sequence loops."""
+	lengths = np.fromiter((len(s) for s in seqs), dtype=np.int64, count=len(seqs))
+	return _kmer_profiles(np.frombuffer("".join(seqs).encode("ascii"), dtype=np.uint8), lengths, k)
+
+
+def _embed_kernel(arrays: Dict[str, np.ndarray], out: np.ndarray, start: int, stop: int, k: int) -> None:
+	offsets = arrays["offsets"][start:stop + 1]
+	out[start:stop] = _kmer_profiles(arrays["data"][offsets[0]:offsets[-1]], np.diff(offsets), k)
+
+
+def _batch_bounds(n: int, batch_size: int) -> np.ndarray:
+	return np.append(np.arange(0, n, max(1, batch_size)), n)
+
+
+def embed(seqs: Sequence[str], params: PipelineParams, progress: ProgressFn = _noop, pool: Optional[ProcessPoolExecutor] = None) -> np.ndarray:
+	dim = 4 ** params.kmer_size
+	if pool and len(seqs):
+		packed = artifacts.pack_strings(seqs)
+		return shard.run_sharded(
+			pool, params.workers, _embed_kernel, _batch_bounds(len(seqs), params.batch_size),
+			{"data": packed["data"], "offsets": packed["offsets"]}, (len(seqs), dim), np.float32,
+			args=(params.kmer_size,), progress=lambda done: progress("embed", done / len(seqs), done),
+		)
+	out = np.empty((len(seqs), dim), dtype=np.float32)
+	step = max(1, params.batch_size)
+	for start in range(0, len(seqs), step):
+		stop = min(start + step, len(seqs))
+		out[start:stop] = kmer_matrix(seqs[start:stop], params.kmer_size)
+		progress("embed", stop / len(seqs), stop)
+	return out
+
+
+def process_pool(workers: int):
+	"""Spawned process pool for workers > 1 (ready for shard.run_sharded), else a no-op context yielding None."""
+	if workers <= 1:
+		return nullcontext(None)
+	context = multiprocessing.get_context("spawn")
+	return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=shard.init_worker, initargs=(context.Lock(),))
+
+
+# Stage 4: clustering
+
+def _assign_block(emb: np.ndarray, idx: np.ndarray, labels: np.ndarray, centroids: np.ndarray, n_cent: int, radius: float):
+	"""Assign rows ``idx`` to centroids within ``radius``, seeding new centroids; returns (centroids, n_cent)."""
+	# Most of a block joins existing centroids in one matmul; the rest seeds new ones
+	if n_cent:
+		sims = emb[idx] @ centroids[:n_cent].T
+		best = sims.argmax(axis=1)
+		hit = sims[np.arange(len(idx)), best] >= radius
+		labels[idx[hit]] = best[hit]
+		idx = idx[~hit]
+	for i in idx:
+		if n_cent:
+			sims = centroids[:n_cent] @ emb[i]
+			j = int(sims.argmax())
+			if sims[j] >= radius:
+				labels[i] = j
+				continue
+		if n_cent == len(centroids):
+			centroids = np.concatenate([centroids, np.empty_like(centroids)])
+		centroids[n_cent] = emb[i]
+		labels[i] = n_cent
+		n_cent += 1
+	return centroids, n_cent
+
+
+def _leader_cluster(emb: np.ndarray, order: np.ndarray, radius: float, block: int, progress: ProgressFn):
+	n, dim = emb.shape
+	centroids = np.empty((max(16, n // 8), dim), dtype=np.float32)
+	n_cent = 0
+	labels = np.full(n, -1, dtype=np.int64)
+	for start in range(0, n, block):
+		centroids, n_cent = _assign_block(emb, order[start:start + block], labels, centroids, n_cent, radius)
+		progress("cluster", min(1.0, (start + block) / n), min(start + block, n))
+	return labels, centroids[:n_cent]
+
+
+def _refine_kmeans(emb: np.ndarray, weights: np.ndarray, centroids: np.ndarray, iterations: int = 5) -> np.ndarray:
+	labels = np.zeros(len(emb), dtype=np.int64)
+	for _ in range(iterations):
+		labels = (emb @ centroids.T).argmax(axis=1)
+		sums = np.zeros_like(centroids)
+		np.add.at(sums, labels, emb * weights[:, None])
+		norms = np.linalg.norm(sums, axis=1, keepdims=True)
+		keep = norms[:, 0] > 0
+		centroids = sums[keep] / norms[keep]
+	return (emb @ centroids.T).argmax(axis=1)
+
+
+def cluster(emb: np.ndarray, weights: np.ndarray, params: PipelineParams, progress: ProgressFn = _noop) -> np.ndarray:
+	"""Label each unique sequence with a cluster index (-1 = noise), largest cluster first."""
+	if not len(emb):
+		return np.empty(0, dtype=np.int64)
+	radius = _METHOD_RADIUS.get(params.clustering_method, 0.9)
+	order = np.argsort(-weights, kind="stable")
+	labels, centroids = _leader_cluster(emb, order, radius, max(1, params.batch_size), progress)
+	if params.clustering_method == "Gaussian Mixture":
+		labels = _refine_kmeans(emb, weights.astype(np.float32), centroids)
+	else:
+		abundance = np.bincount(labels, weights=weights)
+		labels = np.where(abundance[labels] >= params.min_cluster_size, labels, -1)
+	# Renumber so cluster 0 is the most abundant
+	valid = labels >= 0
+	abundance = np.bincount(labels[valid], weights=weights[valid], minlength=labels.max() + 1 if valid.any() else 0)
+	rank = np.empty(len(abundance), dtype=np.int64)
+	rank[np.argsort(-abundance, kind="stable")] = np.arange(len(abundance))
+	return np.where(valid, rank[np.maximum(labels, 0)], -1)
+
+
+def centroids_of(emb: np.ndarray, labels: np.ndarray) -> np.ndarray:
+	n_clusters = int(labels.max()) + 1 if len(labels) else 0
+	sums = np.zeros((n_clusters, emb.shape[1]), dtype=np.float32)
+	valid = labels >= 0
+	np.add.at(sums, labels[valid], emb[valid])
+	norms = np.linalg.norm(sums, axis=1, keepdims=True)
+	np.divide(sums, norms, out=sums, where=norms > 0)
+	return sums
+
+
+def representatives(emb: np.ndarray, labels: np.ndarray, weights: np.ndarray, block: int = 65536) -> np.ndarray:
+	"""Row index of each cluster's medoid under cosine distance, counting each row `weights` times.
+
+	For unit-length profiles a row's summed distance to its cluster is
+	``n - x . sum(members)``. The medoid is therefore the member closest to the
+	weighted centroid, found in one pass instead of all pairs.
+	"""
+	n_clusters = int(labels.max()) + 1 if len(labels) else 0
+	rows = np.flatnonzero(labels >= 0)
+	if not n_clusters:
+		return np.empty(0, dtype=np.int64)
+	sums = np.zeros((n_clusters, emb.shape[1]), dtype=np.float64)
+	for start in range(0, len(rows), block):
+		part = rows[start:start + block]
+		np.add.at(sums, labels[part], emb[part] * weights[part, None])
+	closeness = np.empty(len(rows), dtype=np.float64)
+	for start in range(0, len(rows), block):
+		part = rows[start:start + block]
+		closeness[start:start + block] = np.einsum("ij,ij->i", emb[part], sums[labels[part]])
+	# Highest closeness first within each cluster; ties go to the more abundant sequence
+	order = np.lexsort((-weights[rows], -closeness, labels[rows]))
+	first = np.searchsorted(labels[rows][order], np.arange(n_clusters))
+	return rows[order[first]]
+
+
+# Stage 5: novelty scoring
+
+def isolation(emb: np.ndarray, labels: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+	"""Cosine distance (0-1 for k-mer profiles) from each row to the nearest centroid other than its own."""
+	distance = np.ones(len(emb), dtype=np.float32)
+	if len(centroids) and len(emb):
+		sims = emb @ centroids.T
+		rows = np.nonzero(labels >= 0)[0]
+		sims[rows, labels[rows]] = -1.0
+		# Clipped: a row whose own cluster is the only one has no other centroid and counts as fully isolated
+		distance[:] = np.clip(1.0 - sims.max(axis=1), 0.0, 1.0)
+	return distance
+
+
+def _isolation_kernel(arrays: Dict[str, np.ndarray], out: np.ndarray, start: int, stop: int) -> None:
+	out[start:stop] = isolation(arrays["emb"][start:stop], arrays["labels"][start:stop], arrays["centroids"])
+
+
+def score(emb: np.ndarray, labels: np.ndarray, params: PipelineParams, progress: ProgressFn = _noop, pool: Optional[ProcessPoolExecutor] = None) -> np.ndarray:
+	"""Rank-normalised isolation of each sequence from every cluster other than its own."""
+	if not len(emb):
+		return np.empty(0, dtype=np.float32)
+	centroids = centroids_of(emb, labels)
+	if pool:
+		distance = shard.run_sharded(
+			pool, params.workers, _isolation_kernel, _batch_bounds(len(emb), params.batch_size),
+			{"emb": emb, "labels": labels, "centroids": centroids}, (len(emb),), np.float32,
+			progress=lambda done: progress("score", done / len(emb), done),
+		)
+	else:
+		distance = np.empty(len(emb), dtype=np.float32)
+		step = max(1, params.batch_size)
+		for start in range(0, len(emb), step):
+			stop = min(start + step, len(emb))
+			distance[start:stop] = isolation(emb[start:stop], labels[start:stop], centroids)
+			progress("score", stop / len(emb), stop)
+	ranks = distance.argsort(kind="stable").argsort(kind="stable")
+	return (ranks / max(1, len(ranks) - 1)).astype(np.float32)
+
+
+class StreamingAnalyzer:
+	"""Incremental form of embed/cluster/score for sequences that arrive in batches.
+
+	Centroids persist between batches, so each result is final as soon as its
+	batch is processed; the novelty score is the raw isolation distance since
+	a stream cannot be rank-normalised. Sequences outside the length limits
+	are left out, as quality_filter would drop them (streamed sequences carry
+	no base qualities).
+	"""
+
+	def __init__(self, params: PipelineParams, centroids: Optional[np.ndarray] = None):
+		self.params = params
+		self.radius = _METHOD_RADIUS.get(params.clustering_method, 0.9)
+		dim = 4 ** params.kmer_size
+		self.centroids = np.empty((0, dim), dtype=np.float32) if centroids is None else centroids
+
+	def process(self, seqs: Sequence[str]):
+		"""Returns (labels, novelty_scores) for one batch and grows the centroid set; filtered sequences get -1 and NaN."""
+		lengths = np.fromiter(map(len, seqs), dtype=np.int64, count=len(seqs))
+		passed = np.flatnonzero((lengths >= self.params.min_length) & (lengths <= self.params.max_length))
+		labels = np.full(len(seqs), -1, dtype=np.int64)
+		scores = np.full(len(seqs), np.nan, dtype=np.float32)
+		if not len(passed):
+			return labels, scores
+		emb = kmer_matrix([seqs[i] for i in passed], self.params.kmer_size)
+		kept = np.full(len(passed), -1, dtype=np.int64)
+		buffer = np.empty((len(self.centroids) + len(passed), emb.shape[1]), dtype=np.float32)
+		buffer[:len(self.centroids)] = self.centroids
+		buffer, n_cent = _assign_block(emb, np.arange(len(passed)), kept, buffer, len(self.centroids), self.radius)
+		self.centroids = buffer[:n_cent]
+		labels[passed] = kept
+		scores[passed] = isolation(emb, kept, self.centroids)
+		return labels, scores
+
+
+def cluster_ids(n_clusters: int) -> np.ndarray:
+	"""Display ids for clusters 0..n-1; index -1 maps to the trailing "Noise" entry."""
+	return np.array([f"DeepSea_C{str(i + 1).zfill(3)}" for i in range(n_clusters)] + ["Noise"])
+
+
+def cluster_table(labels: np.ndarray, counts: np.ndarray, scores: np.ndarray, params: PipelineParams, representative: Optional[Sequence[str]] = None) -> pd.DataFrame:
+	valid = labels >= 0
+	n_clusters = int(labels.max()) + 1 if valid.any() else 0
+	reads = np.bincount(labels[valid], weights=counts[valid], minlength=n_clusters)
+	unique = np.bincount(labels[valid], minlength=n_clusters)
+	score_sum = np.bincount(labels[valid], weights=scores[valid] * counts[valid], minlength=n_clusters)
+	novelty = np.divide(score_sum, reads, out=np.zeros(n_clusters), where=reads > 0)
+	candidate = novelty > params.novelty_threshold
+	return pd.DataFrame({
+		"Cluster_ID": cluster_ids(n_clusters)[:-1],
+		"Sequences": reads.astype(np.int64),
+		"Unique_Sequences": unique,
+		"Novelty_Score": novelty.round(3),
+		"Candidate_Novel": np.where(candidate, "Yes", "No"),
+		"Status": np.where(candidate, "Pending Review", "Known"),
+	}).assign(**({"Representative": list(representative)} if representative is not None else {}))
+
+
+def stage_keys(input_key: str, params: PipelineParams) -> Dict[str, str]:
+	"""Chain each checkpointed stage's key from its upstream key plus the params it reads."""
+	keys = {}
+	upstream = input_key
+	for stage, names in STAGE_PARAMS.items():
+		upstream = artifacts.digest(stage, upstream, {n: getattr(params, n) for n in names})
+		keys[stage] = upstream
+	return keys
+
+
+def _dereplicate_stage(paths: Sequence, params: PipelineParams, progress: ProgressFn, pool) -> Dict[str, np.ndarray]:
+	reads = parse_reads(paths, progress, pool)
+	kept = quality_filter(reads, params)
+	progress("qc", 1.0, len(reads))
+	seqs, counts, read_to_unique = dereplicate(kept)
+	progress("dereplicate", 1.0, len(kept))
+	read_ids = artifacts.pack_strings([r.id for r in kept])
+	unique = artifacts.pack_strings(seqs)
+	return {
+		"read_id_data": read_ids["data"],
+		"read_id_offsets": read_ids["offsets"],
+		"seq_data": unique["data"],
+		"seq_offsets": unique["offsets"],
+		"counts": counts,
+		"read_to_unique": read_to_unique,
+		"input_reads": np.array(len(reads)),
+	}
+
+
+def run_pipeline(paths: Sequence, params: PipelineParams, progress: ProgressFn = _noop, store: Optional[artifacts.ArtifactStore] = None) -> PipelineResult:
+	keys = stage_keys(store.input_key(paths), params) if store else {}
+	memo: Dict[str, Dict[str, np.ndarray]] = {}
+
+	# Stages run lazily: a cached downstream output never forces its inputs to load
+	def cached(stage: str, compute) -> Dict[str, np.ndarray]:
+		if stage not in memo:
+			arrays = store.load(stage, keys[stage]) if store else None
+			if arrays is None:
+				arrays = compute()
+				if store:
+					store.save(stage, keys[stage], arrays)
+			else:
+				progress(stage, 1.0)
+			memo[stage] = arrays
+		return memo[stage]
+
+	with process_pool(params.workers) as pool:
+		def derep():
+			return cached("dereplicate", lambda: _dereplicate_stage(paths, params, progress, pool))
+
+		def embeddings():
+			seqs = lambda: artifacts.unpack_strings(derep()["seq_data"], derep()["seq_offsets"])
+			return cached("embed", lambda: {"embeddings": embed(seqs(), params, progress, pool)})["embeddings"]
+
+		def labels():
+			return cached("cluster", lambda: {"labels": cluster(embeddings(), derep()["counts"], params, progress)})["labels"]
+
+		scores = cached("score", lambda: {"scores": score(embeddings(), labels(), params, progress, pool)})["scores"]
+		medoids = cached("represent", lambda: {"medoids": representatives(embeddings(), labels(), derep()["counts"])})["medoids"]
+		labels_, counts, read_to_unique = labels(), derep()["counts"], derep()["read_to_unique"]
+
+	# Only the medoid sequences are unpacked for the cluster table
+	clusters = cluster_table(labels_, counts, scores, params, artifacts.unpack_strings(derep()["seq_data"], derep()["seq_offsets"], medoids))
+	per_read = pd.DataFrame({
+		"Read_ID": artifacts.unpack_strings(derep()["read_id_data"], derep()["read_id_offsets"]),
+		"Cluster_ID": cluster_ids(len(clusters))[labels_[read_to_unique]],
+		"Novelty_Score": scores[read_to_unique].round(4),
+	})
+	stats = {
+		"input_reads": int(derep()["input_reads"]),
+		"passed_qc": len(read_to_unique),
+		"unique_sequences": len(counts),
+		"clusters": len(clusters),
+		"candidate_novel": int((clusters["Candidate_Novel"] == "Yes").sum()),
+	}
+	return PipelineResult(clusters, per_read, stats)
+
+
+def write_outputs(result: PipelineResult, out_dir, params: Optional[PipelineParams] = None, sample: Optional[dict] = None) -> Path:
+	out_dir = Path(out_dir)
+	out_dir.mkdir(parents=True, exist_ok=True)
+	result.clusters.to_csv(out_dir / "clusters.csv", index=False)
+	result.scores.to_csv(out_dir / "scores.csv", index=False)
+	if params is not None:
+		(out_dir / "params.json").write_text(json.dumps(params.to_dict(), indent=2))
+	if sample:
+		# Stored once per run and broadcast onto rows when loaded
+		envfeatures.save_sample(out_dir, sample)
+	# summary.json is written last and marks the run directory as complete
+	(out_dir / "summary.json").write_text(json.dumps(result.stats, indent=2))
+	return out_dir
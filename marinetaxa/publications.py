@@ -0,0 +1,191 @@
+"""In-process BM25 search over publication records for the Research Publications expander.
+
+Records come from a JSON file (``publications.json`` in the data directory,
+else the bundled seed list). Title, authors, abstract and keywords are
+tokenised into one inverted index with per-field term weights (BM25F-style).
+Postings are appended as records arrive, so ``refresh`` only indexes records
+it has not seen; per-term numpy arrays are rebuilt lazily for terms that
+changed. Query terms also match every indexed term they prefix ("autoenc" ->
+"autoencoder"), and facet filters are masks over document ids. One index is
+shared by all app sessions, so its public methods run under a lock.
+"""
+import bisect
+import functools
+import itertools
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import data_dir
+
+FIELD_WEIGHTS = {"title": 3.0, "keywords": 2.0, "authors": 2.0, "abstract": 1.0}
+FACETS = ["topic", "year", "journal", "method"]
+BUNDLED_PUBLICATIONS = Path(__file__).resolve().parent / "data" / "publications.json"
+ALL = "All"
+MAX_PREFIX_EXPANSION = 32
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def publications_path() -> Path:
+	local = data_dir() / "publications.json"
+	return local if local.exists() else BUNDLED_PUBLICATIONS
+
+
+def tokenize(text: str) -> List[str]:
+	return _TOKEN.findall(text.lower())
+
+
+def _field_text(value) -> str:
+	return " ".join(value) if isinstance(value, list) else str(value or "")
+
+
+def _locked(method):
+	@functools.wraps(method)
+	def wrapper(self, *args, **kwargs):
+		with self._lock:
+			return method(self, *args, **kwargs)
+	return wrapper
+
+
+class PublicationIndex:
+	def __init__(self, path=None):
+		self.path = Path(path) if path else None
+		# Reentrant: refresh adds, search expands
+		self._lock = threading.RLock()
+		self.records: List[Dict] = []
+		self._ids = set()
+		self._postings: Dict[str, Tuple[List[int], List[float]]] = {}
+		self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+		self._vocabulary: Optional[List[str]] = []
+		self._lengths: List[float] = []
+		self._facets: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+		self._source_stamp = None
+		# Derived state (sorted vocabulary, length norms, year order) is rebuilt on the next query after an add
+		self._norm: Optional[np.ndarray] = None
+		self._by_year: Optional[np.ndarray] = None
+
+	def __len__(self) -> int:
+		return len(self.records)
+
+	@_locked
+	def add(self, records: Sequence[Dict]) -> int:
+		"""Index records whose id is new; returns how many were added."""
+		added = 0
+		for record in records:
+			key = record.get("id") or record.get("title")
+			if key in self._ids:
+				continue
+			self._ids.add(key)
+			doc = len(self.records)
+			self.records.append(record)
+			weights: Dict[str, float] = {}
+			for field, weight in FIELD_WEIGHTS.items():
+				for token in tokenize(_field_text(record.get(field))):
+					weights[token] = weights.get(token, 0.0) + weight
+			for term, tf in weights.items():
+				postings = self._postings.get(term)
+				if postings is None:
+					postings = self._postings[term] = ([], [])
+					self._vocabulary = None
+				postings[0].append(doc)
+				postings[1].append(tf)
+				self._arrays.pop(term, None)
+			self._lengths.append(sum(weights.values()))
+			for facet in FACETS:
+				value = record.get(facet)
+				for item in value if isinstance(value, list) else [value]:
+					if item not in (None, ""):
+						self._facets[facet].setdefault(str(item), []).append(doc)
+			added += 1
+		if added:
+			self._norm = self._by_year = None
+		return added
+
+	@_locked
+	def refresh(self) -> int:
+		"""Pick up records appended to the source file since the last call."""
+		path = self.path or publications_path()
+		stat = path.stat()
+		stamp = (str(path), stat.st_size, stat.st_mtime_ns)
+		if stamp == self._source_stamp:
+			return 0
+		self._source_stamp = stamp
+		return self.add(json.loads(path.read_text()))
+
+	@_locked
+	def facet_values(self, facet: str) -> List[str]:
+		values = sorted(self._facets[facet])
+		return values[::-1] if facet == "year" else values
+
+	def _term_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+		if term not in self._arrays:
+			docs, tfs = self._postings[term]
+			self._arrays[term] = (np.array(docs, dtype=np.int64), np.array(tfs, dtype=np.float32))
+		return self._arrays[term]
+
+	@_locked
+	def expand(self, token: str) -> List[str]:
+		"""Indexed terms equal to or starting with `token`, shortest first."""
+		if self._vocabulary is None:
+			self._vocabulary = sorted(self._postings)
+		start = bisect.bisect_left(self._vocabulary, token)
+		matches = []
+		for term in itertools.islice(self._vocabulary, start, None):
+			if not term.startswith(token):
+				break
+			matches.append(term)
+		return sorted(matches, key=len)[:MAX_PREFIX_EXPANSION]
+
+	def _mask(self, filters: Dict[str, str]) -> Optional[np.ndarray]:
+		mask = None
+		for facet, value in filters.items():
+			if value in (None, ALL):
+				continue
+			facet_mask = np.zeros(len(self.records), dtype=bool)
+			facet_mask[self._facets[facet].get(value, [])] = True
+			mask = facet_mask if mask is None else mask & facet_mask
+		return mask
+
+	@_locked
+	def search(self, query: str = "", filters: Optional[Dict[str, str]] = None, limit: int = 20, offset: int = 0) -> Tuple[int, List[Tuple[Dict, float]]]:
+		"""(total matches, [(record, score)]) ranked by BM25, or by year without a query."""
+		n = len(self.records)
+		mask = self._mask(filters or {})
+		tokens = tokenize(query)
+		if not tokens:
+			if self._by_year is None:
+				years = np.array([str(r.get("year", "")) for r in self.records])
+				self._by_year = np.argsort(years, kind="stable")[::-1] if n else np.empty(0, dtype=np.intp)
+			hits = self._by_year if mask is None else self._by_year[mask[self._by_year]]
+			return len(hits), [(self.records[doc], 0.0) for doc in hits[offset:offset + limit]]
+
+		if self._norm is None:
+			lengths = np.asarray(self._lengths, dtype=np.float32)
+			self._norm = K1 * (1 - B + B * lengths / max(lengths.mean(), 1e-9))
+		norm = self._norm
+		scores = np.zeros(n, dtype=np.float32)
+		matched = np.zeros(n, dtype=np.int32)
+		for token in dict.fromkeys(tokens):
+			covered = np.zeros(n, dtype=bool)
+			for term in self.expand(token):
+				docs, tfs = self._term_arrays(term)
+				idf = np.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+				# Prefix expansions rank below the exact term
+				weight = idf if term == token else idf * 0.5
+				np.add.at(scores, docs, weight * tfs * (K1 + 1) / (tfs + norm[docs]))
+				covered[docs] = True
+			matched += covered
+		# Every query token (or a term it prefixes) must occur in a result
+		hit = matched == len(dict.fromkeys(tokens))
+		if mask is not None:
+			hit &= mask
+		docs = np.flatnonzero(hit)
+		ranked = docs[np.argsort(-scores[docs], kind="stable")]
+		return len(ranked), [(self.records[doc], float(scores[doc])) for doc in ranked[offset:offset + limit]]
@@ -0,0 +1,74 @@
+"""Discovery and loading of finished pipeline runs for the Streamlit viewer.
+
+A run directory holds ``clusters.csv``, ``scores.csv``, ``params.json``, an
+optional ``sample.json`` of environmental metadata and a ``summary.json``
+written last. Runs come from the headless CLI (``runs/``) and
+from the web job queue (``jobs/``), both under the data directory.
+"""
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import envfeatures, sites
+from .config import data_dir
+
+
+def runs_dir() -> Path:
+	path = data_dir() / "runs"
+	path.mkdir(parents=True, exist_ok=True)
+	return path
+
+
+def list_runs(limit: int = 50) -> List[Path]:
+	"""Completed run directories, newest first."""
+	found = [p.parent for root in (runs_dir(), data_dir() / "jobs") if root.is_dir() for p in root.glob("*/summary.json")]
+	return sorted(found, key=lambda p: (p / "summary.json").stat().st_mtime, reverse=True)[:limit]
+
+
+def load_summary(run: Path) -> Dict:
+	return json.loads((Path(run) / "summary.json").read_text())
+
+
+def load_params(run: Path) -> Optional[Dict]:
+	path = Path(run) / "params.json"
+	return json.loads(path.read_text()) if path.exists() else None
+
+
+def load_clusters(run: Path, with_env: bool = False) -> pd.DataFrame:
+	clusters = pd.read_csv(Path(run) / "clusters.csv")
+	sample = envfeatures.load_sample(run) if with_env else None
+	return sample.join(clusters) if sample is not None else clusters
+
+
+def sample_profiles(runs: Optional[List[Path]] = None) -> pd.DataFrame:
+	"""One row per run that carries sample metadata: its environment plus cluster and candidate counts."""
+	records, stats = [], []
+	for run in list_runs() if runs is None else runs:
+		path = Path(run) / envfeatures.SAMPLE_FILE
+		if path.exists():
+			records.append(json.loads(path.read_text()))
+			summary = load_summary(run)
+			stats.append({"run": Path(run).name, "clusters": summary["clusters"], "candidate_novel": summary["candidate_novel"]})
+	if not records:
+		return pd.DataFrame()
+	table = envfeatures.SampleTable.from_records(records)
+	return table.join(pd.DataFrame(stats), np.arange(len(records)))
+
+
+def sample_sites(runs: Optional[List[Path]] = None) -> pd.DataFrame:
+	"""Runs with a sample depth, temperature and pressure as "Sample Run" rows in the site table's columns."""
+	profiles = sample_profiles(runs)
+	if profiles.empty:
+		return pd.DataFrame(columns=sites.SITE_COLUMNS)
+	profiles = profiles.dropna(subset=["depth", "temperature", "pressure"])
+	return pd.DataFrame({
+		"depth": profiles["depth"],
+		"novel_taxa": profiles["candidate_novel"],
+		"feature_type": "Sample Run",
+		"location": profiles["seamount_name"].astype(str).where(profiles["seamount_name"].notna(), profiles["run"]),
+		"temperature": profiles["temperature"],
+		"pressure": profiles["pressure"],
+	}).reindex(columns=sites.SITE_COLUMNS)
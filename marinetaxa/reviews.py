@@ -0,0 +1,518 @@
+"""Persistent expert review queue.
+
+Clusters waiting for review and the submitted reviews live in a SQLite
+database in WAL mode, so readers never wait on a writer and a review is
+durable as soon as it is submitted. The queue page is one indexed query:
+filter by priority and assignment, sort, then LIMIT/OFFSET. Only the rows
+shown are ever loaded, however many clusters are pending. Days pending
+are derived from the time each cluster was queued, so sorting on them is
+an index scan on ``queued``.
+
+Reviews use optimistic concurrency. Each cluster row carries a version, and a
+review names the version its reviewer opened. It is accepted only if the
+cluster is still at that version, which then moves one step, so of two
+reviewers working from the same version the second gets a ReviewConflict
+instead of silently overwriting the first. Every accepted review is kept as
+that cluster's history. A ReviewWriter commits the submissions of all
+sessions in batches, one short write transaction per batch.
+
+The validation metrics (Cohen's kappa between experts, novelty recall and
+false discovery rate against the pipeline's candidate flag, which is stored on
+each cluster as the run that queued it decided) come from running counters in
+``review_stats``. They are updated in the transaction that accepts each
+review, so reading them costs a handful of rows however many reviews there
+are. The counters are kept for all reviews together, per expert and per depth
+zone. Recall needs novel taxa the pipeline missed, so besides its candidates
+a run queues a fixed fraction (CONTROL_FRACTION) of the clusters it did not
+flag; the novel ones found among those are scaled up by that fraction.
+"""
+import queue
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import calibration, pipeline
+from .config import data_dir
+
+PENDING = "pending"
+REVIEWED = "reviewed"
+PRIORITIES = ["High", "Medium", "Low"]
+DECISIONS = ["Novel Taxa (Confirmed)", "Known Taxa (Existing)", "Needs More Data", "Contamination/Artifact"]
+# Decisions that leave the cluster in the queue
+REOPENING = {"Needs More Data"}
+# Decisions that settle whether a cluster is novel
+VERDICTS = {DECISIONS[0]: "novel", DECISIONS[1]: "known", DECISIONS[3]: "known"}
+# Candidate flag for queued clusters that do not carry their run's own
+NOVELTY_THRESHOLD = pipeline.PipelineParams.novelty_threshold
+# Share of a run's unflagged clusters queued as controls for the recall estimate
+CONTROL_FRACTION = 0.05
+BUNDLED_CLUSTERS = Path(__file__).resolve().parent / "data" / "review_clusters.csv"
+DAY = 86400.0
+
+# Sort label -> ORDER BY; each has a matching index below
+SORTS = {
+	"Days Pending": "queued ASC, cluster_id",
+	"Novelty Score": "novelty DESC, cluster_id",
+	"Priority": "priority_rank ASC, queued ASC, cluster_id",
+	"Sequences": "sequences DESC, cluster_id",
+}
+
+# Every write stamps its row with the next change number; writes are serialised, so the numbers only grow
+_NEXT_CHANGE = "(SELECT COALESCE(MAX(changed), 0) + 1 FROM clusters)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clusters (
+	cluster_id TEXT PRIMARY KEY,
+	sequences INTEGER NOT NULL,
+	novelty REAL NOT NULL,
+	depth_range TEXT,
+	location TEXT,
+	priority_rank INTEGER NOT NULL,
+	assigned TEXT,
+	status TEXT NOT NULL,
+	queued REAL NOT NULL,
+	version INTEGER NOT NULL DEFAULT 0,
+	representative TEXT,
+	changed INTEGER,
+	flagged INTEGER
+);
+CREATE INDEX IF NOT EXISTS clusters_queued ON clusters (status, queued);
+CREATE INDEX IF NOT EXISTS clusters_novelty ON clusters (status, novelty DESC);
+CREATE INDEX IF NOT EXISTS clusters_priority ON clusters (status, priority_rank, queued);
+CREATE INDEX IF NOT EXISTS clusters_sequences ON clusters (status, sequences DESC);
+CREATE INDEX IF NOT EXISTS clusters_assigned ON clusters (status, assigned, queued);
+CREATE INDEX IF NOT EXISTS clusters_filter ON clusters (status, priority_rank, assigned);
+CREATE TABLE IF NOT EXISTS reviews (
+	id INTEGER PRIMARY KEY,
+	cluster_id TEXT NOT NULL REFERENCES clusters (cluster_id),
+	reviewer TEXT NOT NULL,
+	decision TEXT NOT NULL,
+	confidence INTEGER NOT NULL,
+	taxonomy TEXT,
+	comments TEXT,
+	created REAL NOT NULL,
+	version INTEGER
+);
+CREATE INDEX IF NOT EXISTS reviews_cluster ON reviews (cluster_id, created);
+CREATE INDEX IF NOT EXISTS reviews_decision ON reviews (decision);
+-- Running counters behind the validation metrics, see _tally
+CREATE TABLE IF NOT EXISTS review_stats (
+	scope TEXT NOT NULL,
+	kind TEXT NOT NULL,
+	a TEXT NOT NULL,
+	b TEXT NOT NULL,
+	count INTEGER NOT NULL,
+	PRIMARY KEY (scope, kind, a, b)
+) WITHOUT ROWID;
+"""
+
+_ADD_COUNTS = "INSERT INTO review_stats (scope, kind, a, b, count) VALUES (?, ?, ?, ?, ?) ON CONFLICT (scope, kind, a, b) DO UPDATE SET count = count + excluded.count"
+
+
+class ReviewStore:
+	def __init__(self, path=None, seed: bool = True):
+		self.path = Path(path) if path else data_dir() / "reviews.db"
+		with closing(self._connect()) as conn:
+			conn.executescript(_SCHEMA)
+			columns = {row["name"] for row in conn.execute("PRAGMA table_info(clusters)")}
+			if "version" not in columns:
+				conn.execute("ALTER TABLE clusters ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+			if "representative" not in columns:
+				conn.execute("ALTER TABLE clusters ADD COLUMN representative TEXT")
+			if "changed" not in columns:
+				conn.execute("ALTER TABLE clusters ADD COLUMN changed INTEGER")
+			if "flagged" not in columns:
+				conn.execute("ALTER TABLE clusters ADD COLUMN flagged INTEGER")
+				conn.execute("UPDATE clusters SET flagged = novelty > ?", (NOVELTY_THRESHOLD,))
+			conn.execute("CREATE INDEX IF NOT EXISTS clusters_changed ON clusters (changed)")
+			# Rows from before change numbers; the scheduler and assign() key on them
+			conn.execute("UPDATE clusters SET changed = rowid WHERE changed IS NULL")
+			if "version" not in {row["name"] for row in conn.execute("PRAGMA table_info(reviews)")}:
+				conn.execute("ALTER TABLE reviews ADD COLUMN version INTEGER")
+			conn.execute("CREATE INDEX IF NOT EXISTS reviews_history ON reviews (cluster_id, version)")
+			empty = conn.execute("SELECT 1 FROM clusters LIMIT 1").fetchone() is None
+			conn.execute("BEGIN IMMEDIATE")
+			if conn.execute("SELECT 1 FROM review_stats LIMIT 1").fetchone() is None:
+				# Reviews from before the counters existed
+				for row in conn.execute("SELECT id, cluster_id, reviewer, decision FROM reviews ORDER BY id").fetchall():
+					_tally(conn, row["cluster_id"], row["reviewer"], row["decision"], before=row["id"])
+			conn.execute("COMMIT")
+		if seed and empty and BUNDLED_CLUSTERS.exists():
+			self.enqueue(_bundled_clusters())
+
+	def _connect(self) -> sqlite3.Connection:
+		conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+		conn.row_factory = sqlite3.Row
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("PRAGMA synchronous=NORMAL")
+		return conn
+
+	def _query(self, sql: str, args=()) -> List[Dict]:
+		with closing(self._connect()) as conn:
+			return [dict(row) for row in conn.execute(sql, args)]
+
+	def enqueue(self, clusters: Iterable[Dict]) -> int:
+		"""Add clusters to the queue (keys as in the bundled CSV); known ids are skipped.
+
+		A cluster's ``candidate`` key is the pipeline's novelty call for it;
+		without one, the novelty score is compared with NOVELTY_THRESHOLD.
+		"""
+		now = time.time()
+		rows = [(
+			c["cluster_id"],
+			int(c["sequences"]),
+			float(c["novelty"]),
+			c.get("depth_range"),
+			c.get("location"),
+			PRIORITIES.index(c.get("priority") or "Medium"),
+			c.get("assigned") or None,
+			PENDING,
+			float(c.get("queued") or now),
+			c.get("representative") or None,
+			int(bool(c["candidate"]) if c.get("candidate") is not None else float(c["novelty"]) > NOVELTY_THRESHOLD),
+		) for c in clusters]
+		with closing(self._connect()) as conn:
+			before = conn.total_changes
+			conn.execute("BEGIN IMMEDIATE")
+			conn.executemany(f"INSERT OR IGNORE INTO clusters (cluster_id, sequences, novelty, depth_range, location, priority_rank, assigned, status, queued, representative, flagged, changed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {_NEXT_CHANGE})", rows)
+			conn.execute("COMMIT")
+			return conn.total_changes - before
+
+	def _where(self, priority: str, assignment: str) -> Tuple[str, list]:
+		clauses, args = ["status = ?"], [PENDING]
+		if priority in PRIORITIES:
+			clauses.append("priority_rank = ?")
+			args.append(PRIORITIES.index(priority))
+		if assignment == "Assigned":
+			clauses.append("assigned IS NOT NULL")
+		elif assignment == "Unassigned":
+			clauses.append("assigned IS NULL")
+		return " AND ".join(clauses), args
+
+	def pending(self, priority: str = "All", assignment: str = "All", sort: str = "Days Pending", limit: int = 25, offset: int = 0) -> Tuple[int, pd.DataFrame]:
+		"""(matching count, one page of the queue) in the review table's display columns."""
+		where, args = self._where(priority, assignment)
+		with closing(self._connect()) as conn:
+			total = conn.execute(f"SELECT COUNT(*) FROM clusters WHERE {where}", args).fetchone()[0]
+			rows = [dict(row) for row in conn.execute(
+				f"SELECT * FROM clusters WHERE {where} ORDER BY {SORTS.get(sort, SORTS['Days Pending'])} LIMIT ? OFFSET ?",
+				[*args, limit, offset],
+			)]
+		return total, _display(rows)
+
+	def cluster(self, cluster_id: str) -> Optional[Dict]:
+		"""Display fields of one cluster plus its current ``version`` and ``representative`` sequence."""
+		rows = self._query("SELECT * FROM clusters WHERE cluster_id = ?", (cluster_id,))
+		if not rows:
+			return None
+		return {**_row(rows[0], time.time()), "version": rows[0]["version"], "representative": rows[0]["representative"]}
+
+	def submit(self, review: "Review") -> int:
+		"""Apply one review; returns the cluster's new version or raises ReviewConflict."""
+		result = self.submit_many([review])[0]
+		if isinstance(result, ReviewConflict):
+			raise result
+		return result
+
+	def submit_many(self, batch: List["Review"]) -> list:
+		"""Apply reviews in one transaction, in order; each entry becomes its new version or a ReviewConflict."""
+		results = []
+		now = time.time()
+		with closing(self._connect()) as conn:
+			conn.execute("BEGIN IMMEDIATE")
+			try:
+				for review in batch:
+					status = PENDING if review.decision in REOPENING else REVIEWED
+					moved = conn.execute(
+						f"UPDATE clusters SET version = version + 1, status = ?, changed = {_NEXT_CHANGE} WHERE cluster_id = ? AND version = ?",
+						(status, review.cluster_id, review.version),
+					).rowcount
+					if not moved:
+						current = conn.execute("SELECT version FROM clusters WHERE cluster_id = ?", (review.cluster_id,)).fetchone()
+						results.append(ReviewConflict(review.cluster_id, current["version"] if current else None))
+						continue
+					_tally(conn, review.cluster_id, review.reviewer, review.decision)
+					conn.execute(
+						"INSERT INTO reviews (cluster_id, reviewer, decision, confidence, taxonomy, comments, created, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+						(review.cluster_id, review.reviewer, review.decision, int(review.confidence), review.taxonomy or None, review.comments or None, now, review.version + 1),
+					)
+					results.append(review.version + 1)
+				conn.execute("COMMIT")
+			except BaseException:
+				conn.execute("ROLLBACK")
+				raise
+		return results
+
+	def assign(self, cluster_id: str, expert: Optional[str], changed: int) -> int:
+		"""Set (or clear) a pending cluster's expert if it is unchanged since change number `changed`; returns the new one.
+
+		The review version is left alone, so a reviewer who has the cluster
+		open can still submit against the version they opened.
+		"""
+		with closing(self._connect()) as conn:
+			conn.execute("BEGIN IMMEDIATE")
+			moved = conn.execute(
+				f"UPDATE clusters SET assigned = ?, changed = {_NEXT_CHANGE} WHERE cluster_id = ? AND changed = ? AND status = ?",
+				(expert or None, cluster_id, changed, PENDING),
+			).rowcount
+			current = conn.execute("SELECT version, changed FROM clusters WHERE cluster_id = ?", (cluster_id,)).fetchone()
+			conn.execute("COMMIT")
+		if moved:
+			return current["changed"]
+		raise ReviewConflict(cluster_id, current["version"] if current else None)
+
+	def changes(self, since: Optional[int] = None) -> Tuple[List[Dict], int]:
+		"""Clusters written after change number `since` (all pending ones when None) and the latest change number."""
+		columns = "cluster_id, sequences, novelty, location, assigned, status, queued, version, changed"
+		with closing(self._connect()) as conn:
+			# One read transaction: the rows and the mark come from the same snapshot
+			conn.execute("BEGIN")
+			mark = conn.execute("SELECT COALESCE(MAX(changed), 0) FROM clusters").fetchone()[0]
+			if since is None:
+				rows = conn.execute(f"SELECT {columns} FROM clusters WHERE status = ?", (PENDING,)).fetchall()
+			else:
+				rows = conn.execute(f"SELECT {columns} FROM clusters WHERE changed > ?", (since,)).fetchall()
+			conn.execute("COMMIT")
+		return [dict(row) for row in rows], mark
+
+	def history(self, cluster_id: str) -> List[Dict]:
+		"""Accepted reviews of a cluster, newest first."""
+		return self._query("SELECT * FROM reviews WHERE cluster_id = ? ORDER BY version DESC, created DESC", (cluster_id,))
+
+	def counts(self) -> Dict[str, int]:
+		"""Pending clusters and confirmed novel taxa, for the dashboard tiles.
+
+		A cluster counts as novel while its latest decisive review confirms it,
+		which is what the "all" verdict counters hold.
+		"""
+		with closing(self._connect()) as conn:
+			pending = conn.execute("SELECT COUNT(*) FROM clusters WHERE status = ?", (PENDING,)).fetchone()[0]
+			novel = conn.execute("SELECT COALESCE(SUM(count), 0) FROM review_stats WHERE scope = 'all' AND kind = 'verdict' AND b = 'novel'").fetchone()[0]
+		return {"pending": pending, "novel": novel}
+
+	def validation(self, scope: str = "all") -> Dict:
+		"""Review counts and validation metrics for "all", "expert:<name>" or "depth:<zone>"; see _metrics."""
+		return _metrics(self._query("SELECT kind, a, b, count FROM review_stats WHERE scope = ?", (scope,)))
+
+	def validation_breakdown(self, by: str) -> pd.DataFrame:
+		"""Validation metrics per expert (`by` "expert") or per depth zone ("depth")."""
+		groups: Dict[str, list] = {}
+		for row in self._query("SELECT scope, kind, a, b, count FROM review_stats WHERE scope > ? AND scope < ?", (f"{by}:", f"{by};")):
+			groups.setdefault(row["scope"].split(":", 1)[1], []).append(row)
+		table = [{
+			by.title(): name,
+			"Reviews": m["reviews"],
+			"Kappa": m["kappa"],
+			"Recall": m["recall"],
+			"FDR": m["fdr"],
+		} for name, m in ((name, _metrics(rows)) for name, rows in sorted(groups.items()))]
+		return pd.DataFrame(table, columns=[by.title(), "Reviews", "Kappa", "Recall", "FDR"])
+
+
+@dataclass
+class Review:
+	cluster_id: str
+	version: int  # cluster version the reviewer was looking at
+	reviewer: str
+	decision: str
+	confidence: int
+	taxonomy: str = ""
+	comments: str = ""
+
+
+class ReviewConflict(Exception):
+	def __init__(self, cluster_id: str, version: Optional[int]):
+		super().__init__(f"{cluster_id} was updated by another reviewer (now version {version})" if version is not None else f"{cluster_id} is not in the review queue")
+		self.cluster_id = cluster_id
+		self.version = version
+
+
+class ReviewWriter:
+	"""Background writer that group-commits submissions from all sessions.
+
+	Each caller waits only for the batch holding its review; one write
+	transaction covers every review that arrived while the previous batch was
+	being committed.
+	"""
+
+	def __init__(self, store: ReviewStore, max_batch: int = 256):
+		self.store = store
+		self.max_batch = max_batch
+		self._queue: "queue.Queue[Tuple[Review, Future]]" = queue.Queue()
+		self._thread = threading.Thread(target=self._loop, name="marinetaxa-reviews", daemon=True)
+
+	def start(self) -> "ReviewWriter":
+		self._thread.start()
+		return self
+
+	def submit(self, review: Review, timeout: Optional[float] = 30) -> int:
+		"""Queue a review and wait for its batch; returns the new version or raises ReviewConflict."""
+		future: Future = Future()
+		self._queue.put((review, future))
+		return future.result(timeout)
+
+	def _loop(self) -> None:
+		while True:
+			batch = [self._queue.get()]
+			while len(batch) < self.max_batch:
+				try:
+					batch.append(self._queue.get_nowait())
+				except queue.Empty:
+					break
+			try:
+				results = self.store.submit_many([review for review, _ in batch])
+			except Exception as exc:
+				for _, future in batch:
+					future.set_exception(exc)
+				continue
+			for (_, future), result in zip(batch, results):
+				if isinstance(result, ReviewConflict):
+					future.set_exception(result)
+				else:
+					future.set_result(result)
+
+
+def depth_zone(depth_range: Optional[str]) -> Optional[str]:
+	"""Calibration depth zone of a "4000-6000m" style range, by its midpoint."""
+	bounds = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", depth_range or "")[:2]]
+	return calibration.zone_name(sum(bounds) / len(bounds)) if bounds else None
+
+
+def _tally(conn: sqlite3.Connection, cluster_id: str, reviewer: str, decision: str, before: Optional[int] = None) -> None:
+	"""Count one review into review_stats, inside the caller's write transaction.
+
+	Counts are kept per scope ("all", "expert:<name>", "depth:<zone>"):
+	``decision`` counts reviews; ``pair`` counts (earlier, new) decisions of
+	two experts on the same cluster, the new review against the latest of
+	every other expert; ``verdict`` is (flagged by the pipeline, novel or
+	known), the flag being the one stored when the cluster was queued. A
+	cluster's verdict is its latest decisive review, so a newer one replaces
+	it in the all and depth counts; the expert counts keep each expert's own
+	calls. `before` limits the earlier reviews to ids below it, for replaying
+	old reviews.
+	"""
+	before = (1 << 62) if before is None else before
+	cluster = conn.execute("SELECT flagged, depth_range FROM clusters WHERE cluster_id = ?", (cluster_id,)).fetchone()
+	zone = depth_zone(cluster["depth_range"]) if cluster else None
+	scopes = ["all"] + ([f"depth:{zone}"] if zone else [])
+	mine = f"expert:{reviewer}"
+	counts: Counter = Counter()
+	for scope in [*scopes, mine]:
+		counts[scope, "decision", decision, ""] += 1
+	# SQLite takes the bare decision from the row with the MAX(version)
+	others = conn.execute(
+		"SELECT reviewer, decision, MAX(version) FROM reviews WHERE cluster_id = ? AND reviewer != ? AND id < ? GROUP BY reviewer",
+		(cluster_id, reviewer, before),
+	).fetchall()
+	for other, earlier, _ in others:
+		for scope in [*scopes, mine, f"expert:{other}"]:
+			counts[scope, "pair", earlier, decision] += 1
+	verdict = VERDICTS.get(decision)
+	if verdict and cluster:
+		flagged = "1" if cluster["flagged"] else "0"
+		counts[mine, "verdict", flagged, verdict] += 1
+		previous = conn.execute(
+			f"SELECT decision FROM reviews WHERE cluster_id = ? AND id < ? AND decision IN ({', '.join('?' * len(VERDICTS))}) ORDER BY version DESC, id DESC LIMIT 1",
+			(cluster_id, before, *VERDICTS),
+		).fetchone()
+		for scope in scopes:
+			if previous:
+				counts[scope, "verdict", flagged, VERDICTS[previous[0]]] -= 1
+			counts[scope, "verdict", flagged, verdict] += 1
+	conn.executemany(_ADD_COUNTS, [(*key, n) for key, n in counts.items() if n])
+
+
+def _metrics(rows: List[Dict]) -> Dict:
+	"""Metrics from one scope's counters; a rate is None until it has a denominator."""
+	decisions = dict.fromkeys(DECISIONS, 0)
+	pairs = np.zeros((len(DECISIONS), len(DECISIONS)))
+	confusion: Counter = Counter()
+	for row in rows:
+		if row["kind"] == "decision":
+			decisions[row["a"]] = decisions.get(row["a"], 0) + row["count"]
+		elif row["kind"] == "pair" and row["a"] in DECISIONS and row["b"] in DECISIONS:
+			pairs[DECISIONS.index(row["a"]), DECISIONS.index(row["b"])] += row["count"]
+		elif row["kind"] == "verdict":
+			confusion[row["a"] == "1", row["b"] == "novel"] += row["count"]
+	# Cohen's kappa over unordered expert pairs
+	pairs += pairs.T
+	kappa = agreement = None
+	if pairs.sum():
+		agreement = float(np.trace(pairs) / pairs.sum())
+		chance = float(np.square(pairs.sum(axis=1) / pairs.sum()).sum())
+		kappa = (agreement - chance) / (1 - chance) if chance < 1 else None
+	# Unflagged clusters are reviewed only as a CONTROL_FRACTION sample, so each novel one stands for 1/fraction misses
+	tp, fp, fn = confusion[True, True], confusion[True, False], confusion[False, True] / CONTROL_FRACTION
+	return {
+		"reviews": sum(decisions.values()),
+		"decisions": decisions,
+		"pairs": int(pairs.sum() // 2),
+		"agreement": agreement,
+		"kappa": kappa,
+		"validated": sum(confusion.values()),
+		"recall": tp / (tp + fn) if tp + fn else None,
+		"fdr": fp / (tp + fp) if tp + fp else None,
+	}
+
+
+DISPLAY_COLUMNS = ["Cluster_ID", "Sequences", "Novelty_Score", "Depth_Range", "Location", "Priority", "Days_Pending", "Assigned_Expert"]
+
+
+def _row(r: Dict, now: float) -> Dict:
+	return {
+		"Cluster_ID": r["cluster_id"],
+		"Sequences": r["sequences"],
+		"Novelty_Score": r["novelty"],
+		"Depth_Range": r["depth_range"],
+		"Location": r["location"],
+		"Priority": PRIORITIES[r["priority_rank"]],
+		"Days_Pending": int((now - r["queued"]) // DAY),
+		"Assigned_Expert": r["assigned"] or "Unassigned",
+	}
+
+
+def _display(rows: List[Dict]) -> pd.DataFrame:
+	now = time.time()
+	return pd.DataFrame([_row(r, now) for r in rows], columns=DISPLAY_COLUMNS)
+
+
+def is_control(cluster_id: str) -> bool:
+	"""Whether an unflagged cluster falls in the control sample; fixed per id, so a rerun picks the same ones."""
+	return zlib.crc32(cluster_id.encode()) % 10_000 < CONTROL_FRACTION * 10_000
+
+
+def run_candidates(run_id: str, clusters: pd.DataFrame, sample: Optional[Dict] = None) -> List[Dict]:
+	"""Queue entries for a finished run's candidate novel clusters and its control sample, ids prefixed with the run id."""
+	sample = sample or {}
+	flagged = clusters["Candidate_Novel"] == "Yes"
+	controls = ~flagged & clusters["Cluster_ID"].map(lambda cluster: is_control(f"{run_id}/{cluster}"))
+	depth = sample.get("depth")
+	return [{
+		"cluster_id": f"{run_id}/{row['Cluster_ID']}",
+		"sequences": row["Sequences"],
+		"novelty": row["Novelty_Score"],
+		"depth_range": f"{depth:.0f}m" if depth is not None else None,
+		"location": sample.get("seamount_name") or run_id,
+		"priority": "Medium" if row["Candidate_Novel"] == "Yes" else "Low",
+		"representative": row.get("Representative"),
+		"candidate": row["Candidate_Novel"] == "Yes",
+	} for row in clusters[flagged | controls].to_dict("records")]
+
+
+def _bundled_clusters() -> List[Dict]:
+	table = pd.read_csv(BUNDLED_CLUSTERS)
+	now = time.time()
+	table["queued"] = now - table.pop("days_pending") * DAY
+	table["assigned"] = table["assigned"].where(table["assigned"].notna(), None)
+	return table.to_dict("records")
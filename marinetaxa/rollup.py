@@ -0,0 +1,121 @@
+"""Per-rank abundance rollups that keep the taxonomic sunburst bounded.
+
+An abundance table (one row per assigned taxon, one column per rank plus a
+read count) is summed once into a tree of rank nodes with each node's
+children sorted by abundance. A sunburst is then cut from that tree. It
+starts at a focus node, goes a few levels deep and keeps the top N children
+of each node. The remaining children are folded into one "Other" wedge, so the
+figure has at most about N**depth wedges however many leaves the community
+has. Deeper levels are fetched by moving the focus down one node at a time.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .config import data_dir
+from .taxonomy import RANKS
+
+ABUNDANCE_FILE = "taxa_abundance.csv"
+
+
+def abundance_path() -> Path:
+	return data_dir() / ABUNDANCE_FILE
+
+
+def abundance_stamp(path=None) -> Optional[tuple]:
+	"""(size, mtime) of the abundance table, to key caches on; None without one."""
+	path = Path(path) if path else abundance_path()
+	if not path.exists():
+		return None
+	stat = path.stat()
+	return (stat.st_size, stat.st_mtime_ns)
+
+
+def load_abundance(path=None) -> Optional[pd.DataFrame]:
+	"""The local abundance table (rank columns plus ``reads``), if one has been exported."""
+	path = Path(path) if path else abundance_path()
+	return pd.read_csv(path, dtype={rank: str for rank in RANKS}) if path.exists() else None
+
+
+class TaxonRollup:
+	def __init__(self, frame: pd.DataFrame, ranks: Sequence[str] = RANKS, value: str = "reads"):
+		self.ranks = [rank for rank in ranks if rank in frame]
+		values = pd.to_numeric(frame[value], errors="coerce").fillna(0).to_numpy(np.float64)
+		labels, parents, levels, totals = [""], [np.array([-1])], [np.array([-1])], [np.array([values.sum()])]
+		row_node = np.zeros(len(frame), dtype=np.int64)
+		count = 1
+		for level, rank in enumerate(self.ranks):
+			names = frame[rank].fillna("").astype(str).str.strip().to_numpy(object)
+			# A blank rank ends the row's path; its reads stay with the last named ancestor
+			present = (names != "") & (row_node >= 0)
+			row_node[~present] = -1
+			codes, uniques = pd.factorize(names[present])
+			width = np.int64(len(uniques))
+			keys, inverse = np.unique(row_node[present] * width + codes, return_inverse=True)
+			parents.append(keys // width)
+			levels.append(np.full(len(keys), level))
+			totals.append(np.bincount(inverse.ravel(), weights=values[present], minlength=len(keys)))
+			labels.extend(uniques[keys % width])
+			row_node[present] = count + inverse.ravel()
+			count += len(keys)
+		self.labels = labels
+		self.parent = np.concatenate(parents)
+		self.level = np.concatenate(levels).astype(np.int8)
+		self.value = np.concatenate(totals)
+		# Children grouped by parent, largest first: one slice per node
+		order = np.lexsort((-self.value[1:], self.parent[1:])) + 1
+		self._children = order
+		self._start = np.searchsorted(self.parent[order], np.arange(count))
+		self._stop = np.searchsorted(self.parent[order], np.arange(count), side="right")
+
+	def __len__(self) -> int:
+		return len(self.parent)
+
+	def children(self, node: int = 0) -> np.ndarray:
+		return self._children[self._start[node]:self._stop[node]]
+
+	def path(self, node: int) -> List[str]:
+		chain = []
+		while node > 0:
+			chain.append(self.labels[node])
+			node = int(self.parent[node])
+		return chain[::-1]
+
+	def find(self, path: Sequence[str]) -> Optional[int]:
+		node = 0
+		for label in path:
+			match = [child for child in self.children(node) if self.labels[child] == label]
+			if not match:
+				return None
+			node = int(match[0])
+		return node
+
+	def sunburst(self, focus: int = 0, depth: int = 3, top_n: int = 10) -> Dict[str, list]:
+		"""ids/labels/parents/values for a ``branchvalues="total"`` sunburst rooted at `focus`."""
+		ids, labels, parents, values = [], [], [], []
+		root_id = "/".join(self.path(focus)) or "All taxa"
+		ids.append(root_id)
+		labels.append(self.labels[focus] or "All taxa")
+		parents.append("")
+		values.append(float(self.value[focus]))
+		frontier = [(focus, root_id)]
+		for _ in range(depth):
+			next_frontier = []
+			for node, node_id in frontier:
+				kids = self.children(node)
+				for child in kids[:top_n]:
+					child_id = f"{node_id}/{self.labels[child]}"
+					ids.append(child_id)
+					labels.append(self.labels[child])
+					parents.append(node_id)
+					values.append(float(self.value[child]))
+					next_frontier.append((int(child), child_id))
+				if len(kids) > top_n:
+					ids.append(f"{node_id}/~other")
+					labels.append(f"Other ({len(kids) - top_n:,} taxa)")
+					parents.append(node_id)
+					values.append(float(self.value[kids[top_n:]].sum()))
+			frontier = next_frontier
+		return {"ids": ids, "labels": labels, "parents": parents, "values": values}
@@ -0,0 +1,303 @@
+"""Partitioned Parquet store of SRA run-info tables behind the Database statistics.
+
+Run-info exports (the CSV/TSV "RunInfo" tables from the SRA run selector or
+``esearch | efetch -format runinfo``) are read in chunks and appended to a
+Hive-partitioned dataset under ``<data dir>/runinfo/runs/year=<release year>/``,
+each file sorted by BioProject so row-group statistics let the reader skip
+unrelated projects. Runs already in the store are dropped on import, and the
+counters behind the statistics tiles (totals, per project and per import month)
+are updated from the new rows only and kept in ``aggregates.json``, so the app
+never scans the table to draw them. An import stages its files under hidden
+names and publishes them only once the aggregates that count them are saved.
+Queries project columns and push filters down to partitions and row groups.
+pyarrow is needed to import and query; the aggregates are plain JSON.
+"""
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .config import data_dir
+
+# Optional dependency: pyarrow (Parquet reading and writing)
+try:
+	import pyarrow as pa
+	import pyarrow.dataset as ds
+	import pyarrow.parquet as pq
+	_HAS_ARROW = True
+except Exception:
+	_HAS_ARROW = False
+
+# Run-info header -> stored column; other columns of the export are not kept
+COLUMNS = {
+	"Run": "run",
+	"Experiment": "experiment",
+	"BioProject": "bioproject",
+	"BioSample": "biosample",
+	"ReleaseDate": "release_date",
+	"spots": "spots",
+	"bases": "bases",
+	"size_MB": "size_mb",
+	"avgLength": "avg_length",
+	"LibraryStrategy": "library_strategy",
+	"LibrarySource": "library_source",
+	"LibraryLayout": "library_layout",
+	"Platform": "platform",
+	"Model": "model",
+	"ScientificName": "scientific_name",
+	"CenterName": "center_name",
+}
+NUMERIC_COLUMNS = {"spots": "int64", "bases": "int64", "size_mb": "float64", "avg_length": "float32"}
+CHUNK_ROWS = 200_000
+ROW_GROUP_ROWS = 64_000
+
+
+def current_month() -> str:
+	return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def store_dir() -> Path:
+	return data_dir() / "runinfo"
+
+
+def _file_schema():
+	types = {"spots": pa.int64(), "bases": pa.int64(), "size_mb": pa.float64(), "avg_length": pa.float32(), "release_date": pa.timestamp("s")}
+	return pa.schema([(name, types.get(name, pa.string())) for name in COLUMNS.values()])
+
+
+def _schema():
+	# The year column lives in the directory names, not in the files
+	return _file_schema().append(pa.field("year", pa.int32()))
+
+
+def _require_arrow() -> None:
+	if not _HAS_ARROW:
+		raise RuntimeError("pyarrow is required for the run-info store (pip install pyarrow)")
+
+
+@dataclass
+class ImportReport:
+	rows_read: int = 0
+	rows_added: int = 0
+	duplicates: int = 0
+	files: List[str] = field(default_factory=list)
+
+
+def _empty_aggregates() -> Dict:
+	return {"totals": {"runs": 0, "experiments": 0, "projects": 0, "spots": 0, "bases": 0, "size_mb": 0.0}, "projects": {}, "months": {}, "updated": None}
+
+
+def _normalize(chunk: pd.DataFrame) -> pd.DataFrame:
+	chunk = chunk.rename(columns=COLUMNS)
+	for name in COLUMNS.values():
+		if name not in chunk:
+			chunk[name] = None
+	chunk = chunk[list(COLUMNS.values())]
+	chunk = chunk[chunk["run"].notna()]
+	for name, dtype in NUMERIC_COLUMNS.items():
+		values = pd.to_numeric(chunk[name], errors="coerce")
+		chunk[name] = values.fillna(0).astype(dtype) if dtype == "int64" else values.astype(dtype)
+	chunk["release_date"] = pd.to_datetime(chunk["release_date"], errors="coerce", utc=True).dt.tz_localize(None).astype("datetime64[s]")
+	chunk["year"] = chunk["release_date"].dt.year.fillna(0).astype("int32")
+	return chunk
+
+
+class RunInfoStore:
+	def __init__(self, root=None):
+		self.root = Path(root) if root else store_dir()
+		self.runs_path = self.root / "runs"
+		self.aggregates_path = self.root / "aggregates.json"
+
+	def aggregates(self) -> Dict:
+		if not self.aggregates_path.exists():
+			return _empty_aggregates()
+		return json.loads(self.aggregates_path.read_text())
+
+	def _save_aggregates(self, aggregates: Dict) -> None:
+		aggregates["updated"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+		self.root.mkdir(parents=True, exist_ok=True)
+		tmp = self.aggregates_path.with_suffix(".tmp")
+		tmp.write_text(json.dumps(aggregates))
+		os.replace(tmp, self.aggregates_path)
+
+	def _publish(self, aggregates: Dict) -> None:
+		# Finish an import whose aggregates were saved before all its staged files were renamed
+		pending = aggregates.pop("pending", None)
+		if not pending:
+			return
+		for tmp, target in pending:
+			if os.path.exists(tmp):
+				os.replace(tmp, target)
+		self._save_aggregates(aggregates)
+
+	def _dataset(self):
+		_require_arrow()
+		if self.aggregates_path.exists():
+			self._publish(self.aggregates())
+		return ds.dataset(self.runs_path, format="parquet", schema=_schema(), partitioning="hive") if self.runs_path.exists() else None
+
+	def _known(self, column: str) -> set:
+		dataset = self._dataset()
+		if dataset is None:
+			return set()
+		return set(dataset.to_table(columns=[column]).column(column).to_pylist())
+
+	def import_table(self, path, chunk_rows: int = CHUNK_ROWS) -> ImportReport:
+		"""Append the runs of one run-info CSV/TSV that are not yet in the store."""
+		_require_arrow()
+		path = Path(path)
+		sep = "\t" if path.suffix.lower() in (".tsv", ".txt", ".tab") or path.name.lower().endswith((".tsv.gz", ".txt.gz")) else ","
+		runs, experiments = self._known("run"), self._known("experiment")
+		aggregates = self.aggregates()
+		staged = []
+		month = current_month()
+		report = ImportReport()
+		batch_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+		# Numbers are parsed by the C reader; everything else stays text
+		dtypes = {header: ("float64" if name in NUMERIC_COLUMNS else str) for header, name in COLUMNS.items()}
+		reader = pd.read_csv(path, sep=sep, chunksize=chunk_rows, dtype=dtypes, usecols=lambda c: c in COLUMNS, skipinitialspace=True)
+		try:
+			for number, chunk in enumerate(reader):
+				if "Run" not in chunk:
+					raise ValueError("not a run-info table (no Run column)")
+				report.rows_read += len(chunk)
+				chunk = _normalize(chunk)
+				rows = len(chunk)
+				# Repeated exports overlap, and a run may appear twice within one file
+				chunk = chunk[~chunk["run"].map(runs.__contains__)].drop_duplicates("run")
+				report.duplicates += rows - len(chunk)
+				if chunk.empty:
+					continue
+				new_experiment = ~chunk["experiment"].map(experiments.__contains__) & chunk["experiment"].notna() & ~chunk["experiment"].duplicated()
+				runs.update(chunk["run"])
+				experiments.update(chunk.loc[new_experiment, "experiment"])
+				self._fold(aggregates, chunk, new_experiment, month)
+				staged.extend(self._write(chunk, f"{batch_id}-{number:05d}"))
+				report.rows_added += len(chunk)
+		except BaseException:
+			# Nothing was published: drop the staged files so a retry starts clean
+			for tmp, _ in staged:
+				if os.path.exists(tmp):
+					os.remove(tmp)
+			raise
+		if staged:
+			# Saving the aggregates with the pending renames is the commit point
+			aggregates["pending"] = staged
+			self._save_aggregates(aggregates)
+			self._publish(aggregates)
+		report.files = [target for _, target in staged]
+		return report
+
+	def _write(self, chunk: pd.DataFrame, stem: str) -> List[List[str]]:
+		staged = []
+		for year, part in chunk.groupby("year", sort=False):
+			directory = self.runs_path / f"year={year}"
+			directory.mkdir(parents=True, exist_ok=True)
+			part = part.sort_values(["bioproject", "run"], kind="stable")
+			table = pa.Table.from_pandas(part.drop(columns="year"), schema=_file_schema(), preserve_index=False)
+			target = directory / f"{stem}.parquet"
+			# Dot-prefixed names are skipped by dataset discovery until the rename
+			tmp = directory / f".{stem}.parquet.tmp"
+			pq.write_table(table, tmp, row_group_size=ROW_GROUP_ROWS, compression="zstd")
+			staged.append([str(tmp), str(target)])
+		return staged
+
+	@staticmethod
+	def _fold(aggregates: Dict, chunk: pd.DataFrame, new_experiment: pd.Series, month: str) -> None:
+		totals = aggregates["totals"]
+		current = aggregates["months"].setdefault(month, {"runs": 0, "experiments": 0, "projects": 0, "spots": 0, "bases": 0, "size_mb": 0.0})
+		for bucket in (totals, current):
+			bucket["runs"] += len(chunk)
+			bucket["experiments"] += int(new_experiment.sum())
+			bucket["spots"] += int(chunk["spots"].sum())
+			bucket["bases"] += int(chunk["bases"].sum())
+			bucket["size_mb"] += float(chunk["size_mb"].sum())
+		frame = chunk.assign(_new_experiment=new_experiment, bioproject=chunk["bioproject"].fillna(""))
+		grouped = frame.groupby("bioproject", sort=False).agg(
+			runs=("run", "size"),
+			experiments=("_new_experiment", "sum"),
+			spots=("spots", "sum"),
+			bases=("bases", "sum"),
+			size_mb=("size_mb", "sum"),
+			first_release=("release_date", "min"),
+			last_release=("release_date", "max"),
+		)
+		platforms = frame[["bioproject", "platform"]].dropna().drop_duplicates().groupby("bioproject")["platform"].agg(list)
+		for accession, row in grouped.iterrows():
+			if not accession:
+				continue
+			project = aggregates["projects"].get(accession)
+			if project is None:
+				project = aggregates["projects"][accession] = {"runs": 0, "experiments": 0, "spots": 0, "bases": 0, "size_mb": 0.0, "first_release": None, "last_release": None, "platforms": []}
+				totals["projects"] += 1
+				current["projects"] += 1
+			project["runs"] += int(row["runs"])
+			project["experiments"] += int(row["experiments"])
+			project["spots"] += int(row["spots"])
+			project["bases"] += int(row["bases"])
+			project["size_mb"] += float(row["size_mb"] or 0.0)
+			for key, pick in (("first_release", min), ("last_release", max)):
+				if pd.notna(row[key]):
+					value = row[key].date().isoformat()
+					project[key] = pick(project[key], value) if project[key] else value
+			project["platforms"] = sorted(set(project["platforms"]) | set(platforms.get(accession, [])))
+
+	def stats(self, month: Optional[str] = None) -> Dict:
+		"""Totals plus what the given import month (default: this month) added."""
+		aggregates = self.aggregates()
+		month = month or current_month()
+		empty = _empty_aggregates()["totals"]
+		return {"totals": aggregates["totals"], "month": aggregates["months"].get(month, empty), "updated": aggregates["updated"]}
+
+	def project(self, accession: str) -> Optional[Dict]:
+		return self.aggregates()["projects"].get(accession)
+
+	def query(self, columns: Optional[Sequence[str]] = None, years: Optional[Sequence[int]] = None, **equals) -> pd.DataFrame:
+		"""Rows matching every `column=value` (or value list) filter, reading only `columns`.
+
+		`years` selects release-year partitions; equality filters are checked
+		against row-group statistics before any data page is decoded.
+		"""
+		dataset = self._dataset()
+		names = list(columns) if columns else list(COLUMNS.values())
+		if dataset is None:
+			return pd.DataFrame(columns=names)
+		expression = None
+		conditions = [(ds.field("year").isin([int(y) for y in years]))] if years else []
+		for name, value in equals.items():
+			if name not in COLUMNS.values():
+				raise KeyError(f"Unknown run-info column: {name}")
+			values = value if isinstance(value, (list, tuple, set)) else [value]
+			conditions.append(ds.field(name).isin(list(values)) if len(values) > 1 else ds.field(name) == next(iter(values)))
+		for condition in conditions:
+			expression = condition if expression is None else expression & condition
+		return dataset.to_table(columns=names, filter=expression).to_pandas()
+
+	def project_runs(self, accession: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+		return self.query(columns or ["run", "experiment", "biosample", "release_date", "spots", "bases", "platform", "library_strategy"], bioproject=accession)
+
+
+def format_count(value: float, units: Sequence[str] = ("", "K", "M", "B", "T")) -> str:
+	"""847_000_000 -> '847M'."""
+	value = float(value)
+	for unit in units:
+		if abs(value) < 1000 or unit == units[-1]:
+			return f"{value:.0f}{unit}" if value >= 100 or not unit else f"{value:.1f}{unit}"
+		value /= 1000
+	return str(value)
+
+
+def format_size(size_mb: float) -> str:
+	"""Size in megabytes as a short string with a binary-ish unit ('2.4 TB')."""
+	size = float(size_mb)
+	for unit in ("MB", "GB", "TB", "PB"):
+		if size < 1024 or unit == "PB":
+			return f"{size:.1f} {unit}" if size < 100 else f"{size:.0f} {unit}"
+		size /= 1024
+	return f"{size:.1f} PB"
@@ -0,0 +1,197 @@
+"""Heap-based ranking of the expert review queue.
+
+Unassigned pending clusters are ranked by novelty score, sequence count and
+days pending, with a bonus when a cluster's location falls in an expert's
+specialty region. The days-pending term grows at the same rate for every
+cluster, so it is stored as ``-AGING * queued``. A cluster's heap key then
+never changes with time, only when the cluster itself changes.
+
+There is one max-heap over all clusters plus one per specialty region.
+Changed clusters are pushed again and superseded entries are skipped when
+they reach the top (lazy deletion). Picking the next cluster for an expert
+compares the tops of the global heap and of that expert's region heaps, so
+each assignment costs O(log n). The scheduler follows the ReviewStore
+through its change numbers, so only rows written since the last sync are
+touched; a row's change number also tells its superseded heap entries apart
+and guards each assignment.
+"""
+import functools
+import heapq
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from . import reviews
+from .config import data_dir
+
+BUNDLED_EXPERTS = Path(__file__).resolve().parent / "data" / "experts.json"
+# Location keywords per specialty region
+REGION_KEYWORDS = {
+	"mariana": ["mariana"],
+	"trench": ["trench", "deep", "trough"],
+	"pacific": ["mariana", "japan", "kermadec", "tonga", "kuril", "pacific", "bounty", "salas y gómez"],
+	"atlantic": ["atlantic", "azores", "canary", "iberian", "rockall", "hatteras", "puerto rico"],
+	"arctic": ["arctic", "fram", "svalbard", "greenland", "antarctic"],
+}
+NOVELTY_WEIGHT = 1.0
+SEQUENCE_WEIGHT = 0.1  # per e-fold of sequences
+AGING = 0.02 / reviews.DAY  # score per second pending
+SPECIALTY_BONUS = 0.25
+
+
+def experts_path() -> Path:
+	local = data_dir() / "experts.json"
+	return local if local.exists() else BUNDLED_EXPERTS
+
+
+def load_experts(path=None) -> List[Dict]:
+	return json.loads(Path(path or experts_path()).read_text())
+
+
+@functools.lru_cache(maxsize=4096)
+def regions_of(location: Optional[str]) -> FrozenSet[str]:
+	text = (location or "").lower()
+	# Cached: queues hold many clusters from the same few locations
+	return frozenset(region for region, words in REGION_KEYWORDS.items() if any(word in text for word in words))
+
+
+def base_score(cluster: Dict) -> float:
+	"""Time-independent part of the ranking; add ``AGING * now`` for the score at time `now`."""
+	return NOVELTY_WEIGHT * float(cluster["novelty"]) + SEQUENCE_WEIGHT * math.log1p(max(0, cluster["sequences"])) - AGING * float(cluster["queued"])
+
+
+class ReviewScheduler:
+	def __init__(self, store: reviews.ReviewStore, experts: Optional[List[Dict]] = None):
+		self.store = store
+		self.experts = {e["name"]: set(e.get("regions", [])) for e in (experts if experts is not None else load_experts())}
+		self._heaps: Dict[Optional[str], list] = {None: []}
+		# cluster_id -> (change number, key, regions) for clusters currently eligible
+		self._live: Dict[str, Tuple[int, float, Set[str]]] = {}
+		self._mark: Optional[int] = None
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._live)
+
+	def sync(self) -> int:
+		"""Fold in clusters written since the last sync; returns how many rows were read."""
+		with self._lock:
+			rows, mark = self.store.changes(self._mark)
+			if self._mark is None:
+				self._rebuild(rows)
+			else:
+				for row in rows:
+					self._apply(row)
+			self._mark = mark
+			if len(self._heaps[None]) > 2 * len(self._live) + 1024:
+				self._compact()
+			return len(rows)
+
+	def _compact(self) -> None:
+		# Drop superseded entries once they outnumber the live ones
+		self._heaps = {None: []}
+		for cluster_id, (changed, key, regions) in self._live.items():
+			for heap in [None, *regions]:
+				self._heaps.setdefault(heap, []).append((-key, cluster_id, changed))
+		for heap in self._heaps.values():
+			heapq.heapify(heap)
+
+	def _rebuild(self, rows: List[Dict]) -> None:
+		self._live = {}
+		self._heaps = {None: []}
+		for row in rows:
+			if row["assigned"] is None:
+				key = base_score(row)
+				regions = regions_of(row["location"])
+				self._live[row["cluster_id"]] = (row["changed"], key, regions)
+				for heap in [None, *regions]:
+					self._heaps.setdefault(heap, []).append((-key, row["cluster_id"], row["changed"]))
+		for heap in self._heaps.values():
+			heapq.heapify(heap)
+
+	def _apply(self, row: Dict) -> None:
+		if row["status"] != reviews.PENDING or row["assigned"] is not None:
+			# Reviewed or taken: its heap entries go stale and are dropped when they surface
+			self._live.pop(row["cluster_id"], None)
+			return
+		key = base_score(row)
+		regions = regions_of(row["location"])
+		self._live[row["cluster_id"]] = (row["changed"], key, regions)
+		for heap in [None, *regions]:
+			heapq.heappush(self._heaps.setdefault(heap, []), (-key, row["cluster_id"], row["changed"]))
+
+	def _top(self, heap_name: Optional[str]) -> Optional[Tuple[float, str]]:
+		heap = self._heaps.get(heap_name)
+		while heap:
+			neg_key, cluster_id, changed = heap[0]
+			live = self._live.get(cluster_id)
+			if live is not None and live[0] == changed:
+				return -neg_key, cluster_id
+			heapq.heappop(heap)
+		return None
+
+	def _best_for(self, regions: Set[str]) -> Optional[Tuple[float, str]]:
+		best = None
+		for heap_name in [None, *regions]:
+			top = self._top(heap_name)
+			if top is None:
+				continue
+			key, cluster_id = top
+			if regions & self._live[cluster_id][2]:
+				key += SPECIALTY_BONUS
+			if best is None or key > best[0]:
+				best = (key, cluster_id)
+		return best
+
+	def peek(self, expert: Optional[str] = None) -> Optional[Tuple[str, float]]:
+		"""(cluster_id, score now) of the best unassigned cluster for `expert` (or overall)."""
+		self.sync()
+		with self._lock:
+			best = self._best_for(self.experts.get(expert, set()))
+		return (best[1], best[0] + AGING * time.time()) if best else None
+
+	def assign_next(self, expert: str) -> Optional[str]:
+		"""Assign the best unassigned cluster to `expert`; returns its id, or None when the queue is empty."""
+		self.sync()
+		regions = self.experts.get(expert, set())
+		while True:
+			with self._lock:
+				best = self._best_for(regions)
+				if best is None:
+					return None
+				cluster_id = best[1]
+				changed = self._live[cluster_id][0]
+			try:
+				self.store.assign(cluster_id, expert, changed)
+			except reviews.ReviewConflict as exc:
+				# Changed elsewhere since the last sync; pick again from fresh rows
+				if exc.version is None:
+					with self._lock:
+						self._live.pop(cluster_id, None)
+				self.sync()
+				continue
+			with self._lock:
+				self._live.pop(cluster_id, None)
+			return cluster_id
+
+	def ranking(self, limit: int = 10) -> List[Tuple[str, float]]:
+		"""The top `limit` unassigned clusters overall with their current scores."""
+		self.sync()
+		now = AGING * time.time()
+		ranked = []
+		with self._lock:
+			heap = self._heaps[None]
+			# Best-first walk of the heap array: O(limit log limit) plus any stale entries passed over
+			frontier = [(heap[0], 0)] if heap else []
+			while frontier and len(ranked) < limit:
+				(neg_key, cluster_id, changed), i = heapq.heappop(frontier)
+				live = self._live.get(cluster_id)
+				if live is not None and live[0] == changed:
+					ranked.append((cluster_id, -neg_key + now))
+				for child in (2 * i + 1, 2 * i + 2):
+					if child < len(heap):
+						heapq.heappush(frontier, (heap[child], child))
+		return ranked
@@ -0,0 +1,62 @@
+"""Streaming FASTA/FASTQ readers for plain and compressed inputs."""
+import bz2
+import gzip
+import io
+import zipfile
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+from Bio.SeqIO.FastaIO import SimpleFastaParser
+from Bio.SeqIO.QualityIO import FastqGeneralIterator
+
+FASTQ_SUFFIXES = {".fastq", ".fq"}
+FASTA_SUFFIXES = {".fa", ".fasta", ".fna"}
+PHRED_OFFSET = 33
+
+
+class Read(NamedTuple):
+	id: str
+	seq: str
+	mean_quality: Optional[float]
+
+
+def open_text(path):
+	path = Path(path)
+	if path.suffix == ".gz":
+		return gzip.open(path, "rt")
+	if path.suffix == ".bz2":
+		return bz2.open(path, "rt")
+	if path.suffix == ".zip":
+		archive = zipfile.ZipFile(path)
+		member = next(n for n in archive.namelist() if not n.endswith("/"))
+		return io.TextIOWrapper(archive.open(member), encoding="ascii")
+	return open(path, "rt")
+
+
+def is_fastq(path) -> bool:
+	path = Path(path)
+	suffix = path.suffix
+	if suffix in (".gz", ".bz2", ".zip"):
+		suffix = Path(path.stem).suffix
+	if suffix in FASTQ_SUFFIXES:
+		return True
+	if suffix in FASTA_SUFFIXES:
+		return False
+	# Unknown extension (e.g. content-addressed uploads): sniff the first record
+	with open_text(path) as handle:
+		return handle.read(1) == "@"
+
+
+def mean_phred(qual: str) -> float:
+	data = qual.encode("ascii")
+	return sum(data) / len(data) - PHRED_OFFSET if data else 0.0
+
+
+def read_records(path) -> Iterator[Read]:
+	with open_text(path) as handle:
+		if is_fastq(path):
+			for title, seq, qual in FastqGeneralIterator(handle):
+				yield Read(title.split(None, 1)[0], seq, mean_phred(qual))
+		else:
+			for title, seq in SimpleFastaParser(handle):
+				yield Read(title.split(None, 1)[0], seq, None)
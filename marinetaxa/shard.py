@@ -0,0 +1,123 @@
+"""Shared-memory sharding of batch kernels across a process pool.
+
+Inputs and the output matrix live in ``multiprocessing.shared_memory`` blocks
+that workers attach to by name, so no large array is pickled. Batches are dealt
+to per-worker deques in contiguous runs; a worker pops from the front of its
+own deque and, once it is empty, steals from the back of the fullest one, so a
+shard of slow (long-read) batches never leaves the other cores idle.
+"""
+import concurrent.futures
+from contextlib import ExitStack
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+# Set in each pool process by init_worker; guards the deques and the done counter
+_LOCK = None
+
+
+def init_worker(lock) -> None:
+	global _LOCK
+	_LOCK = lock
+
+
+class SharedArray:
+	"""A numpy array backed by a named shared-memory block."""
+
+	def __init__(self, shape, dtype, name: Optional[str] = None):
+		self.shape = tuple(shape)
+		self.dtype = np.dtype(dtype)
+		size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+		self.owner = name is None
+		self._shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+		self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+	@classmethod
+	def copy_of(cls, values: np.ndarray) -> "SharedArray":
+		values = np.ascontiguousarray(values)
+		shared = cls(values.shape, values.dtype)
+		shared.array[...] = values
+		return shared
+
+	@property
+	def spec(self) -> Tuple[str, tuple, str]:
+		return self._shm.name, self.shape, self.dtype.str
+
+	def close(self) -> None:
+		self.array = None
+		try:
+			self._shm.close()
+		except BufferError:
+			# A traceback still holds a view; the mapping goes when it is collected
+			pass
+		if self.owner:
+			self._shm.unlink()
+
+	def __enter__(self) -> "SharedArray":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+
+def _steal(deques: np.ndarray, me: int) -> int:
+	"""Next batch for worker `me`, or -1 when every deque is empty. Caller holds _LOCK."""
+	head, tail = deques[me]
+	if head < tail:
+		deques[me, 0] += 1
+		return int(head)
+	remaining = deques[:, 1] - deques[:, 0]
+	victim = int(remaining.argmax())
+	if remaining[victim] <= 0:
+		return -1
+	deques[victim, 1] -= 1
+	return int(deques[victim, 1])
+
+
+def _drain(me: int, kernel: Callable, arrays: Dict[str, np.ndarray], args: tuple) -> int:
+	bounds, deques, done, out = (arrays.pop(key) for key in ("_bounds", "_deques", "_done", "_out"))
+	batches = 0
+	while True:
+		with _LOCK:
+			batch = _steal(deques, me)
+		if batch < 0:
+			return batches
+		start, stop = int(bounds[batch]), int(bounds[batch + 1])
+		kernel(arrays, out, start, stop, *args)
+		batches += 1
+		with _LOCK:
+			done[0] += stop - start
+
+
+def _worker(me: int, kernel: Callable, specs: Dict[str, tuple], args: tuple) -> int:
+	with ExitStack() as stack:
+		shared = {key: stack.enter_context(SharedArray(shape, dtype, name)) for key, (name, shape, dtype) in specs.items()}
+		return _drain(me, kernel, {key: s.array for key, s in shared.items()}, args)
+
+
+def run_sharded(pool, workers: int, kernel: Callable, bounds: np.ndarray, inputs: Dict[str, np.ndarray], out_shape, out_dtype, args: tuple = (), progress: Callable[[int], None] = lambda done: None) -> np.ndarray:
+	"""Apply `kernel(arrays, out, start, stop, *args)` to every batch [bounds[i], bounds[i + 1]) in the pool.
+
+	`pool` must have been created with ``initializer=init_worker``. Returns the
+	filled output as a private array.
+	"""
+	n_batches = len(bounds) - 1
+	workers = max(1, min(workers, n_batches))
+	# Contiguous runs per worker keep neighbouring batches (and their memory) on one core
+	cuts = np.linspace(0, n_batches, workers + 1).astype(np.int64)
+	with ExitStack() as stack:
+		shared = {key: stack.enter_context(SharedArray.copy_of(values)) for key, values in inputs.items()}
+		shared["_bounds"] = stack.enter_context(SharedArray.copy_of(np.asarray(bounds, dtype=np.int64)))
+		shared["_deques"] = stack.enter_context(SharedArray.copy_of(np.stack([cuts[:-1], cuts[1:]], axis=1)))
+		shared["_done"] = stack.enter_context(SharedArray.copy_of(np.zeros(1, dtype=np.int64)))
+		shared["_out"] = stack.enter_context(SharedArray(out_shape, out_dtype))
+		specs = {key: s.spec for key, s in shared.items()}
+		futures = [pool.submit(_worker, me, kernel, specs, args) for me in range(workers)]
+		pending = set(futures)
+		while pending:
+			_, pending = concurrent.futures.wait(pending, timeout=0.25, return_when=concurrent.futures.FIRST_EXCEPTION)
+			progress(int(shared["_done"].array[0]))
+		for future in futures:
+			future.result()
+		return np.array(shared["_out"].array)
@@ -0,0 +1,280 @@
+"""Depth and grid indexes over sampling sites for the Bathymetry Explorer.
+
+Sites are kept sorted by depth, so a depth range is one ``searchsorted`` pair
+and a contiguous slice. Located sites (finite lat/lon) are also ordered by a
+1-degree grid key (row-major: ``lat row * 360 + lon column``). A viewport is
+then one key range per latitude row. For zoomed-out maps, per-cell sums
+(sites, novel taxa, lat, lon, depth) are precomputed at a few grid sizes as
+running totals over 100 m depth bins. Aggregating any depth range is a
+subtraction per cell, and the map gets at most a few thousand cells however
+many sampling events there are.
+
+``PartitionedSites`` keeps one such index per feature type (trench, ridge,
+...), so the feature toggles pick partitions rather than filter rows, and the
+per-feature summary is merged from each partition's prefix sums.
+"""
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import data_dir
+
+SITE_COLUMNS = ["lat", "lon", "depth", "novel_taxa", "feature_type", "location", "temperature", "pressure"]
+BUNDLED_SITES = Path(__file__).resolve().parent / "data" / "sites.csv"
+DEPTH_STEP = 100.0
+DEPTH_BINS = 111
+# Degrees per aggregate cell, coarse to fine
+GRID_SIZES = [10.0, 2.5]
+INDEX_CELL = 1.0
+MAX_POINTS = 5000
+
+_STATS = ["sites", "novel_taxa", "lat", "lon", "depth"]
+
+
+def sites_path() -> Path:
+	local = data_dir() / "sites.csv"
+	return local if local.exists() else BUNDLED_SITES
+
+
+def sites_stamp(path=None) -> tuple:
+	"""(path, size, mtime) of the site table, to key caches on."""
+	path = Path(path or sites_path())
+	stat = path.stat()
+	return (str(path), stat.st_size, stat.st_mtime_ns)
+
+
+def load_sites(path=None) -> pd.DataFrame:
+	return pd.read_csv(path or sites_path())
+
+
+def _cells(lat: np.ndarray, lon: np.ndarray, size: float) -> Tuple[np.ndarray, int]:
+	cols = int(round(360 / size))
+	row = np.clip(((lat + 90) // size).astype(np.int64), 0, int(round(180 / size)) - 1)
+	col = np.clip(((lon + 180) // size).astype(np.int64), 0, cols - 1)
+	return row * cols + col, cols
+
+
+class SiteIndex:
+	def __init__(self, frame: pd.DataFrame):
+		for column in SITE_COLUMNS:
+			if column not in frame:
+				frame = frame.assign(**{column: np.nan})
+		self.frame = frame.sort_values("depth", kind="stable").reset_index(drop=True)
+		self.depth = self.frame["depth"].to_numpy(np.float64)
+		lat = self.frame["lat"].to_numpy(np.float64)
+		lon = self.frame["lon"].to_numpy(np.float64)
+		located = np.isfinite(lat) & np.isfinite(lon) & np.isfinite(self.depth)
+		self._located_before = np.concatenate([[0], np.cumsum(located)])
+		# Prefix sums turn per-range statistics into two lookups
+		novel = self.frame["novel_taxa"].to_numpy(np.float64)
+		self._novel_before = np.concatenate([[0.0], np.cumsum(np.nan_to_num(novel))])
+		# Sites with a novel taxa count, the denominator of its mean
+		self._counted_before = np.concatenate([[0], np.cumsum(np.isfinite(novel))])
+		self._depth_before = np.concatenate([[0.0], np.cumsum(np.nan_to_num(self.depth))])
+
+		# Grid order for viewport lookups
+		positions = np.flatnonzero(located)
+		keys, self._index_cols = _cells(lat[positions], lon[positions], INDEX_CELL)
+		order = np.argsort(keys, kind="stable")
+		self._grid_keys = keys[order]
+		self._grid_positions = positions[order]
+
+		# Running per-cell totals over depth bins, one table per grid size
+		bins = np.clip((self.depth[positions] // DEPTH_STEP).astype(np.int64), 0, DEPTH_BINS - 1)
+		values = np.stack([
+			np.ones(len(positions)),
+			self.frame["novel_taxa"].to_numpy(np.float64)[positions],
+			lat[positions],
+			lon[positions],
+			self.depth[positions],
+		], axis=1)
+		values[~np.isfinite(values)] = 0.0
+		self._levels = []
+		for size in GRID_SIZES:
+			cells, cols = _cells(lat[positions], lon[positions], size)
+			unique, inverse = np.unique(cells, return_inverse=True)
+			slot = inverse.ravel() * (DEPTH_BINS + 1) + bins + 1
+			table = np.stack([np.bincount(slot, weights=values[:, k], minlength=len(unique) * (DEPTH_BINS + 1)) for k in range(len(_STATS))], axis=1)
+			table = np.cumsum(table.reshape(len(unique), DEPTH_BINS + 1, len(_STATS)), axis=1)
+			self._levels.append((size, unique, table))
+
+	def __len__(self) -> int:
+		return len(self.frame)
+
+	def depth_slice(self, min_depth: float, max_depth: float) -> slice:
+		return slice(int(np.searchsorted(self.depth, min_depth, "left")), int(np.searchsorted(self.depth, max_depth, "right")))
+
+	def depth_range(self, min_depth: float, max_depth: float) -> pd.DataFrame:
+		return self.frame.iloc[self.depth_slice(min_depth, max_depth)]
+
+	def sample(self, min_depth: float, max_depth: float, max_points: int = MAX_POINTS) -> pd.DataFrame:
+		"""At most `max_points` sites of a depth range, evenly spread over depth."""
+		span = self.depth_slice(min_depth, max_depth)
+		count = span.stop - span.start
+		if count <= max_points:
+			return self.frame.iloc[span]
+		return self.frame.iloc[np.linspace(span.start, span.stop - 1, max_points).astype(np.intp)]
+
+	def viewport(self, bbox: Sequence[float]) -> np.ndarray:
+		"""Row positions of located sites inside (south, west, north, east), in grid order."""
+		south, west, north, east = bbox
+		cols = self._index_cols
+		first_row, last_row = (int(np.clip((v + 90) // INDEX_CELL, 0, 180 / INDEX_CELL - 1)) for v in (south, north))
+		first_col, last_col = (int(np.clip((v + 180) // INDEX_CELL, 0, cols - 1)) for v in (west, east))
+		spans = [(first_col, last_col)] if first_col <= last_col else [(first_col, cols - 1), (0, last_col)]
+		rows = np.arange(first_row, last_row + 1)
+		starts = np.concatenate([rows * cols + a for a, _ in spans])
+		stops = np.concatenate([rows * cols + b + 1 for _, b in spans])
+		lo = np.searchsorted(self._grid_keys, starts, "left")
+		hi = np.searchsorted(self._grid_keys, stops, "left")
+		candidates = np.concatenate([self._grid_positions[a:b] for a, b in zip(lo, hi)]) if len(lo) else np.empty(0, dtype=np.intp)
+		lat = self.frame["lat"].to_numpy()[candidates]
+		lon = self.frame["lon"].to_numpy()[candidates]
+		inside_lon = (lon >= west) & (lon <= east) if west <= east else (lon >= west) | (lon <= east)
+		return candidates[(lat >= south) & (lat <= north) & inside_lon]
+
+	def located(self, min_depth: float, max_depth: float) -> int:
+		span = self.depth_slice(min_depth, max_depth)
+		return int(self._located_before[span.stop] - self._located_before[span.start])
+
+	def depth_stats(self, min_depth: float, max_depth: float) -> dict:
+		"""Site count, novel taxa sum (and how many sites have a count) and depth sum/min/max of a depth range."""
+		span = self.depth_slice(min_depth, max_depth)
+		count = span.stop - span.start
+		return {
+			"sites": count,
+			"novel_taxa": float(self._novel_before[span.stop] - self._novel_before[span.start]),
+			"novel_sites": int(self._counted_before[span.stop] - self._counted_before[span.start]),
+			"depth_sum": float(self._depth_before[span.stop] - self._depth_before[span.start]),
+			"depth_min": float(self.depth[span.start]) if count else np.nan,
+			"depth_max": float(self.depth[span.stop - 1]) if count else np.nan,
+		}
+
+	def cell_sums(self, min_depth: float, max_depth: float, level: int, bbox: Optional[Sequence[float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+		"""(cell keys, per-cell sums of _STATS) at grid `level` for a depth range."""
+		first = int(np.clip(min_depth // DEPTH_STEP, 0, DEPTH_BINS))
+		last = int(np.clip(np.ceil(max_depth / DEPTH_STEP), first + 1, DEPTH_BINS))
+		size, keys, table = self._levels[level]
+		sums = table[:, last, :] - table[:, first, :]
+		keep = sums[:, 0] > 0
+		if bbox is not None:
+			keep &= _overlaps(keys, size, bbox)
+		return keys[keep], sums[keep]
+
+	def query(self, min_depth: float, max_depth: float, bbox: Optional[Sequence[float]] = None, max_points: int = MAX_POINTS) -> Tuple[pd.DataFrame, bool]:
+		"""Map rows for a depth range (and viewport): raw sites when few enough, else grid cells.
+
+		Returns ``(frame, aggregated)``. Aggregated cells cover ``[min_depth, max_depth)``
+		widened to whole ``DEPTH_STEP`` bins.
+		"""
+		span = self.depth_slice(min_depth, max_depth)
+		if bbox is None:
+			located = self._located_before[span.stop] - self._located_before[span.start]
+			if located <= max_points:
+				rows = self.frame.iloc[span]
+				return rows[rows["lat"].notna() & rows["lon"].notna()], False
+		else:
+			positions = self.viewport(bbox)
+			positions = positions[(positions >= span.start) & (positions < span.stop)]
+			if len(positions) <= max_points:
+				return self.frame.iloc[np.sort(positions)], False
+		return cells_frame([self], min_depth, max_depth, bbox, max_points), True
+
+
+def _overlaps(keys: np.ndarray, size: float, bbox: Sequence[float]) -> np.ndarray:
+	# Cells overlapping the viewport; cells that only touch its edge are left out
+	south, west, north, east = bbox
+	rows, columns = np.divmod(keys, int(round(360 / size)))
+	bottom, left = -90 + rows * size, -180 + columns * size
+	lon_ok = (left + size > west) & (left < east) if west <= east else (left + size > west) | (left < east)
+	return (bottom + size > south) & (bottom < north) & lon_ok
+
+
+def cells_frame(indexes: Sequence[SiteIndex], min_depth: float, max_depth: float, bbox=None, max_points: int = MAX_POINTS) -> pd.DataFrame:
+	"""Grid cells summed over several indexes, on the finest grid within the point budget."""
+	chosen = None
+	for level, size in enumerate(GRID_SIZES):
+		parts = [index.cell_sums(min_depth, max_depth, level, bbox) for index in indexes]
+		keys = np.concatenate([k for k, _ in parts]) if parts else np.empty(0, dtype=np.int64)
+		sums = np.concatenate([v for _, v in parts]) if parts else np.empty((0, len(_STATS)))
+		unique, inverse = np.unique(keys, return_inverse=True)
+		merged = np.stack([np.bincount(inverse.ravel(), weights=sums[:, k], minlength=len(unique)) for k in range(len(_STATS))], axis=1) if len(unique) else np.empty((0, len(_STATS)))
+		if chosen is None or len(unique) <= max_points:
+			chosen = (size, merged)
+	size, sums = chosen
+	count = sums[:, 0]
+	return pd.DataFrame({
+		"lat": sums[:, 2] / count,
+		"lon": sums[:, 3] / count,
+		"depth": (sums[:, 4] / count).round(0),
+		"novel_taxa": sums[:, 1],
+		"sites": count.astype(np.int64),
+		"feature_type": f"{size:g}° cell",
+		"location": [f"{int(n):,} sites" for n in count],
+	})
+
+
+class PartitionedSites:
+	"""One SiteIndex per feature type; queries touch only the selected partitions."""
+
+	def __init__(self, frame: pd.DataFrame, by: str = "feature_type"):
+		self.partitions = {str(key): SiteIndex(part) for key, part in frame.groupby(frame[by].fillna("Unknown"), sort=True)}
+		# Typed empty result for when no partition is selected
+		self._empty = frame.iloc[:0].reindex(columns=list(frame.columns) + [c for c in SITE_COLUMNS if c not in frame]).astype({c: np.float64 for c in SITE_COLUMNS if c not in frame})
+
+	def __len__(self) -> int:
+		return sum(len(index) for index in self.partitions.values())
+
+	def features(self):
+		return list(self.partitions)
+
+	def _selected(self, features=None):
+		return [index for name, index in self.partitions.items() if features is None or name in features]
+
+	def depth_range(self, min_depth: float, max_depth: float, features=None) -> pd.DataFrame:
+		parts = [index.depth_range(min_depth, max_depth) for index in self._selected(features)]
+		return pd.concat(parts, ignore_index=True) if parts else self._empty
+
+	def sample(self, min_depth: float, max_depth: float, features=None, max_points: int = MAX_POINTS) -> pd.DataFrame:
+		"""Up to `max_points` sites, shared between partitions by their size in the range."""
+		selected = self._selected(features)
+		spans = [index.depth_slice(min_depth, max_depth) for index in selected]
+		sizes = np.array([span.stop - span.start for span in spans], dtype=np.float64)
+		total = sizes.sum()
+		if not total:
+			return self._empty
+		budgets = np.maximum(1, np.floor(sizes / total * max_points)).astype(int) if total > max_points else sizes.astype(int)
+		parts = [index.sample(min_depth, max_depth, budget) for index, budget, size in zip(selected, budgets, sizes) if size]
+		return pd.concat(parts, ignore_index=True).sort_values("depth", kind="stable")
+
+	def query(self, min_depth: float, max_depth: float, features=None, bbox: Optional[Sequence[float]] = None, max_points: int = MAX_POINTS) -> Tuple[pd.DataFrame, bool]:
+		selected = self._selected(features)
+		if bbox is None and sum(index.located(min_depth, max_depth) for index in selected) > max_points:
+			return cells_frame(selected, min_depth, max_depth, None, max_points), True
+		parts = [index.query(min_depth, max_depth, bbox, max_points) for index in selected]
+		if any(aggregated for _, aggregated in parts) or sum(len(frame) for frame, _ in parts) > max_points:
+			return cells_frame(selected, min_depth, max_depth, bbox, max_points), True
+		frames = [frame for frame, _ in parts if len(frame)]
+		return (pd.concat(frames, ignore_index=True) if frames else self._empty), False
+
+	def feature_stats(self, min_depth: float, max_depth: float, features=None) -> pd.DataFrame:
+		"""The Feature Analysis table, merged from per-partition prefix sums instead of a groupby."""
+		rows = {}
+		for name, index in self.partitions.items():
+			if features is not None and name not in features:
+				continue
+			stats = index.depth_stats(min_depth, max_depth)
+			if stats["sites"]:
+				rows[name] = {
+					("novel_taxa", "sum"): stats["novel_taxa"],
+					("novel_taxa", "mean"): stats["novel_taxa"] / stats["novel_sites"] if stats["novel_sites"] else np.nan,
+					("depth", "mean"): stats["depth_sum"] / stats["sites"],
+					("depth", "min"): stats["depth_min"],
+					("depth", "max"): stats["depth_max"],
+					("location", "count"): stats["sites"],
+				}
+		frame = pd.DataFrame.from_dict(rows, orient="index")
+		frame.index.name = "feature_type"
+		return frame.round(2)
@@ -0,0 +1,193 @@
+"""Array-backed taxonomy tree behind the Taxonomic Hierarchy Browser.
+
+The tree is built from a WoRMS-style table with one row per taxon and one
+column per rank (``kingdom`` ... ``genus``, plus ``species`` or the Darwin Core
+``scientificName``/``taxonRank`` pair of a WoRMS DwC-A ``taxon.txt``). Ranks
+left blank are skipped, so a taxon hangs from its nearest named ancestor.
+Nodes are numbered breadth-first with each node's children contiguous and
+sorted by name. The tree is then a handful of int arrays: parent, rank,
+first child, child count and species below. Names are interned once. A child
+list is an index range and a child lookup is a binary search inside it. The
+compiled arrays are cached as ``.npz`` in the data directory, so later
+loads skip the CSV.
+"""
+import bisect
+import csv
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .config import data_dir
+
+RANKS = ["kingdom", "phylum", "class", "order", "family", "genus", "species"]
+SOURCES = ["taxonomy.csv", "taxonomy.tsv", "taxon.txt"]
+BUNDLED_TAXONOMY = Path(__file__).resolve().parent / "data" / "taxonomy.csv"
+ROOT = 0
+
+
+def taxonomy_path() -> Path:
+	for name in SOURCES:
+		local = data_dir() / name
+		if local.exists():
+			return local
+	return BUNDLED_TAXONOMY
+
+
+def _read_table(path: Path) -> pd.DataFrame:
+	sep = "," if path.suffix.lower() == ".csv" else "\t"
+	wanted = set(RANKS) | {"scientificName", "taxonRank", "taxonomicStatus"}
+	frame = pd.read_csv(path, sep=sep, dtype=str, usecols=lambda c: c in wanted, skipinitialspace=True, quoting=csv.QUOTE_NONE if sep == "\t" else csv.QUOTE_MINIMAL)
+	if "taxonomicStatus" in frame:
+		frame = frame[frame["taxonomicStatus"].fillna("accepted").str.lower() == "accepted"]
+	if "species" not in frame and {"scientificName", "taxonRank"} <= set(frame.columns):
+		frame["species"] = frame["scientificName"].where(frame["taxonRank"].str.lower() == "species")
+	for rank in RANKS:
+		frame[rank] = frame[rank].fillna("") if rank in frame else ""
+	return frame[RANKS]
+
+
+class TaxonomyTree:
+	def __init__(self, names: List[str], name: np.ndarray, parent: np.ndarray, rank: np.ndarray, first_child: np.ndarray, child_count: np.ndarray, species: np.ndarray):
+		self.names = names
+		self.name_index = name
+		self.parent = parent
+		self.rank_index = rank
+		self.first_child = first_child
+		self.child_count = child_count
+		self.species = species
+		self._search = None
+
+	def __len__(self) -> int:
+		return len(self.parent)
+
+	@classmethod
+	def from_frame(cls, frame: pd.DataFrame) -> "TaxonomyTree":
+		"""Build from one column per rank (blank = rank not given)."""
+		codes, uniques = pd.factorize(np.concatenate([frame[rank].to_numpy(object) for rank in RANKS]))
+		# Name codes in alphabetical order, so sorting siblings by code sorts them by name
+		uniques = list(uniques)
+		order = sorted(range(len(uniques)), key=uniques.__getitem__)
+		names = [uniques[i] for i in order]
+		alphabetical = np.empty(len(names), dtype=np.int64)
+		alphabetical[order] = np.arange(len(names))
+		codes = alphabetical[codes].reshape(len(RANKS), len(frame))
+		blank = names.index("") if "" in names else -1
+		width = np.int64(len(names))
+
+		# One level per rank: nodes are the distinct (parent node, name) pairs
+		row_node = np.zeros(len(frame), dtype=np.int64)
+		parents, name_codes, ranks = [np.array([-1])], [np.array([blank])], [np.array([-1])]
+		depth = np.zeros(1, dtype=np.int64)
+		count = 1
+		for level, rank in enumerate(RANKS):
+			present = codes[level] != blank
+			keys, inverse = np.unique(row_node[present] * width + codes[level][present], return_inverse=True)
+			level_parent = keys // width
+			parents.append(level_parent)
+			name_codes.append(keys % width)
+			ranks.append(np.full(len(keys), level))
+			depth = np.concatenate([depth, depth[level_parent] + 1])
+			row_node[present] = count + inverse.ravel()
+			count += len(keys)
+		parent, name, rank = (np.concatenate(a) for a in (parents, name_codes, ranks))
+
+		# Renumber breadth-first, siblings by name: every child list becomes one contiguous range
+		position = np.zeros(count, dtype=np.int64)
+		placed = 1
+		for level in range(1, int(depth.max(initial=0)) + 1):
+			nodes = np.flatnonzero(depth == level)
+			nodes = nodes[np.lexsort((name[nodes], position[parent[nodes]]))]
+			position[nodes] = placed + np.arange(len(nodes))
+			placed += len(nodes)
+		order = np.empty(count, dtype=np.int64)
+		order[position] = np.arange(count)
+		new_parent = np.where(parent[order] < 0, -1, position[np.maximum(parent[order], 0)])
+		new_depth = depth[order]
+
+		child_count = np.bincount(new_parent[1:], minlength=count)
+		first_child = np.searchsorted(new_parent[1:], np.arange(count)) + 1
+		species = (rank[order] == RANKS.index("species")).astype(np.int64)
+		for level in range(int(new_depth.max(initial=0)), 0, -1):
+			nodes = np.flatnonzero(new_depth == level)
+			np.add.at(species, new_parent[nodes], species[nodes])
+		return cls(
+			names,
+			name[order].astype(np.int32),
+			new_parent.astype(np.int32),
+			rank[order].astype(np.int8),
+			first_child.astype(np.int32),
+			child_count.astype(np.int32),
+			species.astype(np.int32),
+		)
+
+	@classmethod
+	def load(cls, path=None, cache=True) -> "TaxonomyTree":
+		"""Tree for a taxonomy table, reusing the compiled arrays while the table is unchanged."""
+		path = Path(path or taxonomy_path())
+		stat = path.stat()
+		stamp = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+		cached = data_dir() / "taxonomy" / f"{path.stem}.npz"
+		if cache and cached.exists():
+			with np.load(cached) as arrays:
+				if np.array_equal(arrays["source"], stamp):
+					names = arrays["names"].tobytes().decode("utf-8").split("\0")
+					return cls(names, *(arrays[key] for key in ("name", "parent", "rank", "first_child", "child_count", "species")))
+		tree = cls.from_frame(_read_table(path))
+		if cache:
+			cached.parent.mkdir(parents=True, exist_ok=True)
+			blob = np.frombuffer("\0".join(tree.names).encode("utf-8"), dtype=np.uint8)
+			tmp = cached.with_suffix(".tmp.npz")
+			np.savez(tmp, source=stamp, names=blob, name=tree.name_index, parent=tree.parent, rank=tree.rank_index, first_child=tree.first_child, child_count=tree.child_count, species=tree.species)
+			tmp.replace(cached)
+		return tree
+
+	def name(self, node: int) -> str:
+		return self.names[self.name_index[node]]
+
+	def rank(self, node: int) -> Optional[str]:
+		return RANKS[self.rank_index[node]] if node != ROOT else None
+
+	def children(self, node: int = ROOT) -> range:
+		start = int(self.first_child[node])
+		return range(start, start + int(self.child_count[node]))
+
+	def child_names(self, node: int = ROOT) -> List[str]:
+		names, index = self.names, self.name_index
+		return [names[i] for i in index[self.first_child[node]:self.first_child[node] + self.child_count[node]]]
+
+	def child(self, node: int, name: str) -> Optional[int]:
+		span = self.children(node)
+		found = bisect.bisect_left(span, name, key=self.name)
+		return span[found] if found < len(span) and self.name(span[found]) == name else None
+
+	def resolve(self, path: Sequence[str]) -> Optional[int]:
+		"""Node for a chain of names from the top ('Animalia', 'Chordata', ...), or None."""
+		node = ROOT
+		for name in path:
+			node = self.child(node, name)
+			if node is None:
+				return None
+		return node
+
+	def lineage(self, node: int) -> List[int]:
+		chain = []
+		while node > ROOT:
+			chain.append(node)
+			node = int(self.parent[node])
+		return chain[::-1]
+
+	def search(self, prefix: str, limit: int = 20) -> List[int]:
+		"""Nodes whose name starts with `prefix` (case-insensitive), alphabetically."""
+		if self._search is None:
+			lowered = np.array([name.lower() for name in self.names], dtype=object)[self.name_index[1:]]
+			order = np.argsort(lowered, kind="stable")
+			self._search = (lowered[order].tolist(), order + 1)
+		keys, order = self._search
+		prefix = prefix.strip().lower()
+		if not prefix:
+			return []
+		start = bisect.bisect_left(keys, prefix)
+		stop = bisect.bisect_left(keys, prefix + "￿", lo=start)
+		return [int(node) for node in order[start:min(stop, start + limit)]]
@@ -0,0 +1,286 @@
+"""Local map tile cache and server for the scatter_mapbox views.
+
+Tiles are stored as ``tiles/<z>/<x>/<y>.png`` in the data directory and served
+over HTTP by a small threaded server. The app starts one in the background,
+and ``python -m marinetaxa serve-tiles`` runs it on its own. On a miss the
+tile is fetched once from the upstream tile server, if one is configured and
+reachable, and kept. The cache is held to a byte budget by evicting the least
+recently served tiles. A failed upstream request switches the server to
+cache-only for a while, so missing tiles come back as fast 404s instead of
+waiting on a dead link. ``python -m marinetaxa seed-tiles`` downloads the
+configured regions and zoom levels before a cruise. The server listens on
+loopback unless MARINETAXA_TILE_HOST says otherwise; browsers that cannot reach
+it draw the maps from OpenStreetMap directly.
+"""
+import json
+import math
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from . import __version__
+from .config import browser_host, data_dir
+
+DEFAULT_PORT = 8766
+DEFAULT_BUDGET_MB = 512
+DEFAULT_UPSTREAM = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+MAX_ZOOM = 19
+UPSTREAM_TIMEOUT = 5.0
+OFFLINE_BACKOFF = 60.0
+# (south, west, north, east), (min zoom, max zoom); tile_regions.json in the data dir replaces these
+REGIONS = {
+	"world": ((-85.0, -180.0, 85.0, 180.0), (0, 4)),
+	"mariana-trench": ((10.0, 140.0, 25.0, 150.0), (5, 7)),
+	"mid-atlantic-ridge": ((-10.0, -45.0, 45.0, -10.0), (5, 6)),
+}
+
+
+def tile_dir() -> Path:
+	return data_dir() / "tiles"
+
+
+def tile_host() -> str:
+	"""Address the tile server binds to; MARINETAXA_TILE_HOST=0.0.0.0 serves browsers on other machines."""
+	return os.environ.get("MARINETAXA_TILE_HOST", "127.0.0.1")
+
+
+def tile_port() -> int:
+	return int(os.environ.get("MARINETAXA_TILE_PORT", DEFAULT_PORT))
+
+
+def upstream_url() -> Optional[str]:
+	"""Upstream tile URL template; an empty MARINETAXA_TILE_UPSTREAM means cache-only."""
+	return os.environ.get("MARINETAXA_TILE_UPSTREAM", DEFAULT_UPSTREAM) or None
+
+
+def budget_bytes() -> int:
+	return int(float(os.environ.get("MARINETAXA_TILE_BUDGET_MB", DEFAULT_BUDGET_MB)) * 1024 ** 2)
+
+
+def regions() -> Dict[str, Tuple[Tuple[float, ...], Tuple[int, int]]]:
+	path = data_dir() / "tile_regions.json"
+	if not path.exists():
+		return dict(REGIONS)
+	return {name: (tuple(spec["bbox"]), tuple(spec["zoom"])) for name, spec in json.loads(path.read_text()).items()}
+
+
+def tile_range(bbox: Sequence[float], zoom: int) -> Tuple[int, int, int, int]:
+	"""(x_min, y_min, x_max, y_max) of the Web Mercator tiles covering a (south, west, north, east) box."""
+	south, west, north, east = bbox
+	last = 2 ** zoom - 1
+
+	def x(lon):
+		return min(last, max(0, int((lon + 180.0) / 360.0 * 2 ** zoom)))
+
+	def y(lat):
+		lat = math.radians(max(-85.0511, min(85.0511, lat)))
+		return min(last, max(0, int((1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * 2 ** zoom)))
+
+	return x(west), y(north), x(east), y(south)
+
+
+def tiles_in(bbox: Sequence[float], zooms: Tuple[int, int]) -> Iterator[Tuple[int, int, int]]:
+	for zoom in range(zooms[0], zooms[1] + 1):
+		x_min, y_min, x_max, y_max = tile_range(bbox, zoom)
+		for x in range(x_min, x_max + 1):
+			for y in range(y_min, y_max + 1):
+				yield zoom, x, y
+
+
+class TileCache:
+	def __init__(self, root=None, budget: Optional[int] = None, upstream: Optional[str] = "default"):
+		self.root = Path(root) if root else tile_dir()
+		self.root.mkdir(parents=True, exist_ok=True)
+		self.budget = budget_bytes() if budget is None else budget
+		self.upstream = upstream_url() if upstream == "default" else upstream
+		self._lock = threading.Lock()
+		self._fetching: Dict[Tuple[int, int, int], threading.Event] = {}
+		self._offline_until = 0.0
+		# Least recently served first; the order survives restarts through file mtimes
+		found = []
+		for path in self.root.glob("*/*/*.png"):
+			stat = path.stat()
+			found.append((stat.st_mtime, self._key(path), stat.st_size))
+		found.sort()
+		self._sizes: "OrderedDict[Tuple[int, int, int], int]" = OrderedDict((key, size) for _, key, size in found)
+		self.total = sum(self._sizes.values())
+
+	def __len__(self) -> int:
+		return len(self._sizes)
+
+	def __contains__(self, key) -> bool:
+		return tuple(key) in self._sizes
+
+	def _key(self, path: Path) -> Tuple[int, int, int]:
+		return int(path.parent.parent.name), int(path.parent.name), int(path.stem)
+
+	def path(self, z: int, x: int, y: int) -> Path:
+		return self.root / str(z) / str(x) / f"{y}.png"
+
+	def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+		"""Tile bytes from disk, or fetched upstream and stored; None if unavailable."""
+		key = (z, x, y)
+		with self._lock:
+			if key in self._sizes:
+				self._sizes.move_to_end(key)
+				cached = True
+			else:
+				cached = False
+				pending = self._fetching.get(key)
+				if pending is None:
+					self._fetching[key] = threading.Event()
+		if cached:
+			path = self.path(*key)
+			try:
+				data = path.read_bytes()
+				os.utime(path)
+				return data
+			except OSError:
+				with self._lock:
+					self.total -= self._sizes.pop(key, 0)
+				return None
+		if pending is not None:
+			# Another request is already fetching this tile
+			pending.wait(UPSTREAM_TIMEOUT + 1)
+			return self.get(z, x, y) if key in self else None
+		try:
+			data = self._fetch(key)
+			if data:
+				self.put(z, x, y, data)
+			return data
+		finally:
+			with self._lock:
+				self._fetching.pop(key).set()
+
+	def _fetch(self, key: Tuple[int, int, int]) -> Optional[bytes]:
+		if not self.upstream or time.monotonic() < self._offline_until:
+			return None
+		z, x, y = key
+		request = urllib.request.Request(self.upstream.format(z=z, x=x, y=y), headers={"User-Agent": f"marinetaxa/{__version__} tile cache"})
+		try:
+			with urllib.request.urlopen(request, timeout=UPSTREAM_TIMEOUT) as response:
+				return response.read()
+		except urllib.error.HTTPError:
+			return None
+		except (OSError, ValueError):
+			self._offline_until = time.monotonic() + OFFLINE_BACKOFF
+			return None
+
+	def put(self, z: int, x: int, y: int, data: bytes) -> None:
+		key = (z, x, y)
+		path = self.path(*key)
+		path.parent.mkdir(parents=True, exist_ok=True)
+		tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+		tmp.write_bytes(data)
+		tmp.replace(path)
+		with self._lock:
+			self.total += len(data) - self._sizes.pop(key, 0)
+			self._sizes[key] = len(data)
+			evicted = []
+			while self.total > self.budget and len(self._sizes) > 1:
+				old, size = self._sizes.popitem(last=False)
+				self.total -= size
+				evicted.append(old)
+		for old in evicted:
+			self.path(*old).unlink(missing_ok=True)
+
+	def seed(self, bbox: Sequence[float], zooms: Tuple[int, int], progress=None) -> Tuple[int, int]:
+		"""Download the missing tiles of a region; returns (fetched, unavailable)."""
+		fetched = missing = 0
+		for key in tiles_in(bbox, zooms):
+			if key in self:
+				continue
+			data = self._fetch(key)
+			if data:
+				self.put(*key, data)
+				fetched += 1
+			else:
+				missing += 1
+			if progress:
+				progress(key, fetched, missing)
+		return fetched, missing
+
+
+class _TileHandler(BaseHTTPRequestHandler):
+	server_version = f"marinetaxa-tiles/{__version__}"
+
+	def do_GET(self):
+		parts = self.path.split("?", 1)[0].strip("/").split("/")
+		try:
+			z, x, y = int(parts[-3]), int(parts[-2]), int(parts[-1].removesuffix(".png"))
+		except (IndexError, ValueError):
+			return self._reply(HTTPStatus.NOT_FOUND)
+		if not (0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+			return self._reply(HTTPStatus.NOT_FOUND)
+		data = self.server.cache.get(z, x, y)
+		self._reply(HTTPStatus.OK if data else HTTPStatus.NOT_FOUND, data or b"")
+
+	def _reply(self, status: HTTPStatus, body: bytes = b"") -> None:
+		self.send_response(status)
+		# Map tiles are requested cross-origin from the app page
+		self.send_header("Access-Control-Allow-Origin", "*")
+		if body:
+			self.send_header("Content-Type", "image/png")
+			self.send_header("Cache-Control", "public, max-age=604800")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+
+class TileServer:
+	"""Threaded HTTP server for one TileCache, run in a background thread or in the foreground."""
+
+	def __init__(self, cache: Optional[TileCache] = None, host: Optional[str] = None, port: Optional[int] = None):
+		self.cache = cache or TileCache()
+		self.httpd = ThreadingHTTPServer((tile_host() if host is None else host, tile_port() if port is None else port), _TileHandler)
+		self.httpd.daemon_threads = True
+		self.httpd.cache = self.cache
+		self._thread = threading.Thread(target=self.httpd.serve_forever, name="marinetaxa-tiles", daemon=True)
+
+	@property
+	def port(self) -> int:
+		return self.httpd.server_address[1]
+
+	def start(self) -> "TileServer":
+		self._thread.start()
+		return self
+
+	def stop(self) -> None:
+		self.httpd.shutdown()
+		self.httpd.server_close()
+
+
+def tile_url(request_host: Optional[str] = None) -> Optional[str]:
+	"""Tile URL template for a browser that reached the app at `request_host`; MARINETAXA_TILE_URL overrides.
+
+	None when that browser cannot reach the tile server (bound to loopback, browser elsewhere).
+	"""
+	if os.environ.get("MARINETAXA_TILE_URL"):
+		return os.environ["MARINETAXA_TILE_URL"]
+	host = browser_host(tile_host(), request_host)
+	return f"http://{host}:{tile_port()}/{{z}}/{{x}}/{{y}}.png" if host else None
+
+
+def map_layout(tile_url: Optional[str]) -> dict:
+	"""``update_layout`` arguments for a mapbox figure drawn from `tile_url`, or from OSM directly without one."""
+	if not tile_url:
+		return {"mapbox_style": "open-street-map"}
+	return {
+		"mapbox_style": "white-bg",
+		"mapbox_layers": [{
+			"below": "traces",
+			"sourcetype": "raster",
+			"sourceattribution": "© OpenStreetMap contributors",
+			"source": [tile_url],
+		}],
+	}
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+	# Every store defaults to the data dir; keep each test's state in its own
+	path = tmp_path / "data"
+	monkeypatch.setenv("MARINETAXA_DATA_DIR", str(path))
+	return path
@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from marinetaxa import api, pipeline
+from marinetaxa.api import HttpError, parse_params, parse_submission
+
+
+def request(raw: bytes) -> bytes:
+	"""Send raw bytes to an ApiServer on an ephemeral port and return the whole response."""
+
+	async def exchange():
+		server = api.ApiServer()
+		listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+		port = listener.sockets[0].getsockname()[1]
+		try:
+			reader, writer = await asyncio.open_connection("127.0.0.1", port)
+			writer.write(raw)
+			await writer.drain()
+			response = await asyncio.wait_for(reader.read(), 10)
+			writer.close()
+			return response
+		finally:
+			listener.close()
+			server.pool.shutdown()
+
+	return asyncio.run(exchange())
+
+
+def status(response: bytes) -> int:
+	return int(response.split(b" ", 2)[1])
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_bad_content_length_is_400(length):
+	response = request(b"POST /jobs HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+	assert status(response) == 400
+	assert b"Content-Length" in response
+
+
+def test_unexpected_error_is_500(monkeypatch):
+	def broken(*args):
+		raise RuntimeError("boom")
+
+	monkeypatch.setattr(api, "parse_submission", broken)
+	body = b'{"sequences": ["ACGT"]}'
+	response = request(b"POST /jobs HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+	assert status(response) == 500
+	assert json.loads(response.split(b"\r\n\r\n", 1)[1])["error"] == "RuntimeError: boom"
+
+
+def test_health():
+	assert status(request(b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n")) == 200
+
+
+def test_quality_filter_is_rejected():
+	with pytest.raises(HttpError) as raised:
+		parse_params({"quality_filter": "Phred > 30"})
+	assert raised.value.status == 400
+
+
+def test_length_limits_are_applied_to_streamed_batches():
+	params = parse_params({"min_length": 8, "max_length": 12, "kmer_size": 2})
+	labels, scores = pipeline.StreamingAnalyzer(params).process(["ACGT", "ACGTACGTAC", "ACGTACGTACGTACGT"])
+	assert list(labels[[0, 2]]) == [-1, -1]
+	assert np.isnan(scores[[0, 2]]).all()
+	assert labels[1] >= 0 and 0.0 <= scores[1] <= 1.0
+
+
+def test_non_ascii_fasta_is_400():
+	with pytest.raises(HttpError) as raised:
+		parse_submission(">r1\nACGT\xc3\xa9ACGT\n".encode("latin-1"), "text/x-fasta")
+	assert raised.value.status == 400
+	assert "0xc3" in str(raised.value)
+
+
+def test_non_ascii_json_sequence_is_400():
+	with pytest.raises(HttpError) as raised:
+		parse_submission(json.dumps({"sequences": [{"id": "r1", "sequence": "ACGTé"}]}).encode(), "application/json")
+	assert "r1" in str(raised.value)
+
+
+@pytest.mark.parametrize("raw, message", [
+	([], "params must be an object"),
+	({"nope": 1}, "Unknown params: nope"),
+	({"batch_size": 0}, "params.batch_size must be between"),
+	({"batch_size": True}, "params.batch_size must be an integer"),
+	({"batch_size": 2.5}, "params.batch_size must be an integer"),
+	({"novelty_threshold": "high"}, "params.novelty_threshold must be a number"),
+	({"kmer_size": 9}, "params.kmer_size must be between"),
+	({"clustering_method": "magic"}, "params.clustering_method must be one of"),
+	({"min_length": 500, "max_length": 100}, "min_length must not exceed"),
+])
+def test_bad_params_are_400(raw, message):
+	with pytest.raises(HttpError) as raised:
+		parse_params(raw)
+	assert raised.value.status == 400
+	assert message in str(raised.value)
+
+
+def test_numeric_params_are_coerced():
+	params = parse_params({"batch_size": "64", "novelty_threshold": 1, "min_length": 10.0})
+	assert (params.batch_size, params.novelty_threshold, params.min_length) == (64, 1.0, 10)
+
+
+def test_json_submission():
+	body = json.dumps({"sequences": ["ACGT", {"id": "r9", "sequence": "GGCC"}], "params": {"kmer_size": 3}, "depth_m": 4500}).encode()
+	ids, seqs, params, depth = parse_submission(body, "application/json")
+	assert ids == ["0", "r9"] and seqs == ["ACGT", "GGCC"]
+	assert params.kmer_size == 3 and depth == 4500
+
+
+def test_fasta_submission_uses_first_word_of_title():
+	ids, seqs, _, depth = parse_submission(b">read1 sample=A\nACGT\nACGT\n>read2\nGGCC\n", "text/x-fasta")
+	assert ids == ["read1", "read2"] and seqs == ["ACGTACGT", "GGCC"]
+	assert depth is None
+
+
+@pytest.mark.parametrize("body", [b"not json", b"[]", b'{"sequences": "ACGT"}', b'{"sequences": [1]}', b'{"sequences": []}', b'{"sequences": ["A"], "sample": []}'])
+def test_malformed_submissions_are_400(body):
+	with pytest.raises(HttpError) as raised:
+		parse_submission(body, "application/json")
+	assert raised.value.status == 400
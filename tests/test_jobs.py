@@ -0,0 +1,77 @@
+import pytest
+
+from marinetaxa import jobs, pipeline
+from marinetaxa.jobs import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+	return JobStore(tmp_path / "jobs.db")
+
+
+def submit(store, owner="ann"):
+	return store.submit(owner, [], pipeline.PipelineParams())
+
+
+def test_cancel_moves_each_state(store):
+	running = submit(store)
+	assert store.claim_next({})["id"] == running
+	store.pause(running)
+	assert store.get(running)["status"] == jobs.PAUSING
+	assert store.cancel(running) and store.get(running)["status"] == jobs.CANCELLING
+	queued = submit(store)
+	assert store.cancel(queued) and store.get(queued)["status"] == jobs.CANCELLED
+	assert not store.cancel(queued)
+
+
+def test_update_progress_returns_status(store):
+	job_id = submit(store)
+	store.claim_next({})
+	assert store.update_progress(job_id, "embed", 0.5, 100) == jobs.RUNNING
+	job = store.get(job_id)
+	assert (job["stage"], job["progress"], job["processed"]) == ("embed", 0.5, 100)
+	store.cancel(job_id)
+	assert store.update_progress(job_id, "embed", 0.6) == jobs.CANCELLING
+
+
+def test_update_progress_on_deleted_job_is_none(store):
+	job_id = submit(store)
+	store._execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+	assert store.update_progress(job_id, "embed", 0.5) is None
+
+
+def test_claim_next_is_fair_across_owners(store):
+	first = submit(store, "ann")
+	submit(store, "ann")
+	other = submit(store, "bob")
+	assert store.claim_next({})["id"] == first
+	assert store.claim_next({"ann": 1})["id"] == other
+
+
+@pytest.mark.parametrize("action, status", [("cancel", jobs.CANCELLED), ("pause", jobs.PAUSED), ("delete", None)])
+def test_worker_stops_at_next_progress_report(store, monkeypatch, action, status):
+	job_id = submit(store)
+	store.claim_next({})
+
+	def run_pipeline(inputs, params, report, artifact_store):
+		if action == "delete":
+			store._execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+		else:
+			getattr(store, action)(job_id)
+		report("embed", 1.0)
+		raise AssertionError("the report should have interrupted the run")
+
+	monkeypatch.setattr(pipeline, "run_pipeline", run_pipeline)
+	jobs._run_job(str(store.path), job_id)
+	job = store.get(job_id)
+	assert (job["status"] if job else None) == status
+
+
+def test_recover_requeues_orphaned_jobs(store):
+	running, cancelling = submit(store), submit(store)
+	store.claim_next({})
+	store.claim_next({})
+	store.cancel(cancelling)
+	store.recover()
+	assert store.get(running)["status"] == jobs.QUEUED
+	assert store.get(cancelling)["status"] == jobs.CANCELLED
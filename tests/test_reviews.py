@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+
+from marinetaxa import reviews
+from marinetaxa.reviews import DECISIONS, Review, ReviewStore
+
+NOVEL, KNOWN = DECISIONS[0], DECISIONS[1]
+
+
+@pytest.fixture
+def store(tmp_path):
+	return ReviewStore(tmp_path / "reviews.db", seed=False)
+
+
+def queue(store, cluster_id, candidate=True, novelty=0.9, depth_range="4500m"):
+	store.enqueue([{"cluster_id": cluster_id, "sequences": 5, "novelty": novelty, "depth_range": depth_range, "candidate": candidate}])
+	return store.cluster(cluster_id)["version"]
+
+
+def review(store, cluster_id, reviewer, decision):
+	return store.submit(Review(cluster_id, store.cluster(cluster_id)["version"], reviewer, decision, 3))
+
+
+def test_unflagged_cluster_judged_novel_lowers_recall(store):
+	queue(store, "run/c1")
+	review(store, "run/c1", "ann", NOVEL)
+	assert store.validation()["recall"] == 1.0
+	queue(store, "run/c2", candidate=False, novelty=0.3)
+	review(store, "run/c2", "ann", NOVEL)
+	recall = store.validation()["recall"]
+	# The control counts for 1 / CONTROL_FRACTION missed clusters
+	assert recall == pytest.approx(1 / (1 + 1 / reviews.CONTROL_FRACTION))
+	assert store.validation()["fdr"] == 0.0
+
+
+def test_run_candidates_adds_controls_from_unflagged_clusters():
+	ids = [f"C{i}" for i in range(400)]
+	clusters = pd.DataFrame({
+		"Cluster_ID": ids,
+		"Sequences": 3,
+		"Novelty_Score": 0.2,
+		"Candidate_Novel": ["Yes" if i < 10 else "No" for i in range(400)],
+	})
+	entries = reviews.run_candidates("job1", clusters)
+	candidates = [e for e in entries if e["candidate"]]
+	controls = [e for e in entries if not e["candidate"]]
+	assert len(candidates) == 10
+	assert controls and all(reviews.is_control(e["cluster_id"]) for e in controls)
+	assert 0 < len(controls) < 390
+	assert {e["priority"] for e in controls} == {"Low"}
+
+
+def test_stale_version_is_a_conflict(store):
+	version = queue(store, "c1")
+	assert store.submit(Review("c1", version, "ann", KNOWN, 4)) == version + 1
+	with pytest.raises(reviews.ReviewConflict) as raised:
+		store.submit(Review("c1", version, "bob", NOVEL, 4))
+	assert raised.value.version == version + 1
+	assert [r["reviewer"] for r in store.history("c1")] == ["ann"]
+
+
+def test_unknown_cluster_is_a_conflict_without_version(store):
+	with pytest.raises(reviews.ReviewConflict) as raised:
+		store.submit(Review("missing", 0, "ann", KNOWN, 4))
+	assert raised.value.version is None
+
+
+def test_submit_many_applies_in_order(store):
+	version = queue(store, "c1")
+	results = store.submit_many([Review("c1", version, "ann", DECISIONS[2], 2), Review("c1", version, "bob", KNOWN, 4), Review("c1", version + 1, "bob", KNOWN, 4)])
+	assert results[0] == version + 1
+	assert isinstance(results[1], reviews.ReviewConflict)
+	assert results[2] == version + 2
+	# "Needs More Data" reopens the cluster; a decisive review closes it
+	assert store.counts()["pending"] == 0
+
+
+def test_writer_group_commits_and_reports_conflicts(store):
+	version = queue(store, "c1")
+	writer = reviews.ReviewWriter(store).start()
+	assert writer.submit(Review("c1", version, "ann", KNOWN, 4)) == version + 1
+	with pytest.raises(reviews.ReviewConflict):
+		writer.submit(Review("c1", version, "bob", KNOWN, 4))
+
+
+def test_pair_counters_give_agreement_and_kappa(store):
+	# Two experts: agree on two clusters, disagree on two
+	calls = {"c1": (NOVEL, NOVEL), "c2": (KNOWN, KNOWN), "c3": (NOVEL, KNOWN), "c4": (KNOWN, NOVEL)}
+	for cluster_id, (first, second) in calls.items():
+		queue(store, cluster_id)
+		review(store, cluster_id, "ann", DECISIONS[2])
+		review(store, cluster_id, "ann", first)
+		review(store, cluster_id, "bob", second)
+	metrics = store.validation()
+	# Bob's calls pair with Ann's latest decision on each cluster
+	assert metrics["pairs"] == 4
+	assert metrics["agreement"] == pytest.approx(0.5)
+	assert metrics["kappa"] == pytest.approx(0.0)
+	assert store.validation("expert:ann")["reviews"] == 8
+
+
+def test_latest_verdict_replaces_earlier_one(store):
+	queue(store, "c1")
+	review(store, "c1", "ann", NOVEL)
+	assert store.counts()["novel"] == 1
+	review(store, "c1", "bob", KNOWN)
+	assert store.counts()["novel"] == 0
+	metrics = store.validation()
+	assert metrics["validated"] == 1 and metrics["fdr"] == 1.0
+	# Each expert keeps their own call
+	assert store.validation("expert:ann")["fdr"] == 0.0
+	assert store.validation("expert:bob")["fdr"] == 1.0
+
+
+def test_breakdown_by_depth_zone(store):
+	queue(store, "c1", depth_range="4000-6000m")
+	queue(store, "c2", depth_range="7000m")
+	review(store, "c1", "ann", NOVEL)
+	review(store, "c2", "ann", KNOWN)
+	table = store.validation_breakdown("depth").set_index("Depth")
+	assert table.loc["Abyssal", "Reviews"] == 1 and table.loc["Hadal", "FDR"] == 1.0
+
+
+def test_counters_are_rebuilt_from_existing_reviews(store, tmp_path):
+	queue(store, "c1")
+	queue(store, "c2", candidate=False)
+	review(store, "c1", "ann", NOVEL)
+	review(store, "c2", "bob", KNOWN)
+	before = store.validation()
+	store._query("DELETE FROM review_stats")
+	assert ReviewStore(store.path, seed=False).validation() == before
@@ -0,0 +1,48 @@
+import pytest
+
+from marinetaxa import reviews
+from marinetaxa.reviews import DECISIONS, Review, ReviewStore
+from marinetaxa.scheduler import ReviewScheduler
+
+
+def make_store(tmp_path, clusters):
+	store = ReviewStore(tmp_path / "reviews.db", seed=False)
+	store.enqueue([{"cluster_id": cid, "sequences": 10, "novelty": novelty, "location": location, "queued": 1000.0} for cid, novelty, location in clusters])
+	return store
+
+
+def test_assignment_does_not_conflict_with_an_open_review(tmp_path):
+	store = make_store(tmp_path, [("c1", 0.9, "Mariana Trench")])
+	opened = store.cluster("c1")["version"]
+	assert ReviewScheduler(store, experts=[{"name": "ann", "regions": []}]).assign_next("ann") == "c1"
+	assert store.cluster("c1")["Assigned_Expert"] == "ann"
+	assert store.submit(Review("c1", opened, "bob", DECISIONS[1], 4)) == opened + 1
+
+
+def test_assign_next_prefers_score_and_specialty(tmp_path):
+	store = make_store(tmp_path, [("c1", 0.95, "Azores"), ("c2", 0.85, "Mariana Trench"), ("c3", 0.5, "Azores")])
+	scheduler = ReviewScheduler(store, experts=[{"name": "ann", "regions": ["mariana"]}, {"name": "bob", "regions": []}])
+	assert scheduler.assign_next("ann") == "c2"
+	assert scheduler.assign_next("bob") == "c1"
+	assert scheduler.assign_next("bob") == "c3"
+	assert scheduler.assign_next("bob") is None
+
+
+def test_stale_heap_entries_are_skipped_after_changes_elsewhere(tmp_path):
+	store = make_store(tmp_path, [("c1", 0.95, ""), ("c2", 0.6, "")])
+	scheduler = ReviewScheduler(store, experts=[{"name": "ann", "regions": []}])
+	assert [cid for cid, _ in scheduler.ranking()] == ["c1", "c2"]
+	# Reviewed through another process after the scheduler synced
+	store.submit(Review("c1", store.cluster("c1")["version"], "bob", DECISIONS[0], 5))
+	assert scheduler.assign_next("ann") == "c2"
+	assert [cid for cid, _ in scheduler.ranking()] == []
+
+
+def test_assign_guards_on_change_number(tmp_path):
+	store = make_store(tmp_path, [("c1", 0.9, "")])
+	rows, _ = store.changes()
+	changed = rows[0]["changed"]
+	store.assign("c1", "ann", changed)
+	with pytest.raises(reviews.ReviewConflict):
+		store.assign("c1", "bob", changed)
+	assert store.cluster("c1")["Assigned_Expert"] == "ann"
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from marinetaxa.sites import PartitionedSites
+
+
+def test_feature_mean_skips_sites_without_a_count():
+	frame = pd.DataFrame({
+		"lat": [10.0, 11.0, 12.0, 13.0],
+		"lon": [140.0, 141.0, 142.0, 143.0],
+		"depth": [4000.0, 5000.0, 6000.0, 7000.0],
+		"novel_taxa": [4.0, np.nan, 2.0, 6.0],
+		"feature_type": ["Trench", "Trench", "Trench", "Ridge"],
+		"location": ["a", "b", "c", "d"],
+	})
+	stats = PartitionedSites(frame).feature_stats(0, 11000)
+	assert stats.loc["Trench", ("novel_taxa", "mean")] == 3.0
+	assert stats.loc["Trench", ("novel_taxa", "sum")] == 6.0
+	assert stats.loc["Trench", ("location", "count")] == 3
+	expected = frame.groupby("feature_type")["novel_taxa"].mean()
+	assert stats[("novel_taxa", "mean")].sort_index().tolist() == expected.sort_index().tolist()
@@ -0,0 +1,80 @@
+import os
+import urllib.request
+
+from marinetaxa import tiles
+from marinetaxa.tiles import TileCache, TileServer
+
+
+def cache(tmp_path, budget):
+	return TileCache(tmp_path / "tiles", budget=budget, upstream=None)
+
+
+def test_put_evicts_least_recently_served_past_the_budget(tmp_path):
+	tiles_cache = cache(tmp_path, budget=250)
+	for x in range(3):
+		tiles_cache.put(3, x, 0, b"x" * 100)
+	# Three 100-byte tiles do not fit in 250 bytes: the oldest goes
+	assert (3, 0, 0) not in tiles_cache and len(tiles_cache) == 2 and tiles_cache.total == 200
+	assert not tiles_cache.path(3, 0, 0).exists()
+	# Serving a tile makes it recent, so the other one is evicted next
+	assert tiles_cache.get(3, 1, 0) == b"x" * 100
+	tiles_cache.put(3, 3, 0, b"x" * 100)
+	assert (3, 1, 0) in tiles_cache and (3, 2, 0) not in tiles_cache
+
+
+def test_replacing_a_tile_adjusts_the_total(tmp_path):
+	tiles_cache = cache(tmp_path, budget=1000)
+	tiles_cache.put(1, 0, 0, b"x" * 100)
+	tiles_cache.put(1, 0, 0, b"x" * 40)
+	assert len(tiles_cache) == 1 and tiles_cache.total == 40
+
+
+def test_a_single_tile_over_budget_is_kept(tmp_path):
+	tiles_cache = cache(tmp_path, budget=10)
+	tiles_cache.put(0, 0, 0, b"x" * 100)
+	assert (0, 0, 0) in tiles_cache
+
+
+def test_reopened_cache_keeps_the_serving_order(tmp_path):
+	tiles_cache = cache(tmp_path, budget=1000)
+	for x, mtime in [(0, 300), (1, 100), (2, 200)]:
+		tiles_cache.put(2, x, 0, b"x" * 100)
+		os.utime(tiles_cache.path(2, x, 0), (mtime, mtime))
+	reopened = cache(tmp_path, budget=250)
+	assert reopened.total == 300
+	reopened.put(2, 3, 0, b"x" * 10)
+	# Rebuilt from mtimes, so x=1 is the least recently served
+	assert (2, 1, 0) not in reopened and (2, 2, 0) in reopened and (2, 0, 0) in reopened
+	assert reopened.total == 210
+
+
+def test_miss_without_upstream_is_none(tmp_path):
+	assert cache(tmp_path, budget=1000).get(5, 1, 1) is None
+
+
+def test_server_serves_cached_tiles_and_404s_misses(tmp_path):
+	tiles_cache = cache(tmp_path, budget=1000)
+	tiles_cache.put(1, 1, 0, b"png")
+	server = TileServer(tiles_cache, "127.0.0.1", 0).start()
+	try:
+		base = f"http://127.0.0.1:{server.port}"
+		with urllib.request.urlopen(f"{base}/1/1/0.png") as response:
+			assert response.read() == b"png"
+		for path in ("/1/0/0.png", "/1/2/0.png", "/nope"):
+			try:
+				urllib.request.urlopen(base + path)
+			except urllib.error.HTTPError as exc:
+				assert exc.code == 404
+			else:
+				raise AssertionError(f"{path} was served")
+	finally:
+		server.stop()
+
+
+def test_tile_url_is_withheld_from_remote_browsers_of_a_loopback_server(monkeypatch):
+	monkeypatch.delenv("MARINETAXA_TILE_URL", raising=False)
+	monkeypatch.setenv("MARINETAXA_TILE_HOST", "127.0.0.1")
+	assert tiles.tile_url("localhost:8501").startswith("http://127.0.0.1:")
+	assert tiles.tile_url("10.0.0.5:8501") is None
+	monkeypatch.setenv("MARINETAXA_TILE_HOST", "0.0.0.0")
+	assert tiles.tile_url("10.0.0.5:8501").startswith("http://10.0.0.5:")